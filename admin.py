@@ -5,6 +5,10 @@ import json
 import datetime
 from werkzeug.utils import secure_filename
 import uuid
+import pandas as pd
+from incidents import incident_series, normalize_forest, CATEGORIES
+from range_index import parse_range, get_range_index, aggregate
+from features import ingest_scenes, data_version
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -108,4 +112,97 @@ def get_uploads():
     with open(metadata_file, "r") as f:
         uploads = json.load(f)
 
-    return jsonify(uploads), 200
\ No newline at end of file
+    return jsonify(uploads), 200
+
+def _join_rfdi(series, forests, resolution):
+    """Outer-join mean RFDI, alert and scene counts onto the incident series by forest and period."""
+    index = get_range_index()
+    start_day, end_day = parse_range(request.args)
+    known = set(index["categories"])
+    rfdi_forests = [f for f in (forests or series["forest"].unique()) if f in known]
+    if not rfdi_forests:
+        return series
+    # Daily buckets are one-day rolling windows, labelled by their day
+    if resolution == "daily":
+        rfdi = aggregate(index, rfdi_forests, start_day, end_day, "rolling", 1, per_forest=True)
+    else:
+        rfdi = aggregate(index, rfdi_forests, start_day, end_day, resolution, per_forest=True)
+    rfdi = rfdi.astype({"forest": str})[["forest", "period", "year", "month", "RFDI", "alert", "count"]]
+    series = series.merge(rfdi.rename(columns={"count": "scenes"}),
+                          on=["forest", "period", "year", "month"], how="outer")
+    counts = ["reports"] + CATEGORIES
+    series[counts] = series[counts].fillna(0).astype(int)
+    return series.sort_values(["forest", "period"], kind="stable").reset_index(drop=True)
+
+
+@admin_bp.route("/incidents", methods=["GET"])
+def get_incident_series():
+    """
+    Whistleblower report counts and keyword-category tallies (logging, charcoal,
+    fire, encroachment) per forest and period.
+    Accepts query parameters: forests (comma-separated), resolution (daily, weekly,
+    monthly; default weekly), date_from, date_to, include_rfdi=1 to join the
+    RFDI trend for the same forests and periods.
+    """
+    role = get_user_role()
+    if role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        forests_param = request.args.get("forests")
+        forests = [normalize_forest(f) for f in forests_param.split(",") if f.strip()] if forests_param else None
+        resolution = request.args.get("resolution") or "weekly"
+        date_from = request.args.get("date_from")
+        date_to = request.args.get("date_to")
+        series = incident_series(
+            forests, resolution,
+            datetime.date.fromisoformat(date_from) if date_from else None,
+            datetime.date.fromisoformat(date_to) if date_to else None,
+        )
+
+        if request.args.get("include_rfdi") == "1":
+            series = _join_rfdi(series, forests, resolution)
+
+        result = series.astype(object).where(series.notna(), None).to_dict(orient="records")
+        return jsonify({"series": result, "resolution": resolution, "categories": CATEGORIES}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@admin_bp.route("/scenes", methods=["POST"])
+def ingest_new_scenes():
+    """
+    Add newly arrived Sentinel-1 scenes without rebuilding the snapshot. Accepts
+    a JSON body {"scenes": [{"forest", "date", "VV", "VH"}, ...]} or a CSV file
+    upload with those columns. Every worker picks the scenes up, and caches such
+    as the anomaly table refresh only the forests that received scenes.
+    """
+    role = get_user_role()
+    if role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        if "file" in request.files:
+            file = request.files["file"]
+            file.seek(0, os.SEEK_END)
+            if file.tell() > MAX_FILE_SIZE:
+                return jsonify({"error": "File too large. Maximum size is 10MB"}), 400
+            file.seek(0)
+            scenes = pd.read_csv(file)
+        else:
+            body = request.get_json(silent=True) or {}
+            if not isinstance(body.get("scenes"), list):
+                return jsonify({"error": "Provide a CSV file or a JSON body with a scenes list"}), 400
+            scenes = pd.DataFrame(body["scenes"])
+
+        received = len(scenes)
+        added = ingest_scenes(scenes)
+        return jsonify({"received": received, "added": added, "data_version": data_version()}), 200
+
+    except ValueError as e:
+        return jsonify({"error": f"Invalid scenes: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,203 @@
+import os
+import math
+import time
+import logging
+import threading
+from functools import wraps
+import jwt
+from flask import Response, jsonify, request
+from metrics import inc, gauge_add
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_THIS_SECRET")
+
+
+def _env(name, default):
+    return float(os.getenv(name, default))
+
+
+# Per endpoint: token bucket refill rate (requests/minute) and burst, per user and
+# for the whole process, plus how many run at once and how many may wait for a slot.
+LIMITS = {
+    "evaluate": {
+        "user_rate": _env("ADMISSION_EVALUATE_USER_RPM", 6), "user_burst": 3, "user_concurrency": 1,
+        "global_rate": _env("ADMISSION_EVALUATE_RPM", 60), "global_burst": 10,
+        "concurrency": 4, "queue": 8, "shared": "llm",
+    },
+    "policy_results": {
+        "user_rate": _env("ADMISSION_POLICY_USER_RPM", 10), "user_burst": 5, "user_concurrency": 2,
+        "global_rate": _env("ADMISSION_POLICY_RPM", 120), "global_burst": 20,
+        "concurrency": 4, "queue": 8, "shared": "llm",
+    },
+    "summarize_article": {
+        "user_rate": _env("ADMISSION_SUMMARY_USER_RPM", 4), "user_burst": 2, "user_concurrency": 1,
+        "global_rate": _env("ADMISSION_SUMMARY_RPM", 30), "global_burst": 5,
+        "concurrency": 2, "queue": 4, "shared": "llm",
+    },
+}
+
+# Request threads that the LLM-bound endpoints together may hold per process, running
+# or queued. Each one waits on the model for up to LLM_TIMEOUT, so without this cap a
+# few slow evaluations would take every gthread thread from the dashboard views.
+LLM_THREADS = int(os.getenv("ADMISSION_LLM_THREADS", max(1, int(os.getenv("WEB_THREADS", "8")) // 2)))
+SHARED_LIMITS = {"llm": LLM_THREADS}
+
+# How long a queued request waits for a running slot before it is turned away.
+QUEUE_TIMEOUT = _env("ADMISSION_QUEUE_TIMEOUT", 10)
+
+# Idle per-user buckets are dropped once this many are tracked; an idle bucket is full anyway.
+MAX_TRACKED_USERS = 10_000
+IDLE_SECONDS = 600
+
+
+class TokenBucket:
+    """Classic token bucket; rate in tokens per second."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class Rejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+_SHARED = {name: threading.BoundedSemaphore(n) for name, n in SHARED_LIMITS.items()}
+
+
+class Gate:
+    """Admission state for one endpoint: token buckets, running slots and a bounded wait queue."""
+
+    def __init__(self, name, limits):
+        self.name = name
+        self.limits = limits
+        self.global_bucket = TokenBucket(limits["global_rate"] / 60, limits["global_burst"])
+        self.user_buckets = {}
+        self.user_running = {}
+        self.slots = threading.BoundedSemaphore(limits["concurrency"])
+        self.shared = _SHARED.get(limits.get("shared"))
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def _user_bucket(self, user):
+        with self.lock:
+            bucket = self.user_buckets.get(user)
+            if bucket is None:
+                if len(self.user_buckets) >= MAX_TRACKED_USERS:
+                    cutoff = time.monotonic() - IDLE_SECONDS
+                    self.user_buckets = {k: b for k, b in self.user_buckets.items() if b.updated > cutoff}
+                bucket = TokenBucket(self.limits["user_rate"] / 60, self.limits["user_burst"])
+                self.user_buckets[user] = bucket
+            return bucket
+
+    def enter(self, user):
+        """Admit the request or raise Rejected. Blocks at most QUEUE_TIMEOUT for a slot."""
+        wait = self._user_bucket(user).take()
+        if wait:
+            raise Rejected("user_rate", wait)
+        wait = self.global_bucket.take()
+        if wait:
+            raise Rejected("global_rate", wait)
+
+        with self.lock:
+            if self.user_running.get(user, 0) >= self.limits["user_concurrency"]:
+                raise Rejected("user_concurrency", 1)
+            if self.waiting >= self.limits["queue"]:
+                raise Rejected("queue_full", QUEUE_TIMEOUT)
+            if self.shared is not None and not self.shared.acquire(blocking=False):
+                raise Rejected("threads_busy", QUEUE_TIMEOUT)
+            self.waiting += 1
+            self.user_running[user] = self.user_running.get(user, 0) + 1
+
+        gauge_add("admission_queue_depth", 1, endpoint=self.name)
+        try:
+            acquired = self.slots.acquire(timeout=QUEUE_TIMEOUT)
+        finally:
+            gauge_add("admission_queue_depth", -1, endpoint=self.name)
+            with self.lock:
+                self.waiting -= 1
+        if not acquired:
+            self._release(user)
+            raise Rejected("queue_timeout", QUEUE_TIMEOUT)
+
+    def leave(self, user):
+        self.slots.release()
+        self._release(user)
+
+    def _release(self, user):
+        """Give back the caller's running count and the shared thread share taken in enter."""
+        if self.shared is not None:
+            self.shared.release()
+        with self.lock:
+            running = self.user_running.get(user, 0) - 1
+            if running > 0:
+                self.user_running[user] = running
+            else:
+                self.user_running.pop(user, None)
+
+
+_GATES = {name: Gate(name, limits) for name, limits in LIMITS.items()}
+
+
+def request_user():
+    """JWT username of the caller; the client address when there is no valid token."""
+    user = getattr(request, "user", None)
+    if user is None:
+        auth_header = request.headers.get("Authorization", "")
+        if " " in auth_header:
+            try:
+                user = jwt.decode(auth_header.split(" ")[1], SECRET_KEY, algorithms=["HS256"])
+            except jwt.InvalidTokenError:
+                user = None
+    if user and user.get("username"):
+        return f"user:{user['username']}"
+    return f"addr:{request.remote_addr}"
+
+
+def admission_controlled(name):
+    """Reject with 429 and Retry-After when the endpoint or the caller is over its limits."""
+    gate = _GATES[name]
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user = request_user()
+            try:
+                gate.enter(user)
+            except Rejected as e:
+                inc("admission_rejected_total", endpoint=name, reason=e.reason)
+                logger.debug("admission: rejected %s on %s (%s)", user, name, e.reason)
+                response = jsonify({"error": "Too many requests, please retry later"})
+                response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+                return response, 429
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                gate.leave(user)
+                raise
+            if isinstance(result, Response) and result.is_streamed:
+                # Hold the slot until the stream has been sent
+                result.call_on_close(lambda: gate.leave(user))
+            else:
+                gate.leave(user)
+            return result
+        return wrapper
+    return decorator
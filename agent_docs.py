@@ -3,26 +3,28 @@ import logging
 import asyncio
 import pandas as pd
 from textwrap import shorten
-from google import genai
-from analysis import df_new, monthly_ndvi, compute_environmental_index
+from analysis import monthly_rfdi, compute_environmental_index
+from features import get_features
+from metrics import span
+from serving import offload
+from drivers import get_drivers_table, totals_by_driver
+
+logger = logging.getLogger(__name__)
 
 MAX_CONTEXT_CHARS = 50_000
+POLICY_MODEL = "gemini-2.0-flash"
 
+POLICY_API_ERROR = "Unable to generate policy evaluation due to API failure."
 
-# ==========================
-# LOAD DRIVERS CSV
-# ==========================
-def load_forest_loss_csv(path: str) -> pd.DataFrame:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Drivers CSV not found: {path}")
-    df = pd.read_csv(path)
-    return df
+
+class PolicyGenerationError(Exception):
+    """The model call for a policy report failed; nothing should be cached for it."""
 
 
 # ==========================
 # BUILD COMBINED CONTEXT
 # ==========================
-def build_combined_context(df, monthly_ndvi, drivers_df) -> str:
+def build_combined_context(df, monthly_ndvi, drivers) -> str:
     parts = []
 
     # ==== RFDI CSV SUMMARY ====
@@ -63,16 +65,17 @@ def build_combined_context(df, monthly_ndvi, drivers_df) -> str:
         parts.append(f"<ERROR_COMPUTING_EPI: {e}>")
 
     # ==== FOREST LOSS DRIVERS ====
-    parts.append("\n=== FOREST LOSS DRIVERS DATA (CSV) ===")
-    parts.append(f"Columns: {', '.join(list(drivers_df.columns))}")
-    parts.append(f"Rows: {len(drivers_df)}")
-
+    # The full driver x year table is small, so the model sees every year rather than a sample
+    parts.append("\n=== FOREST LOSS DRIVERS DATA ===")
     try:
-        drivers_csv = drivers_df.head(30).to_csv(index=False)
-        parts.append("Sample forest loss drivers (up to 30 rows):")
-        parts.append(drivers_csv)
+        parts.append("Total loss area (ha), gross carbon emissions (Mg) and share of loss area by driver:")
+        parts.append(totals_by_driver(drivers).to_csv(index=False))
+        parts.append("Loss area (ha) by driver and year:")
+        parts.append(drivers["pivots"]["loss_area_ha"].round(2).to_csv())
+        parts.append("Gross carbon emissions (Mg) by driver and year:")
+        parts.append(drivers["pivots"]["gross_carbon_emissions_Mg"].round(0).to_csv())
     except Exception as e:
-        parts.append(f"<ERROR_SERIALIZING_DRIVERS_CSV: {e}>")
+        parts.append(f"<ERROR_SERIALIZING_DRIVERS: {e}>")
 
     combined = "\n\n".join(parts)
     if len(combined) > MAX_CONTEXT_CHARS:
@@ -81,28 +84,45 @@ def build_combined_context(df, monthly_ndvi, drivers_df) -> str:
     return combined
 
 
-async def policy_evaluation(forest=None):
-    if not forest:
-        return "Please select a forest to generate the policy evaluation."
-
+def build_policy_prompt(forest):
+    """Prompt for the policy report of one forest, or None when the forest has no data. CPU-bound."""
     # Filter df_new for the selected forest
+    df_new = get_features()
     df_new_filtered = df_new[df_new['forest'] == forest]
     if df_new_filtered.empty:
-        return f"No data available for the selected forest: {forest}"
+        return None
 
     # Recompute monthly_ndvi for the filtered data
-    monthly_ndvi_filtered = df_new_filtered.groupby(['year', 'month']).agg({
-        'RFDI': 'mean',
-        'alert': 'sum'
-    }).reset_index().sort_values(['year', 'month'])
+    monthly_ndvi_filtered = monthly_rfdi(df_new_filtered)
+
+    with span("context_build"):
+        data_context = build_combined_context(df_new_filtered, monthly_ndvi_filtered, get_drivers_table())
+
+    return policy_task_text(data_context)
 
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-    drivers_df = load_forest_loss_csv("tree_cover_loss_by_driver.csv")
+def build_policy_prompts(forests):
+    """
+    Prompts for several forests from one groupby over the feature frame and a
+    single drivers lookup; forests without data map to None. CPU-bound.
+    """
+    df_new = get_features()
+    drivers = get_drivers_table()
+    groups = {str(forest): group for forest, group in df_new.groupby("forest", observed=True)}
 
-    data_context = build_combined_context(df_new_filtered, monthly_ndvi_filtered, drivers_df)
+    prompts = {}
+    for forest in forests:
+        group = groups.get(forest)
+        if group is None:
+            prompts[forest] = None
+            continue
+        with span("context_build"):
+            prompts[forest] = policy_task_text(build_combined_context(group, monthly_rfdi(group), drivers))
+    return prompts
 
-    task_text = (
+
+def policy_task_text(data_context):
+    return (
     "You are an environmental policy analyst. Using the following data sources:\n"
     "- Sentinel-1 satellite-based RVI/RFDI/VV/VH vegetation condition trends for a semi-arid area\n"
     "- Environmental Performance Index (EPI) trends: a composite metric (0-100) combining RFDI, RVI, VH/VV ratio, and alert data\n"
@@ -144,17 +164,88 @@ async def policy_evaluation(forest=None):
 )
 
 
+async def policy_evaluation(forest=None):
+    """
+    Policy report for one forest. The prompt is built on the analytics pool and
+    the Gemini call is awaited on the async client, so the event loop is never
+    blocked by pandas work or by a slow response.
+    """
+    if not forest:
+        return "Please select a forest to generate the policy evaluation."
 
+    task_text = await offload(build_policy_prompt, forest)
+    if task_text is None:
+        return f"No data available for the selected forest: {forest}"
+
+    return await generate_policy_report(task_text)
+
+
+def gemini_client():
+    # Imported here so the SDK is only loaded once an evaluation is requested
+    from google import genai
+
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+async def generate_policy_report(task_text, client=None):
+    """Gemini response text for a prepared prompt; raises PolicyGenerationError on API failure."""
+    client = client or gemini_client()
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=task_text
-        )
+        with span("llm_call"):
+            response = await client.aio.models.generate_content(
+                model=POLICY_MODEL,
+                contents=task_text
+            )
         return response.text
 
     except Exception as e:
-        logging.error(f"Error in policy_evaluation: {e}")
-        return "Error: Unable to generate policy evaluation due to API failure."
+        logger.error("Error in policy_evaluation: %s", e)
+        raise PolicyGenerationError(POLICY_API_ERROR) from e
+
+
+async def batch_policy_evaluation(forests, parallelism):
+    """
+    Reports for several forests, yielded as (forest, text, error) in completion
+    order; text is None and error set when that forest's model call failed.
+    Prompts are built in one pass on the analytics pool; at most `parallelism`
+    Gemini calls are in flight at once.
+    """
+    prompts = await offload(build_policy_prompts, forests)
+    client = gemini_client()
+    limit = asyncio.Semaphore(parallelism)
+
+    async def evaluate(forest):
+        task_text = prompts[forest]
+        if task_text is None:
+            return forest, f"No data available for the selected forest: {forest}", None
+        async with limit:
+            try:
+                return forest, await generate_policy_report(task_text, client), None
+            except PolicyGenerationError as e:
+                return forest, None, str(e)
+
+    for done in asyncio.as_completed([evaluate(forest) for forest in forests]):
+        yield await done
+
+
+async def stream_policy_evaluation(forest):
+    """
+    Same report as policy_evaluation, yielded as text chunks while Gemini
+    generates it. API errors propagate so the caller can report them and
+    skip caching a partial report.
+    """
+    task_text = await offload(build_policy_prompt, forest)
+    if task_text is None:
+        yield f"No data available for the selected forest: {forest}"
+        return
+
+    client = gemini_client()
+
+    with span("llm_stream"):
+        stream = await client.aio.models.generate_content_stream(model=POLICY_MODEL, contents=task_text)
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
 
 
 # ==========================
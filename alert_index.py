@@ -0,0 +1,102 @@
+import threading
+import numpy as np
+import pandas as pd
+from features import get_features, data_version, ALERT_THRESHOLD, ALERT_SCORE
+from metrics import span, cache_lookup
+
+# Groups are laid out one after another on a single sorted key axis:
+# key = group_id * KEY_STRIDE + (score + 1), where score is the alert RFDI
+# (features.ALERT_SCORE). It lies in [-1, 1], so each
+# group occupies its own [gid * 4, gid * 4 + 2] band and one searchsorted
+# call answers "how many values exceed t" for every group at once.
+KEY_STRIDE = 4.0
+
+_INDEX = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def parse_threshold(value):
+    """Parse a threshold query parameter; None when absent, ValueError when invalid."""
+    if value is None or value == "":
+        return None
+    threshold = float(value)
+    if not -1 <= threshold <= 1:
+        raise ValueError("threshold must be between -1 and 1")
+    return threshold
+
+
+def build_alert_index(df):
+    """
+    Sort the alert RFDI within each (forest, year, month) group.
+    Returns the group table (forest, year, month, start, end) and the sorted key array.
+    """
+    forest_codes = df["forest"].cat.codes.to_numpy()
+    year = df["year"].to_numpy()
+    month = df["month"].to_numpy()
+    rfdi = df[ALERT_SCORE].to_numpy()
+
+    order = np.lexsort((rfdi, month, year, forest_codes))
+    forest_codes, year, month, rfdi = forest_codes[order], year[order], month[order], rfdi[order]
+
+    boundary = np.ones(len(order), dtype=bool)
+    boundary[1:] = (forest_codes[1:] != forest_codes[:-1]) | (year[1:] != year[:-1]) | (month[1:] != month[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(order))
+    group_id = np.cumsum(boundary) - 1
+
+    groups = pd.DataFrame({
+        "forest": pd.Categorical.from_codes(forest_codes[starts], categories=df["forest"].cat.categories),
+        "year": year[starts],
+        "month": month[starts],
+        "start": starts,
+        "end": ends,
+    })
+    keys = group_id * KEY_STRIDE + (rfdi.astype(np.float64) + 1)
+    return {"groups": groups, "keys": keys}
+
+
+def get_alert_index():
+    """Alert index for the current feature frame, rebuilt when the data version changes."""
+    version = data_version()
+    hit = _INDEX.get("version") == version
+    cache_lookup("alert_index", hit)
+    if not hit:
+        with _INDEX_LOCK:
+            if _INDEX.get("version") != version:
+                with span("alert_index_build"):
+                    _INDEX["index"] = build_alert_index(get_features())
+                _INDEX["version"] = version
+    return _INDEX["index"]
+
+
+def group_alert_counts(threshold=None):
+    """
+    Group table with an extra "alert" column: the number of scenes flagged
+    at threshold (as features.flag_alerts would) in each (forest, year, month).
+    """
+    if threshold is None:
+        threshold = ALERT_THRESHOLD
+    index = get_alert_index()
+    groups = index["groups"]
+    # Compare at float32 like the score column itself.
+    t = np.float64(np.float32(threshold)) + 1
+    query = np.arange(len(groups)) * KEY_STRIDE + t
+    above = groups["end"].to_numpy() - np.searchsorted(index["keys"], query, side="right")
+    return groups.assign(alert=above)
+
+
+def filter_groups(groups, forests=None, year=None, month=None):
+    mask = np.ones(len(groups), dtype=bool)
+    if forests:
+        mask &= groups["forest"].isin(forests).to_numpy()
+    if year is not None:
+        mask &= groups["year"].to_numpy() == year
+    if month is not None:
+        mask &= groups["month"].to_numpy() == month
+    return groups[mask]
+
+
+def count_alerts(threshold=None, forests=None, year=None, month=None):
+    """Total scenes above threshold for the given forests/year/month."""
+    groups = filter_groups(group_alert_counts(threshold), forests, year, month)
+    return int(groups["alert"].sum())
@@ -1,174 +1,379 @@
-import pandas as pd
 import numpy as np
-import os
 import logging
 from flask import Blueprint, jsonify, request
+from metrics import span
+from serving import run_blocking
+from result_cache import cached_response
+from features import get_features, compute_environmental_index, flag_alerts, BBOX_COLUMNS, PIXEL_COLUMNS, ALERT_SCORE
+from alert_index import parse_threshold, group_alert_counts, filter_groups
+from anomalies import get_anomalies
+from range_index import is_range_query, range_args, parse_range, get_range_index, aggregate
+from cube import get_cube, select, cross_forest_z, parse_cadence, dates
+from forecast import get_models, forecast, model_summary, ForecastUnavailable, VARIABLES as FORECAST_VARIABLES, MAX_HORIZON, DEFAULT_HORIZON, DEFAULT_LEVEL
+from spatial import get_spatial_index, cells_in_bbox, cells_in_polygon, rows_for_cells, parse_bbox, parse_polygon
 
 ndvi_bp = Blueprint("ndvi", __name__)
 
+logger = logging.getLogger(__name__)
 
-df = pd.read_csv("SentinelMakueni.csv")  
 
-frames = []
-for forest in df['forest'].unique():
-    sub = df[df['forest'] == forest].sort_values('date')
+def monthly_rfdi(df):
+    """Mean RFDI and alert count per (year, month)."""
+    return df.groupby(['year', 'month']).agg({
+        'RFDI': 'mean',
+        'alert': 'sum'
+    }).reset_index().sort_values(['year', 'month'])
 
-    sub = sub.drop_duplicates(subset='date')
 
-    sub['VH'] = sub['VH'].interpolate(method='linear', limit_direction='both')
+def monthly_trend(forests_param, year_filter, month_filter, threshold):
+    """Mean RFDI per (year, month), per forest when several are given, with alert counts when a threshold is."""
+    df_new = get_features()
 
-    frames.append(sub)
+    with span("filtering", endpoint="s1_trend"):
+        df_filtered = df_new.copy()
+        logger.debug("DataFrame length before filtering: %d", len(df_new))
 
+        selected_forests = None
+        if forests_param:
+            if "," in forests_param:
+                selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
+                df_filtered = df_filtered[df_filtered["forest"].isin(selected_forests)]
+            else:
+                # single forest
+                df_filtered = df_filtered[df_filtered["forest"] == forests_param]
+                selected_forests = [forests_param]
 
+        if year_filter:
+            df_filtered = df_filtered[df_filtered["year"] == int(year_filter)]
+        if month_filter:
+            df_filtered = df_filtered[df_filtered["month"] == int(month_filter)]
 
-df_clean = pd.concat(frames, ignore_index=True)
+    logger.debug("DataFrame length after filtering: %d", len(df_filtered))
 
-if not os.path.exists("Makueni_interpolated.csv"):
-    try:
-        df_clean.to_csv("Makueni_interpolated.csv", index=False)
-    except PermissionError:
-        logging.warning("Permission denied when writing Makueni_interpolated.csv")
-
-df_new = df_clean.copy()
-df_new.drop(columns=['interpolated_flag', '.geo', 'image_count', 'system:index', 'orbit','relative_orbit'],
-            inplace=True, errors="ignore")
-
-
-df_new["date"] = pd.to_datetime(df_new["date"])
-df_new["month"] = df_new["date"].dt.month 
-df_new["year"] = df_new["date"].dt.year
-VV_lin = 10 ** (df["VV"] / 10)
-VH_lin = 10 ** (df["VH"] / 10)
-
-
-def compute_s1_features(df):
-    df["VV"] = df["VV"].replace([np.inf, -np.inf], np.nan).fillna(0)
-    df["VH"] = df["VH"].replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    df["VV_lin"] = 10 ** (df["VV"] / 10)
-    df["VH_lin"] = 10 ** (df["VH"] / 10)
-
-    df["VH_VV_ratio"] = np.where(df["VV_lin"] != 0, df["VH_lin"] / df["VV_lin"], 0)
-
-    df["RVI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
-                         4 * df["VH_lin"] / (df["VV_lin"] + df["VH_lin"]),
-                         0)
-
-    df["RFDI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
-                          (df["VV_lin"] - df["VH_lin"]) / (df["VV_lin"] + df["VH_lin"]),
-                          0)
-    df['alert'] = np.where(df['RFDI'] > 0.61, 1, 0) 
-
-
-    return df 
-
-df_new = compute_s1_features(df_new)
+    with span("groupby", endpoint="s1_trend"):
+        if selected_forests and len(selected_forests) > 1:
+            # Multiple forests: aggregate by year, month, forest
+            df_aggregated = df_filtered.groupby(['year', 'month', 'forest'], observed=True).agg({'RFDI': 'mean'}).reset_index().sort_values(['forest', 'year', 'month'])
+        else:
+            # Single forest or all: aggregate by year and month
+            df_aggregated = df_filtered.groupby(['year', 'month']).agg({'RFDI': 'mean'}).reset_index().sort_values(['year', 'month'])
+
+    if threshold is not None:
+        # Alert counts for the requested threshold come from the sorted RFDI index
+        with span("alert_index_query", endpoint="s1_trend"):
+            keys = ['year', 'month', 'forest'] if 'forest' in df_aggregated.columns else ['year', 'month']
+            groups = filter_groups(group_alert_counts(threshold), selected_forests,
+                                   int(year_filter) if year_filter else None,
+                                   int(month_filter) if month_filter else None)
+            alerts = groups.groupby(keys, observed=True)['alert'].sum().reset_index()
+            df_aggregated = df_aggregated.merge(alerts, on=keys, how='left')
 
-monthly_rfdi = df_new.groupby(['year', 'month']).agg({
-    'RFDI': 'mean',
-    'alert': 'sum'
-}).reset_index().sort_values(['year', 'month'])
+    # Convert to JSON-ready dict
+    with span("serialization", endpoint="s1_trend"):
+        result = df_aggregated.to_dict(orient="records")
+    return result
 
-monthly_ndvi = monthly_rfdi.copy()
 
 @ndvi_bp.route("/api/s1/trend", methods=["GET"])
+@cached_response("s1_trend")
 def s1_trend():
     forests_param = request.args.get("forests") or request.args.get("forest")  # support both for backward compatibility
     year_filter = request.args.get("year")
     month_filter = request.args.get("month")
-    print("request.args:", request.args)
-
-    df_filtered = df_new.copy()
-    print("DataFrame length before filtering:", len(df_new))
+    logger.debug("s1_trend args: %s", request.args)
 
-    selected_forests = None
-    if forests_param:
-        if "," in forests_param:
-            selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
-            df_filtered = df_filtered[df_filtered["forest"].isin(selected_forests)]
-        else:
-            # single forest
-            df_filtered = df_filtered[df_filtered["forest"] == forests_param]
-            selected_forests = [forests_param]
+    try:
+        threshold = parse_threshold(request.args.get("threshold"))
+    except ValueError:
+        return jsonify({"error": "Invalid threshold value"}), 400
+
+    if is_range_query(request.args):
+        # date_from/date_to/resolution: answered from per-forest prefix sums
+        try:
+            start_day, end_day, resolution, window_days = range_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid range parameter: {e}"}), 400
+        selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        with span("range_query", endpoint="s1_trend"):
+            df_aggregated = aggregate(get_range_index(threshold), selected_forests, start_day, end_day,
+                                      resolution, window_days,
+                                      per_forest=bool(selected_forests and len(selected_forests) > 1))
+        columns = [c for c in ("forest", "period", "year", "month", "RFDI", "alert", "count") if c in df_aggregated.columns]
+        if threshold is None:
+            columns.remove("alert")
+        with span("serialization", endpoint="s1_trend"):
+            result = df_aggregated[columns].to_dict(orient="records")
+        return jsonify(result)
+
+    return jsonify(run_blocking(monthly_trend, forests_param, year_filter, month_filter, threshold))
 
-    if year_filter:
-        df_filtered = df_filtered[df_filtered["year"] == int(year_filter)]
-    if month_filter:
-        df_filtered = df_filtered[df_filtered["month"] == int(month_filter)]
 
-    print("DataFrame length after filtering:", len(df_filtered))
+@ndvi_bp.route("/api/s1/epi", methods=["GET"])
+@cached_response("s1_epi")
+def epi_index():
+    """
+    Returns Environmental Performance Index aggregated by:
+    - forest (optional)
+    - year (optional)
+    - month (optional)
+    - threshold (optional RFDI alert threshold)
+    - date_from/date_to, resolution (weekly, monthly, quarterly, yearly, rolling)
+      and window_days for rolling (optional)
+    """
 
-    if selected_forests and len(selected_forests) > 1:
-        # Multiple forests: aggregate by year, month, forest
-        df_aggregated = df_filtered.groupby(['year', 'month', 'forest']).agg({'RFDI': 'mean'}).reset_index().sort_values(['forest', 'year', 'month'])
-    else:
-        # Single forest or all: aggregate by year and month
-        df_aggregated = df_filtered.groupby(['year', 'month']).agg({'RFDI': 'mean'}).reset_index().sort_values(['year', 'month'])
+    forests_param = request.args.get("forest")
+    year_filter = request.args.get("year")
+    month_filter = request.args.get("month")
 
-    # Convert to JSON-ready dict
-    result = df_aggregated.to_dict(orient="records")
-    return jsonify(result)
+    try:
+        threshold = parse_threshold(request.args.get("threshold"))
+    except ValueError:
+        return jsonify({"error": "Invalid threshold value"}), 400
 
+    if is_range_query(request.args):
+        try:
+            start_day, end_day, resolution, window_days = range_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid range parameter: {e}"}), 400
+        with span("range_query", endpoint="epi_index"):
+            df_agg = aggregate(get_range_index(threshold), [forests_param] if forests_param else None,
+                               start_day, end_day, resolution, window_days)
+        return jsonify(df_agg[["period", "year", "month", "EPI"]].to_dict(orient="records"))
 
-def normalize(series):
-    """Normalize any numeric Pandas series to 0–100 scale."""
-    if series.max() == series.min():
-        return series * 0  # Avoid divide-by-zero
-    return 100 * (series - series.min()) / (series.max() - series.min())
+    with span("epi_computation"):
+        df_epi = compute_environmental_index(get_features(), threshold)
 
+    with span("filtering", endpoint="epi_index"):
+        if forests_param:
+            df_epi = df_epi[df_epi["forest"] == forests_param]
 
-def compute_environmental_index(df):
-    """
-    Compute Environmental Performance Index (EPI) using:
-    - RFDI (inverse: lower = healthier)
-    - RVI (higher = healthier)
-    - VH/VV ratio (moderate values = vegetation structure)
-    - VV_lin and VH_lin (optional structural backscatter indicators)
-    """
+        if year_filter:
+            df_epi = df_epi[df_epi["year"] == int(year_filter)]
 
-    temp = df.copy()
+        if month_filter:
+            df_epi = df_epi[df_epi["month"] == int(month_filter)]
 
-    temp["RFDI_norm"] = 100 - normalize(temp["RFDI"])      
-    temp["RVI_norm"] = normalize(temp["RVI"])
-    temp["VH_VV_norm"] = normalize(temp["VH_VV_ratio"])
-    temp["VV_norm"] = normalize(temp["VV_lin"])
-    temp["VH_norm"] = normalize(temp["VH_lin"])
-    temp["Alert_norm"] = 100 - normalize(temp["alert"])    
+    with span("groupby", endpoint="epi_index"):
+        df_agg = df_epi.groupby(["year", "month"]).agg({
+            "EPI": "mean"
+        }).reset_index().sort_values(["year", "month"])
 
-    # EPI = mean score across indicators
-    temp["EPI"] = temp[
-        ["RFDI_norm", "RVI_norm", "VH_VV_norm", "VV_norm", "VH_norm", "Alert_norm"]
-    ].mean(axis=1)
+    with span("serialization", endpoint="epi_index"):
+        result = df_agg.to_dict(orient="records")
 
-    return temp
+    return jsonify(result)
 
 
-@ndvi_bp.route("/api/s1/epi", methods=["GET"])
-def epi_index():
+@ndvi_bp.route("/api/s1/anomalies", methods=["GET"])
+@cached_response("s1_anomalies")
+def s1_anomalies():
     """
-    Returns Environmental Performance Index aggregated by:
-    - forest (optional)
+    Returns RFDI anomalies per scene from rolling z-score, CUSUM and
+    seasonal-baseline deviation, filtered by:
+    - forests (optional, comma-separated)
     - year (optional)
     - month (optional)
+    - all=1 (optional) to include scenes that are not flagged
     """
-
-    forests_param = request.args.get("forest")
+    forests_param = request.args.get("forests") or request.args.get("forest")
     year_filter = request.args.get("year")
     month_filter = request.args.get("month")
+    include_all = request.args.get("all") in ("1", "true")
+
+    df_anom = get_anomalies()
+
+    with span("filtering", endpoint="s1_anomalies"):
+        if forests_param:
+            selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
+            df_anom = df_anom[df_anom["forest"].isin(selected_forests)]
+        if year_filter:
+            df_anom = df_anom[df_anom["year"] == int(year_filter)]
+        if month_filter:
+            df_anom = df_anom[df_anom["month"] == int(month_filter)]
+        if not include_all:
+            df_anom = df_anom[df_anom["anomaly"]]
+
+    with span("serialization", endpoint="s1_anomalies"):
+        result = df_anom.sort_values(["forest", "date"]).replace({np.nan: None}).to_dict(orient="records")
 
-    df_epi = compute_environmental_index(df_new)
+    return jsonify(result)
 
-    if forests_param:
-        df_epi = df_epi[df_epi["forest"] == forests_param]
 
-    if year_filter:
-        df_epi = df_epi[df_epi["year"] == int(year_filter)]
+@ndvi_bp.route("/api/s1/spatial", methods=["GET"])
+@cached_response("s1_spatial")
+def s1_spatial():
+    """
+    Returns observations and aggregates inside an area:
+    - bbox=min_lon,min_lat,max_lon,max_lat or polygon (GeoJSON Polygon or "lon lat,lon lat,...")
+    - forests (optional, comma-separated), year (optional), month (optional)
+    - threshold (optional RFDI alert threshold)
+    - rows=0 (optional) to return only the aggregates
+    """
+    bbox_param = request.args.get("bbox")
+    polygon_param = request.args.get("polygon")
+    forests_param = request.args.get("forests") or request.args.get("forest")
+    year_filter = request.args.get("year")
+    month_filter = request.args.get("month")
+    include_rows = request.args.get("rows") not in ("0", "false")
 
-    if month_filter:
-        df_epi = df_epi[df_epi["month"] == int(month_filter)]
+    try:
+        threshold = parse_threshold(request.args.get("threshold"))
+        year = int(year_filter) if year_filter else None
+        month = int(month_filter) if month_filter else None
+        index = get_spatial_index()
+        with span("spatial_query"):
+            if polygon_param:
+                cells = cells_in_polygon(index, parse_polygon(polygon_param))
+            elif bbox_param:
+                cells = cells_in_bbox(index, parse_bbox(bbox_param))
+            else:
+                return jsonify({"error": "bbox or polygon parameter is required"}), 400
+    except (ValueError, KeyError, IndexError) as e:
+        return jsonify({"error": f"Invalid spatial filter: {e}"}), 400
+
+    with span("filtering", endpoint="s1_spatial"):
+        df_area = get_features().iloc[rows_for_cells(index, cells)]
+        if forests_param:
+            selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
+            df_area = df_area[df_area["forest"].isin(selected_forests)]
+        if year is not None:
+            df_area = df_area[df_area["year"] == year]
+        if month is not None:
+            df_area = df_area[df_area["month"] == month]
+        if threshold is not None:
+            df_area = df_area.assign(alert=flag_alerts(df_area, threshold))
+
+    with span("groupby", endpoint="s1_spatial"):
+        per_cell = df_area.groupby(["forest"] + BBOX_COLUMNS, observed=True).agg(
+            count=("RFDI", "size"), RFDI=("RFDI", "mean"), alert_count=("alert", "sum")
+        ).reset_index()
+        per_cell["lon"] = (per_cell["min_lon"] + per_cell["max_lon"]) / 2
+        per_cell["lat"] = (per_cell["min_lat"] + per_cell["max_lat"]) / 2
+
+    response = {
+        "cells": per_cell.to_dict(orient="records"),
+        "aggregate": {
+            "cells": len(per_cell),
+            "count": len(df_area),
+            "RFDI": float(df_area["RFDI"].mean()) if len(df_area) else None,
+            "alert_count": int(df_area["alert"].sum()),
+        },
+    }
+    if include_rows:
+        with span("serialization", endpoint="s1_spatial"):
+            # As in /dashboard/filtered-data: pixel statistics are NaN for scenes without rasters
+            rows = df_area.drop(columns=PIXEL_COLUMNS + [ALERT_SCORE], errors="ignore")
+            response["data"] = rows.sort_values("date").to_dict(orient="records")
+    return jsonify(response)
+
+
+@ndvi_bp.route("/api/s1/cube", methods=["GET"])
+@cached_response("s1_cube")
+def s1_cube():
+    """
+    Returns bands on a regular date grid shared by all forests, as one
+    forests x dates matrix per band, time-interpolated between scenes:
+    - forests (optional, comma-separated)
+    - bands (optional, comma-separated; default RFDI)
+    - cadence (optional grid spacing in days; default 12)
+    - date_from/date_to (optional)
+    - max_gap_days (optional) to null out grid dates further than this from a scene
+    - compare=1 (optional) to add each forest's z-score against all forests per date
+    """
+    forests_param = request.args.get("forests") or request.args.get("forest")
+    bands_param = request.args.get("bands")
+    compare = request.args.get("compare") in ("1", "true")
 
-    df_agg = df_epi.groupby(["year", "month"]).agg({
-        "EPI": "mean"
-    }).reset_index().sort_values(["year", "month"])
+    try:
+        cadence = parse_cadence(request.args.get("cadence"))
+        start_day, end_day = parse_range(request.args)
+        max_gap = request.args.get("max_gap_days")
+        max_gap = int(max_gap) if max_gap else None
+        forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        bands = [b.strip() for b in bands_param.split(",") if b.strip()] if bands_param else ["RFDI"]
+        cube = get_cube(cadence)
+        with span("cube_query"):
+            sub = select(cube, forests, bands, start_day, end_day)
+            values = sub["values"]
+            if compare:
+                # Compared against every forest, not only the selected ones
+                everyone = select(cube, None, bands, start_day, end_day)["values"]
+                z = cross_forest_z(everyone)
+                if forests:
+                    z = z[cube["forests"].get_indexer(forests)]
+            if max_gap is not None:
+                far = sub["gap_days"] > max_gap
+                values = np.where(far[..., None], np.nan, values)
+                if compare:
+                    z = np.where(far[..., None], np.nan, z)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid cube parameter: {e}"}), 400
+
+    def matrix(array):
+        return np.where(np.isnan(array), None, np.round(array.astype(np.float64), 6)).tolist()
+
+    with span("serialization", endpoint="s1_cube"):
+        response = {
+            "cadence_days": sub["cadence"],
+            "forests": [str(f) for f in sub["forests"]],
+            "dates": list(dates(sub)),
+            "bands": {band: matrix(values[..., i]) for i, band in enumerate(sub["bands"])},
+            "gap_days": sub["gap_days"].tolist(),
+        }
+        if compare:
+            response["cross_forest_z"] = {band: matrix(z[..., i]) for i, band in enumerate(sub["bands"])}
+    return jsonify(response)
+
+
+@ndvi_bp.route("/api/s1/forecast", methods=["GET"])
+@cached_response("s1_forecast")
+def s1_forecast():
+    """
+    Returns monthly RFDI and EPI forecasts per forest from seasonal ARIMA models
+    fitted on each forest's monthly means:
+    - forests (optional, comma-separated)
+    - variables (optional, comma-separated: RFDI, EPI; default both)
+    - horizon (optional months ahead, default 12)
+    - level (optional prediction interval coverage, default 0.95)
+    """
+    forests_param = request.args.get("forests") or request.args.get("forest")
+    variables_param = request.args.get("variables") or request.args.get("variable")
 
-    return jsonify(df_agg.to_dict(orient="records"))
+    try:
+        horizon = int(request.args.get("horizon") or DEFAULT_HORIZON)
+        level = float(request.args.get("level") or DEFAULT_LEVEL)
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f"horizon must be between 1 and {MAX_HORIZON} months")
+        if not 0 < level < 1:
+            raise ValueError("level must be between 0 and 1")
+        forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        variables = [v.strip() for v in variables_param.split(",") if v.strip()] if variables_param else None
+        unknown = set(variables or []) - set(FORECAST_VARIABLES)
+        if unknown:
+            raise ValueError(f"Unknown variable: {', '.join(sorted(unknown))}")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid forecast parameter: {e}"}), 400
+
+    try:
+        models, current = get_models()
+        with span("forecast_query"):
+            table = forecast(models, forests, variables, horizon, level)
+
+        with span("serialization", endpoint="s1_forecast"):
+            response = jsonify({
+                "horizon": horizon,
+                "level": level,
+                "refitting": not current,
+                "models": model_summary(models, forests, variables),
+                "forecasts": table.to_dict(orient="records"),
+            })
+    except ForecastUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logger.error("forecast failed: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    if not current:
+        # Models of the previous data version; keep it out of the result cache
+        response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,140 @@
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from features import get_features, data_version
+from metrics import span, cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Rolling z-score over the previous ROLLING_WINDOW scenes of the same forest.
+ROLLING_WINDOW = 12
+MIN_PERIODS = 4
+Z_THRESHOLD = 3.0
+
+# One-sided (upward) CUSUM on RFDI standardized by the forest's own mean/std.
+# A rise in RFDI means a loss of volume scattering, i.e. degradation.
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+
+# Deviation from the forest's mean RFDI for the same calendar month.
+SEASONAL_Z_THRESHOLD = 2.5
+
+_CACHE = {}  # keys: "version", "result", "fingerprint"
+_CACHE_LOCK = threading.Lock()
+
+
+def _group_stats(values, group_ids, n_groups):
+    """Per-group mean and std (ddof=0) via bincount."""
+    count = np.bincount(group_ids, minlength=n_groups).astype(np.float64)
+    total = np.bincount(group_ids, weights=values, minlength=n_groups)
+    total_sq = np.bincount(group_ids, weights=values * values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(total_sq / count - mean * mean, 0))
+    return mean, std
+
+
+def detect_anomalies(df):
+    """
+    Rolling z-score, CUSUM and seasonal-baseline deviation of RFDI for every
+    forest in df at once. All three are computed on the date-sorted frame with
+    prefix sums and bincount rather than a per-forest loop.
+    """
+    df = df[["forest", "date", "year", "month", "RFDI"]].sort_values(["forest", "date"], kind="stable")
+    forest_codes = df["forest"].cat.codes.to_numpy()
+    x = df["RFDI"].to_numpy(dtype=np.float64)
+    n = len(x)
+    n_forests = len(df["forest"].cat.categories)
+    position = np.arange(n)
+
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = forest_codes[1:] != forest_codes[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, position, 0))
+
+    # Rolling z-score against the previous ROLLING_WINDOW scenes (current scene excluded)
+    cs = np.concatenate(([0.0], np.cumsum(x)))
+    cs_sq = np.concatenate(([0.0], np.cumsum(x * x)))
+    window_start = np.maximum(group_start, position - ROLLING_WINDOW)
+    count = position - window_start
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs[position] - cs[window_start]) / count
+        var = (cs_sq[position] - cs_sq[window_start]) / count - mean * mean
+        std = np.sqrt(np.maximum(var, 0))
+        rolling_z = np.where((count >= MIN_PERIODS) & (std > 0), (x - mean) / std, np.nan)
+
+    # CUSUM: S_i = max(0, S_{i-1} + d_i) equals C_i - min(0, min_{j<=i} C_j) for C = cumsum(d)
+    forest_mean, forest_std = _group_stats(x, forest_codes, n_forests)
+    scale = np.where(forest_std[forest_codes] > 0, forest_std[forest_codes], 1.0)
+    d = (x - forest_mean[forest_codes]) / scale - CUSUM_K
+    c = np.cumsum(d)
+    c = c - np.where(group_start > 0, c[group_start - 1], 0.0)
+    running_min = pd.Series(c).groupby(forest_codes).cummin().to_numpy()
+    cusum = c - np.minimum(running_min, 0)
+
+    # Seasonal baseline: mean/std of the same forest in the same calendar month
+    season_ids = forest_codes.astype(np.int64) * 12 + (df["month"].to_numpy() - 1)
+    season_mean, season_std = _group_stats(x, season_ids, n_forests * 12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        seasonal_z = np.where(season_std[season_ids] > 0,
+                              (x - season_mean[season_ids]) / season_std[season_ids], np.nan)
+
+    result = df.assign(
+        rolling_z=rolling_z.astype(np.float32),
+        cusum=cusum.astype(np.float32),
+        seasonal_z=seasonal_z.astype(np.float32),
+    )
+    result["rolling_anomaly"] = result["rolling_z"].to_numpy() > Z_THRESHOLD
+    result["cusum_alarm"] = result["cusum"].to_numpy() > CUSUM_H
+    result["seasonal_anomaly"] = result["seasonal_z"].to_numpy() > SEASONAL_Z_THRESHOLD
+    result["anomaly"] = result["rolling_anomaly"] | result["cusum_alarm"] | result["seasonal_anomaly"]
+    return result.reset_index(drop=True)
+
+
+def _fingerprint(df):
+    """Per-forest (scene count, last date, RFDI sum) used to spot forests with new scenes."""
+    grouped = df.groupby("forest", observed=True)
+    return pd.DataFrame({
+        "count": grouped.size(),
+        "last": grouped["date"].max(),
+        "total": grouped["RFDI"].sum(),
+    })
+
+
+def get_anomalies():
+    """
+    Anomaly table for the current data version. When new scenes arrive only
+    the forests whose scenes changed are recomputed; the rest are reused.
+    """
+    version = data_version()
+    hit = _CACHE.get("version") == version
+    cache_lookup("anomalies", hit)
+    if hit:
+        return _CACHE["result"]
+
+    with _CACHE_LOCK:
+        if _CACHE.get("version") == version:
+            return _CACHE["result"]
+
+        df = get_features()
+        fingerprint = _fingerprint(df)
+        previous = _CACHE.get("fingerprint")
+
+        with span("anomaly_detection"):
+            if previous is None:
+                result = detect_anomalies(df)
+            else:
+                aligned = previous.reindex(fingerprint.index)
+                changed = fingerprint.index[~(aligned == fingerprint).all(axis=1)]
+                logger.debug("anomalies: recomputing %d of %d forests", len(changed), len(fingerprint))
+                kept = _CACHE["result"]
+                kept = kept[kept["forest"].astype(str).isin(fingerprint.index.difference(changed).astype(str))]
+                fresh = detect_anomalies(df[df["forest"].isin(changed)]) if len(changed) else kept.iloc[:0]
+                result = pd.concat([kept.astype({"forest": str}), fresh.astype({"forest": str})], ignore_index=True)
+                result["forest"] = pd.Categorical(result["forest"], categories=df["forest"].cat.categories)
+
+        _CACHE["version"] = version
+        _CACHE["fingerprint"] = fingerprint
+        _CACHE["result"] = result
+
+    return result
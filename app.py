@@ -1,6 +1,5 @@
-from agent_docs import policy_evaluation
+from agent_docs import policy_evaluation, PolicyGenerationError
 from flask import Flask, request
-import asyncio
 from register import login_bp
 from research import research_bp
 from whistle import whistle_bp
@@ -8,13 +7,25 @@ from dashboard import dashboard_bp
 from admin import admin_bp
 from flask_cors import CORS
 from analysis import ndvi_bp
+from export import export_bp
+from drivers import drivers_bp
+from metrics import metrics_bp, init_app as init_metrics
+from serving import run_async
+from admission import admission_controlled
 from dotenv import load_dotenv
+import logging
 import os
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
 # app = Flask()
 app = Flask(__name__)
+init_metrics(app)
 
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
@@ -25,16 +36,26 @@ app.register_blueprint(whistle_bp, url_prefix="/whistle")
 app.register_blueprint(dashboard_bp, url_prefix="/dashboard")
 app.register_blueprint(admin_bp, url_prefix="/admin")
 app.register_blueprint(ndvi_bp, url_prefix="/ndvi")
+app.register_blueprint(export_bp, url_prefix="/export")
+app.register_blueprint(drivers_bp, url_prefix="/drivers")
+app.register_blueprint(metrics_bp)
 # app.register_blueprint(login_bp, url_prefix="/auth")
 
 @app.get("/evaluate")
-async def evaluate_policy():
+@admission_controlled("evaluate")
+def evaluate_policy():
     forest = request.args.get("forest")
     if not forest:
         return {"error": "Forest parameter is required"}, 400
-    result = await policy_evaluation(forest)
+    try:
+        result = run_async(policy_evaluation(forest))
+    except TimeoutError:
+        return {"error": "Policy evaluation timed out"}, 504
+    except PolicyGenerationError as e:
+        return {"error": str(e)}, 502
     return {"analysis": result}
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; use `gunicorn -c gunicorn.conf.py app:app` in production
+    app.run(debug=os.getenv("FLASK_DEBUG", "0") == "1", threaded=True)
@@ -1,28 +1,35 @@
 import pandas as pd
-import requests
 import numpy as np
-from scipy.stats import pearsonr
 # import matplotlib.pyplot as plt
-import statsmodels.api as sm
+
+# requests, scipy and statsmodels are imported inside the functions that use
+# them so importing this module stays cheap for the web app.
+
+NDVI_DTYPES = {"date": "string", "B4_mean": "float64", "B5_mean": "float64"}
 
 def load_ndvi_data(filepath):
     """
-    Load NDVI data from CSV, calculate NDVI from B4 and B5 bands, and aggregate to yearly means.
-    NDVI is used as a proxy for biomass.
+    Load NDVI data from CSV, Parquet or Feather, calculate NDVI from B4 and B5 bands, and aggregate to yearly means.
+    NDVI is used as a proxy for biomass. Only the date and band columns are parsed.
     """
-    df = pd.read_csv(filepath)
+    from features import read_table
+
+    df = read_table(filepath, NDVI_DTYPES)
     df['date'] = pd.to_datetime(df['date'])
     df['ndvi'] = (df['B5_mean'] - df['B4_mean']) / (df['B5_mean'] + df['B4_mean'])
     df['year'] = df['date'].dt.year
     yearly_ndvi = df.groupby('year')['ndvi'].mean().reset_index()
     return yearly_ndvi
 
-def fetch_gdp_data(country_code='KEN', start_year=2013, end_year=2024):
+def fetch_gdp_data(country_code='KEN', start_year=2013, end_year=2024, timeout=30):
     """
     Fetch GDP data from World Bank API for the specified country and years.
+    timeout is the connect/read timeout in seconds for the API request.
     """
+    import requests
+
     url = f"https://api.worldbank.org/v2/country/{country_code}/indicator/NY.GDP.MKTP.CD?format=json&date={start_year}:{end_year}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=timeout)
     data = response.json()
     gdp_data = []
     for item in data[1]:
@@ -38,6 +45,8 @@ def correlate_ndvi_gdp(ndvi_df, gdp_df):
     """
     Merge NDVI and GDP data and compute Pearson correlation.
     """
+    from scipy.stats import pearsonr
+
     merged = pd.merge(ndvi_df, gdp_df, on='year')
     if len(merged) > 1:
         corr, p_value = pearsonr(merged['ndvi'], merged['gdp'])
@@ -50,6 +59,8 @@ def regression_analysis(ndvi_df, gdp_df):
     Perform linear regression to quantify the effect of NDVI (biomass proxy) on GDP.
     This can help quantify the economic effects of forest encroachment (which reduces NDVI/biomass).
     """
+    import statsmodels.api as sm
+
     merged = pd.merge(ndvi_df, gdp_df, on='year')
     if len(merged) > 1:
         X = merged['ndvi']
@@ -65,6 +76,8 @@ def predict_gdp_from_ndvi(ndvi_df, gdp_df, ndvi_value):
     Predict GDP impact based on NDVI input using the regression model.
     Returns the predicted GDP value.
     """
+    import statsmodels.api as sm
+
     merged = pd.merge(ndvi_df, gdp_df, on='year')
     if len(merged) > 1:
         X = merged['ndvi']
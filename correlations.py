@@ -0,0 +1,176 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from features import data_version
+from metrics import span, cache_lookup
+from range_index import get_range_index, forest_codes, window_totals, to_days
+from correlation_analysis import fetch_gdp_data
+from drivers import DRIVERS_CSV, get_drivers_table, driver_series
+
+logger = logging.getLogger(__name__)
+
+# Radar indices at year t are compared with targets at year t + lag.
+MAX_LAG = 3
+MIN_YEARS = 5
+
+VARIABLES = ["RFDI", "EPI", "alert"]
+
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+_GDP = {}
+GDP_RETRY_SECONDS = 300
+
+
+# ==========================
+# INPUT SERIES
+# ==========================
+def yearly_indices(index, years):
+    """Mean RFDI, mean EPI and alert count per forest and year: array (variables, forests, years)."""
+    codes = forest_codes(index)
+    starts = to_days([f"{y}-01-01" for y in years])
+    ends = to_days([f"{y + 1}-01-01" for y in years])
+    totals = window_totals(index, codes[:, None], starts[None, :], ends[None, :])
+    count = totals["count"].astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.stack([
+            totals["RFDI"] / count,
+            totals["EPI"] / count,
+            np.where(count > 0, totals["alert"].round(), np.nan),
+        ])
+    return values, list(index["categories"][codes].astype(str))
+
+
+def gdp_series(start_year, end_year):
+    """
+    Yearly GDP from the World Bank, fetched once per process; None when unavailable.
+    After a failed fetch the API is not tried again for GDP_RETRY_SECONDS.
+    """
+    key = (start_year, end_year)
+    if key not in _GDP:
+        if time.monotonic() - _GDP.get("failed_at", -GDP_RETRY_SECONDS) < GDP_RETRY_SECONDS:
+            return None
+        try:
+            with span("gdp_fetch"):
+                gdp = fetch_gdp_data(start_year=start_year, end_year=end_year)
+            _GDP[key] = gdp.set_index("year")["gdp"]
+        except Exception as e:
+            logger.warning("GDP unavailable for correlations: %s", e)
+            _GDP["failed_at"] = time.monotonic()
+            return None
+    return _GDP[key]
+
+
+# ==========================
+# CORRELATION MATRIX
+# ==========================
+def lagged_correlations(x, y, max_lag=MAX_LAG):
+    """
+    Pearson r between every row of x (..., years) and every row of y (targets, years)
+    for lags 0..max_lag, on pairwise-complete years.
+    Returns r and n with shape x.shape[:-1] + (lags, targets).
+    """
+    n_years = x.shape[-1]
+    lags = np.arange(max_lag + 1)
+    # shifted[l, t, i] = y[t, i + l]
+    idx = np.arange(n_years)[None, :] + lags[:, None]
+    padded = np.concatenate([y, np.full((y.shape[0], max_lag), np.nan)], axis=1)
+    shifted = padded[:, idx].transpose(1, 0, 2)
+
+    xb = x[..., None, None, :]
+    yb = shifted
+    mask = ~np.isnan(xb) & ~np.isnan(yb)
+    n = mask.sum(axis=-1)
+    xm = np.where(mask, xb, 0.0)
+    ym = np.where(mask, yb, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = xm.sum(axis=-1, keepdims=True) / n[..., None]
+        y_mean = ym.sum(axis=-1, keepdims=True) / n[..., None]
+        dx = np.where(mask, xb - x_mean, 0.0)
+        dy = np.where(mask, yb - y_mean, 0.0)
+        r = (dx * dy).sum(axis=-1) / np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+    return r, n
+
+
+def p_values(r, n):
+    """Two-sided p-values for Pearson r with n observations."""
+    from scipy.stats import t as t_dist
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df = n - 2
+        t_stat = r * np.sqrt(df / np.maximum(1 - r * r, 1e-12))
+        p = 2 * t_dist.sf(np.abs(t_stat), df)
+    return np.where(df > 0, p, np.nan)
+
+
+def _year_span(index):
+    first = pd.Timestamp(int(index["days"].min()), unit="D").year
+    last = pd.Timestamp(int(index["days"].max()), unit="D").year
+    return int(first), int(last)
+
+
+def compute_correlations(index, drivers, gdp=None, max_lag=MAX_LAG):
+    """Long table of r, p_value and n for every forest x variable x target x lag."""
+    first, last = _year_span(index)
+    years = np.arange(first, last + 1)
+    x, forests = yearly_indices(index, years)
+
+    targets = [(value, driver) for value, driver in drivers.columns]
+    y = [drivers.reindex(years)[col].to_numpy(dtype=np.float64) for col in drivers.columns]
+    if gdp is not None:
+        targets.append(("gdp", None))
+        y.append(gdp.reindex(years).to_numpy(dtype=np.float64))
+    y = np.vstack(y)
+
+    r, n = lagged_correlations(x, y, max_lag)  # (variables, forests, lags, targets)
+    p = p_values(r, n)
+
+    v, f, l, t = np.meshgrid(np.arange(len(VARIABLES)), np.arange(len(forests)),
+                             np.arange(max_lag + 1), np.arange(len(targets)), indexing="ij")
+    table = pd.DataFrame({
+        "forest": np.asarray(forests)[f.ravel()],
+        "variable": np.asarray(VARIABLES)[v.ravel()],
+        "target": [targets[i][0] for i in t.ravel()],
+        "driver": [targets[i][1] for i in t.ravel()],
+        "lag": l.ravel(),
+        "r": r.ravel(),
+        "p_value": p.ravel(),
+        "n": n.ravel(),
+    })
+    return table
+
+
+def get_correlations(max_lag=MAX_LAG):
+    """Correlation table for the current data version, drivers file and GDP availability."""
+    index = get_range_index()
+    first, last = _year_span(index)
+    gdp = gdp_series(first, last + max_lag)
+    drivers = get_drivers_table()
+    drivers_mtime = os.path.getmtime(DRIVERS_CSV)
+    key = (data_version(), drivers_mtime, gdp is not None, max_lag)
+    hit = _CACHE.get("key") == key
+    cache_lookup("correlations", hit)
+    if hit:
+        return _CACHE["table"]
+
+    with _CACHE_LOCK:
+        if _CACHE.get("key") != key:
+            with span("correlation_matrix"):
+                _CACHE["table"] = compute_correlations(index, driver_series(drivers), gdp, max_lag)
+            _CACHE["key"] = key
+        return _CACHE["table"]
+
+
+def filter_correlations(table, forests=None, variable=None, target=None, lag=None, min_years=MIN_YEARS):
+    mask = table["n"].to_numpy() >= min_years
+    if forests:
+        mask &= table["forest"].isin(forests).to_numpy()
+    if variable:
+        mask &= table["variable"].to_numpy() == variable
+    if target:
+        mask &= table["target"].to_numpy() == target
+    if lag is not None:
+        mask &= table["lag"].to_numpy() == lag
+    return table[mask]
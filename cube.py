@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from features import get_features, data_version
+from metrics import span, cache_lookup
+from range_index import DAY_BITS, to_days
+
+# Forest x date x band tensor on a regular date grid shared by all forests.
+# Scenes fall on irregular dates per forest; each grid date takes the
+# time-weighted mix of the forest's scenes either side of it, so every band is
+# interpolated by elapsed days rather than by row position.
+CADENCE_DAYS = int(os.getenv("CUBE_CADENCE_DAYS", "12"))  # Sentinel-1 revisit
+MAX_CADENCE_DAYS = 366
+
+BANDS = ["VV", "VH", "VV_lin", "VH_lin", "VH_VV_ratio", "RVI", "RFDI"]
+
+# One cube per (data version, cadence).
+MAX_CUBES = 4
+_CUBES = OrderedDict()
+_CUBES_LOCK = threading.Lock()
+
+
+# ==========================
+# BUILD
+# ==========================
+def scene_means(df):
+    """
+    Mean of each band per (forest, day), sorted by key = forest_code << DAY_BITS | day.
+    Sub-forest cells observed on the same day collapse into one forest value.
+    """
+    codes = df["forest"].cat.codes.to_numpy().astype(np.int64)
+    keys, inverse, counts = np.unique((codes << DAY_BITS) | to_days(df["date"]),
+                                      return_inverse=True, return_counts=True)
+    values = np.stack([
+        np.bincount(inverse, weights=df[band].to_numpy(dtype=np.float64), minlength=len(keys))
+        for band in BANDS
+    ], axis=1) / counts[:, None]
+    return keys, values
+
+
+def build_cube(df, cadence=CADENCE_DAYS):
+    """
+    values: float32 (forests, dates, bands), C-contiguous.
+    gap_days: int32 (forests, dates), days from each grid date to the forest's nearest scene.
+    Grid dates before a forest's first or after its last scene hold the edge
+    value (as the VH gap filling does); gap_days tells how far that reaches.
+    Forests without scenes are NaN throughout.
+    """
+    categories = df["forest"].cat.categories
+    n_forests = len(categories)
+    keys, observed = scene_means(df)
+    obs_codes = keys >> DAY_BITS
+    obs_days = keys & ((1 << DAY_BITS) - 1)
+    grid = np.arange(obs_days.min(), obs_days.max() + 1, cadence, dtype=np.int64)
+
+    forests = np.arange(n_forests, dtype=np.int64)
+    lo = np.searchsorted(obs_codes, forests, side="left")[:, None]
+    hi = np.searchsorted(obs_codes, forests, side="right")[:, None]
+    present = (hi > lo)[:, 0]
+
+    # First scene on or after each grid date, then its neighbours within the same forest
+    after = np.searchsorted(keys, (forests[:, None] << DAY_BITS) | grid[None, :], side="left")
+    last = np.maximum(hi - 1, lo)
+    left = np.clip(after - 1, lo, last)
+    right = np.clip(after, lo, last)
+    if not present.all():
+        left[~present] = 0
+        right[~present] = 0
+
+    left_days = obs_days[left]
+    right_days = obs_days[right]
+    span_days = right_days - left_days
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(span_days > 0, (grid[None, :] - left_days) / span_days, 0.0)
+    weight = np.clip(weight, 0.0, 1.0)[..., None]
+    values = observed[left] * (1 - weight) + observed[right] * weight
+
+    gap_days = np.minimum(np.abs(grid[None, :] - left_days), np.abs(right_days - grid[None, :]))
+    values[~present] = np.nan
+    gap_days[~present] = np.iinfo(np.int32).max
+
+    return {
+        "forests": categories,
+        "days": grid,
+        "bands": list(BANDS),
+        "values": np.ascontiguousarray(values, dtype=np.float32),
+        "gap_days": gap_days.astype(np.int32),
+        "cadence": cadence,
+    }
+
+
+def get_cube(cadence=CADENCE_DAYS):
+    """Cube for the current data version and cadence."""
+    key = (data_version(), cadence)
+    with _CUBES_LOCK:
+        cube = _CUBES.get(key)
+        cache_lookup("cube", cube is not None)
+        if cube is not None:
+            _CUBES.move_to_end(key)
+            return cube
+
+    with span("cube_build"):
+        cube = build_cube(get_features(), cadence)
+
+    with _CUBES_LOCK:
+        _CUBES[key] = cube
+        while len(_CUBES) > MAX_CUBES:
+            _CUBES.popitem(last=False)
+    return cube
+
+
+# ==========================
+# QUERIES
+# ==========================
+def parse_cadence(value):
+    cadence = int(value) if value else CADENCE_DAYS
+    if not 1 <= cadence <= MAX_CADENCE_DAYS:
+        raise ValueError(f"cadence must be between 1 and {MAX_CADENCE_DAYS} days")
+    return cadence
+
+
+def select(cube, forests=None, bands=None, start_day=None, end_day=None):
+    """
+    Sub-cube for the named forests, bands and [start_day, end_day) grid dates.
+    Forest and date selections are slices or fancy indexes on the leading axes;
+    unknown forest or band names raise ValueError.
+    """
+    forest_idx = slice(None)
+    if forests:
+        forest_idx = cube["forests"].get_indexer(forests)
+        if (forest_idx < 0).any():
+            missing = [f for f, i in zip(forests, forest_idx) if i < 0]
+            raise ValueError(f"Unknown forest: {', '.join(missing)}")
+    band_names = bands or cube["bands"]
+    unknown = [b for b in band_names if b not in cube["bands"]]
+    if unknown:
+        raise ValueError(f"Unknown band: {', '.join(unknown)}")
+    band_idx = [cube["bands"].index(b) for b in band_names]
+
+    days = cube["days"]
+    lo = np.searchsorted(days, start_day, side="left") if start_day is not None else 0
+    hi = np.searchsorted(days, end_day, side="left") if end_day is not None else len(days)
+
+    return {
+        "forests": cube["forests"][forest_idx],
+        "days": days[lo:hi],
+        "bands": band_names,
+        "values": cube["values"][forest_idx, lo:hi][..., band_idx],
+        "gap_days": cube["gap_days"][forest_idx, lo:hi],
+        "cadence": cube["cadence"],
+    }
+
+
+def cross_forest_z(values):
+    """Z-score of each forest against all forests on the same date: (forests, dates, ...) in, same shape out."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(values, axis=0, keepdims=True)
+        std = np.nanstd(values, axis=0, keepdims=True)
+        return np.where(std > 0, (values - mean) / std, np.nan)
+
+
+def dates(cube):
+    return pd.to_datetime(cube["days"], unit="D").strftime("%Y-%m-%d")
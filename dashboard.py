@@ -1,73 +1,42 @@
 import os
 import json
 import asyncio
-from collections import Counter
-from flask import Blueprint, jsonify, request, send_file
-from agent_docs import policy_evaluation
+import logging
+from concurrent.futures import wait as futures_wait
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+from agent_docs import policy_evaluation, stream_policy_evaluation, batch_policy_evaluation, PolicyGenerationError, POLICY_API_ERROR
 import jwt
 from datetime import datetime
 from correlation_analysis import load_ndvi_data, fetch_gdp_data, correlate_ndvi_gdp, regression_analysis, predict_gdp_from_ndvi
 import pandas as pd
 import numpy as np
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from io import BytesIO
+from metrics import span, cache_lookup
+from serving import run_async, run_blocking, schedule, offload, iterate_async, LLM_TIMEOUT
+from admission import admission_controlled
+from result_cache import cached_response
+from incidents import forest_counts
+from features import get_features, flag_alerts, BBOX_COLUMNS, PIXEL_COLUMNS, ALERT_SCORE
+from alert_index import parse_threshold, group_alert_counts, filter_groups
+from range_index import is_range_query, parse_range, get_range_index, count_alerts_in_range, rows_in_range, DAY_BITS
+from ranking import get_forest_ranking, DEFAULT_SORT
+from correlations import get_correlations, filter_correlations, MAX_LAG, MIN_YEARS
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
-SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_THIS_SECRET")
-
-WHISTLE_FILE = "whistleblower_reports.json"
-
-EVAL_CACHE = {}  # key: forest_name, value: {"results": ..., "correlation_analysis": ..., "last_updated": ...}
-
-# Load and process Sentinel data
-df = pd.read_csv("SentinelMakueni.csv")
-
-frames = []
-for forest in df['forest'].unique():
-    sub = df[df['forest'] == forest].sort_values('date')
-
-    sub = sub.drop_duplicates(subset='date')
-
-    sub['VH'] = sub['VH'].interpolate(method='linear', limit_direction='both')
-
-    frames.append(sub)
-
-df_clean = pd.concat(frames, ignore_index=True)
+logger = logging.getLogger(__name__)
 
-df_clean.to_csv("Makueni_interpolated.csv", index=False)
-
-df_new = df_clean.copy()
-df_new.drop(columns=['interpolated_flag', '.geo', 'image_count', 'system:index', 'orbit','relative_orbit'],
-            inplace=True, errors="ignore")
-
-df_new["date"] = pd.to_datetime(df_new["date"])
-df_new["month"] = df_new["date"].dt.month
-df_new["year"] = df_new["date"].dt.year
-
-def compute_s1_features(df):
-    df["VV"] = df["VV"].replace([np.inf, -np.inf], np.nan).fillna(0)
-    df["VH"] = df["VH"].replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    df["VV_lin"] = 10 ** (df["VV"] / 10)
-    df["VH_lin"] = 10 ** (df["VH"] / 10)
-
-    df["VH_VV_ratio"] = np.where(df["VV_lin"] != 0, df["VH_lin"] / df["VV_lin"], 0)
-
-    df["RVI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
-                          4 * df["VH_lin"] / (df["VV_lin"] + df["VH_lin"]),
-                          0)
+SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_THIS_SECRET")
 
-    df["RFDI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
-                           (df["VV_lin"] - df["VH_lin"]) / (df["VV_lin"] + df["VH_lin"]),
-                           0)
-    df['alert'] = np.where(df['RFDI'] > 0.61, 1, 0)
+# Per-stage timeouts (seconds) for the correlation branch of policy results
+NDVI_TIMEOUT = float(os.getenv("NDVI_TIMEOUT", "15"))
+GDP_TIMEOUT = float(os.getenv("GDP_TIMEOUT", "15"))
+STATS_TIMEOUT = float(os.getenv("STATS_TIMEOUT", "30"))
 
-    return df
+# Upper bound on concurrent Gemini calls for one batch request
+POLICY_BATCH_PARALLELISM = int(os.getenv("POLICY_BATCH_PARALLELISM", "4"))
 
-df_new = compute_s1_features(df_new)
+EVAL_CACHE = {}  # key: forest_name, value: {"results": ..., "correlation_analysis": ..., "last_updated": ...}
 
 
 # -----------------------
@@ -75,10 +44,10 @@ df_new = compute_s1_features(df_new)
 # -----------------------
 def get_user_role():
     auth_header = request.headers.get("Authorization", "")
-    print(f"Dashboard get_user_role: auth_header present: {bool(auth_header)}")
+    logger.debug("get_user_role: auth_header present: %s", bool(auth_header))
 
     if not auth_header or " " not in auth_header:
-        print("Dashboard get_user_role: No valid auth header")
+        logger.debug("get_user_role: no valid auth header")
         return None
 
     token = auth_header.split(" ")[1]
@@ -86,10 +55,10 @@ def get_user_role():
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         role = payload.get("role")
-        print(f"Dashboard get_user_role: decoded role: {role}")
+        logger.debug("get_user_role: decoded role: %s", role)
         return role
     except Exception as e:
-        print(f"Dashboard get_user_role: JWT decode error: {e}")
+        logger.debug("get_user_role: JWT decode error: %s", e)
         return None
 
 
@@ -97,41 +66,129 @@ def get_user_role():
 #   LOAD WHISTLEBLOWER STATS
 # -----------------------
 def load_whistleblower_stats():
-    if not os.path.exists(WHISTLE_FILE):
-        return {}
+    # Maintained incrementally as reports are submitted; see incidents.py
+    return forest_counts()
+
 
-    with open(WHISTLE_FILE, "r") as f:
-        reports = json.load(f)
+async def _stage(name, awaitable, timeout):
+    """Await one stage of the policy fan-out under its own timeout."""
+    with span(name):
+        return await asyncio.wait_for(awaitable, timeout)
 
-    forests = [r.get("forest", "Unknown") for r in reports]
-    return dict(Counter(forests))
+
+async def correlation_analysis(forest=None):
+    """
+    NDVI/GDP correlation and regression for the policy results page, plus the
+    forest's lagged correlations when a forest is given. NDVI loading and the
+    GDP fetch run concurrently, then correlation and regression; each stage has
+    its own timeout. Failures are reported in the result instead of raised.
+    """
+    try:
+        ndvi_data, gdp_data = await asyncio.gather(
+            _stage("ndvi_load", offload(load_ndvi_data, 'makueni_bands.csv'), NDVI_TIMEOUT),
+            _stage("gdp_fetch", asyncio.to_thread(fetch_gdp_data, timeout=GDP_TIMEOUT), GDP_TIMEOUT),
+        )
+        logger.debug("NDVI data shape: %s, GDP data shape: %s", ndvi_data.shape, gdp_data.shape)
+        (corr, p_value, merged_df), regression_summary = await asyncio.gather(
+            _stage("correlation", offload(correlate_ndvi_gdp, ndvi_data, gdp_data), STATS_TIMEOUT),
+            _stage("regression", offload(regression_analysis, ndvi_data, gdp_data), STATS_TIMEOUT),
+        )
+        logger.debug("correlation: %s, p_value: %s", corr, p_value)
+        results = {
+            "correlation_coefficient": corr,
+            "p_value": p_value,
+            "merged_data": merged_df.to_dict('records') if not merged_df.empty else [],
+            "regression_summary": str(regression_summary)
+        }
+    except TimeoutError:
+        logger.warning("correlation analysis timed out")
+        results = {"error": "Correlation analysis timed out"}
+    except Exception as e:
+        logger.warning("correlation analysis failed: %s", e)
+        results = {"error": str(e)}
+
+    if forest:
+        try:
+            results["forest_correlations"] = await forest_correlations(forest)
+        except Exception as e:
+            logger.warning("forest correlations failed: %s", e)
+
+    return results
+
+
+async def forest_correlations(forest):
+    """The forest's lagged correlations as JSON-ready records."""
+    table = await _stage("forest_correlations",
+                         offload(lambda: filter_correlations(get_correlations(), forests=[forest])),
+                         STATS_TIMEOUT)
+    return table.astype(object).where(table.notna(), None).to_dict('records')
+
+
+async def batch_correlation_analysis(forests):
+    """
+    correlation_analysis(forest) for each forest, keyed by forest. The NDVI/GDP
+    branch does not depend on the forest, so it runs once and is shared.
+    """
+    shared = await correlation_analysis()
+    results = {}
+    for forest in forests:
+        results[forest] = dict(shared)
+        try:
+            results[forest]["forest_correlations"] = await forest_correlations(forest)
+        except Exception as e:
+            logger.warning("forest correlations failed for %s: %s", forest, e)
+    return results
+
+
+async def policy_fanout(forest):
+    """Run the LLM evaluation and the correlation branch side by side; the report is required, correlations are not."""
+    correlation = asyncio.create_task(correlation_analysis(forest))
+    try:
+        model_output = await _stage("llm_evaluation", policy_evaluation(forest), LLM_TIMEOUT)
+    except BaseException:
+        correlation.cancel()
+        raise
+    return model_output, await correlation
 
 
 # -----------------------
-#   POLICY RESULTS ENDPOINT
+#   POLICY ACCESS CHECK
 # -----------------------
-@dashboard_bp.route("/policy-results", methods=["GET"])
-def get_policy_results():
-    print("DEBUG: get_policy_results called")
-
+def authorize_policy_request():
+    """(role, None) for admins and researchers with a valid token, else (None, error response)."""
     auth_header = request.headers.get("Authorization", "")
     if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"error": "Unauthorized"}), 401
+        return None, (jsonify({"error": "Unauthorized"}), 401)
 
     token = auth_header.split(" ")[1]
     try:
         jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
     except jwt.ExpiredSignatureError:
-        return jsonify({"error": "Token expired"}), 401
+        return None, (jsonify({"error": "Token expired"}), 401)
     except jwt.InvalidTokenError:
-        return jsonify({"error": "Invalid token"}), 401
+        return None, (jsonify({"error": "Invalid token"}), 401)
 
     role = get_user_role()
-    print(f"DEBUG: user role: {role}")
+    logger.debug("user role: %s", role)
 
     if role not in ["admin", "researcher"]:
-        print("DEBUG: unauthorized access")
-        return jsonify({"error": "Unauthorized"}), 403
+        logger.debug("unauthorized access")
+        return None, (jsonify({"error": "Unauthorized"}), 403)
+
+    return role, None
+
+
+# -----------------------
+#   POLICY RESULTS ENDPOINT
+# -----------------------
+@dashboard_bp.route("/policy-results", methods=["GET"])
+@admission_controlled("policy_results")
+def get_policy_results():
+    logger.debug("get_policy_results called")
+
+    role, error = authorize_policy_request()
+    if error:
+        return error
 
     forest = request.args["forest"] if "forest" in request.args else None
 
@@ -139,49 +196,29 @@ def get_policy_results():
         return jsonify({"error": "Forest parameter is required"}), 400
 
     # Run evaluation or use cache
-    if forest not in EVAL_CACHE or EVAL_CACHE[forest].get("results") is None:
-        print(f"DEBUG: cache empty for forest {forest}, running policy evaluation")
+    cached = forest in EVAL_CACHE and EVAL_CACHE[forest].get("results") is not None
+    cache_lookup("policy_eval", cached)
+    if not cached:
+        logger.debug("cache empty for forest %s, running policy evaluation", forest)
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            print("DEBUG: calling policy_evaluation")
-            model_output = loop.run_until_complete(policy_evaluation(forest))
-            print("DEBUG: policy_evaluation completed successfully")
+            # The correlation branch runs alongside the LLM call and finishes well within its timeout
+            model_output, correlation_results = run_async(policy_fanout(forest), timeout=LLM_TIMEOUT)
+            logger.debug("policy_evaluation completed successfully")
+        except TimeoutError:
+            logger.error("policy_evaluation timed out for forest %s", forest)
+            return jsonify({"error": "Policy evaluation timed out"}), 504
+        except PolicyGenerationError as e:
+            return jsonify({"error": str(e)}), 502
         except Exception as e:
-            print(f"DEBUG: policy_evaluation failed: {e}")
+            logger.error("policy_evaluation failed: %s", e)
             return jsonify({"error": f"Policy evaluation failed: {str(e)}"}), 500
 
-        # Compute correlation analysis
-        print("DEBUG: starting correlation analysis")
-        try:
-            print("DEBUG: loading NDVI data")
-            ndvi_data = load_ndvi_data('makueni_bands.csv')
-            print(f"DEBUG: NDVI data loaded, shape: {ndvi_data.shape}")
-            print("DEBUG: fetching GDP data")
-            gdp_data = fetch_gdp_data()
-            print(f"DEBUG: GDP data loaded, shape: {gdp_data.shape}")
-            print("DEBUG: correlating NDVI and GDP")
-            corr, p_value, merged_df = correlate_ndvi_gdp(ndvi_data, gdp_data)
-            print(f"DEBUG: correlation: {corr}, p_value: {p_value}")
-            print("DEBUG: running regression analysis")
-            regression_summary = regression_analysis(ndvi_data, gdp_data)
-            print("DEBUG: regression completed")
-            correlation_results = {
-                "correlation_coefficient": corr,
-                "p_value": p_value,
-                "merged_data": merged_df.to_dict('records') if not merged_df.empty else [],
-                "regression_summary": str(regression_summary)
-            }
-        except Exception as e:
-            print(f"DEBUG: correlation analysis failed: {e}")
-            correlation_results = {"error": str(e)}
-
         EVAL_CACHE[forest] = {
             "results": model_output,
             "correlation_analysis": correlation_results,
             "last_updated": datetime.utcnow().isoformat()
         }
-        print("DEBUG: cache updated")
+        logger.debug("cache updated for forest %s", forest)
 
     response = {
         "results": EVAL_CACHE[forest]["results"],
@@ -196,6 +233,161 @@ def get_policy_results():
     return jsonify(response), 200
 
 
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+# -----------------------
+#   POLICY REPORT STREAM
+# -----------------------
+@dashboard_bp.route("/policy-stream", methods=["GET"])
+@admission_controlled("policy_results")
+def stream_policy_results():
+    """
+    Server-sent events version of /policy-results: "chunk" events carry report
+    text as Gemini produces it, then "done" once the report and correlation
+    analysis are in EVAL_CACHE. A cached report is sent as a single chunk.
+    """
+    role, error = authorize_policy_request()
+    if error:
+        return error
+
+    forest = request.args.get("forest")
+    if not forest:
+        return jsonify({"error": "Forest parameter is required"}), 400
+
+    cached = forest in EVAL_CACHE and EVAL_CACHE[forest].get("results") is not None
+    cache_lookup("policy_eval", cached)
+
+    def generate():
+        if cached:
+            yield sse_event("chunk", {"text": EVAL_CACHE[forest]["results"]})
+            yield sse_event("done", {"cached": True, "last_updated": EVAL_CACHE[forest]["last_updated"]})
+            return
+
+        # Correlation analysis runs alongside while the report streams
+        correlation = schedule(correlation_analysis(forest))
+        parts = []
+        try:
+            try:
+                for text in iterate_async(stream_policy_evaluation(forest)):
+                    parts.append(text)
+                    yield sse_event("chunk", {"text": text})
+            except Exception as e:
+                logger.error("policy stream failed for forest %s: %s", forest, e)
+                yield sse_event("error", {"error": POLICY_API_ERROR})
+                return
+
+            EVAL_CACHE[forest] = {
+                "results": "".join(parts),
+                "correlation_analysis": correlation.result(),
+                "last_updated": datetime.utcnow().isoformat()
+            }
+            yield sse_event("done", {"cached": False, "last_updated": EVAL_CACHE[forest]["last_updated"]})
+        finally:
+            # Failed or abandoned by the client: nobody will read the correlations
+            if not correlation.done():
+                correlation.cancel()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# -----------------------
+#   BATCH POLICY EVALUATION
+# -----------------------
+@dashboard_bp.route("/policy-batch", methods=["GET"])
+@admission_controlled("policy_results")
+def batch_policy_results():
+    """
+    Policy reports for several forests (forests=a,b or forests=all) as server-sent
+    events: one "result" event per forest as soon as its report is ready (or an
+    "error" event naming the forest when its model call failed), then "done".
+    Model calls run concurrently, at most `parallelism` at a time
+    (POLICY_BATCH_PARALLELISM by default); only successful reports are stored
+    in EVAL_CACHE.
+    """
+    role, error = authorize_policy_request()
+    if error:
+        return error
+
+    forests_param = request.args.get("forests", "")
+    if forests_param == "all":
+        forests = [str(f) for f in get_features()["forest"].cat.categories]
+    else:
+        forests = list(dict.fromkeys(f.strip() for f in forests_param.split(",") if f.strip()))
+    if not forests:
+        return jsonify({"error": "Forests parameter is required"}), 400
+
+    try:
+        parallelism = int(request.args.get("parallelism") or POLICY_BATCH_PARALLELISM)
+    except ValueError:
+        return jsonify({"error": "Invalid parallelism value"}), 400
+    parallelism = max(1, min(parallelism, POLICY_BATCH_PARALLELISM))
+
+    cached = [f for f in forests if f in EVAL_CACHE and EVAL_CACHE[f].get("results") is not None]
+    pending = [f for f in forests if f not in cached]
+    for forest in forests:
+        cache_lookup("policy_eval", forest in cached)
+
+    def result_event(forest, results, was_cached, last_updated):
+        return sse_event("result", {
+            "forest": forest,
+            "results": results,
+            "cached": was_cached,
+            "last_updated": last_updated
+        })
+
+    def cache_when_ready(correlation, forest, text, last_updated):
+        """Store the report in EVAL_CACHE once the correlations are in, even if the client has gone by then."""
+        def store(future):
+            if not future.cancelled() and future.exception() is None:
+                EVAL_CACHE[forest] = {
+                    "results": text,
+                    "correlation_analysis": future.result()[forest],
+                    "last_updated": last_updated
+                }
+        correlation.add_done_callback(store)
+
+    def generate():
+        failed = []
+        for forest in cached:
+            yield result_event(forest, EVAL_CACHE[forest]["results"], True, EVAL_CACHE[forest]["last_updated"])
+        if not pending:
+            yield sse_event("done", {"forests": forests, "failed": failed})
+            return
+
+        # Reports are sent as they finish; the correlations, shared by the batch, are attached when they complete
+        correlation = schedule(batch_correlation_analysis(pending))
+        waiting = 0
+        try:
+            try:
+                for forest, text, failure in iterate_async(batch_policy_evaluation(pending, parallelism)):
+                    if failure:
+                        failed.append(forest)
+                        yield sse_event("error", {"forest": forest, "error": failure})
+                        continue
+                    last_updated = datetime.utcnow().isoformat()
+                    cache_when_ready(correlation, forest, text, last_updated)
+                    waiting += 1
+                    yield result_event(forest, text, False, last_updated)
+            except Exception as e:
+                logger.error("batch policy evaluation failed: %s", e)
+                yield sse_event("error", {"error": POLICY_API_ERROR})
+                return
+
+            if waiting:
+                # "done" means every report sent is also in EVAL_CACHE
+                futures_wait([correlation], timeout=LLM_TIMEOUT)
+            yield sse_event("done", {"forests": forests, "failed": failed})
+        finally:
+            if not waiting and not correlation.done():
+                correlation.cancel()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @dashboard_bp.route("/ndvi/predict", methods=["POST"])
 def predict_ndvi_impact():
     """
@@ -226,58 +418,293 @@ def predict_ndvi_impact():
         return jsonify({"error": str(e)}), 500
 
 
+def forest_health(forests=None, year=None, month=None, threshold=None, start_day=None, end_day=None):
+    """
+    Health = 100 - (alerts_in_selected / total_alerts_overall) * 100, with the
+    total taken over all forests for the same period. Alert counts come from the
+    sorted per-(forest, year, month) RFDI index, so any threshold costs the same
+    as the default 0.61; with start_day/end_day they come from per-forest prefix
+    sums instead.
+    """
+    if start_day is not None:
+        with span("range_query", endpoint="forest_health"):
+            index = get_range_index(threshold)
+            total_alerts_overall, _ = count_alerts_in_range(index, None, start_day, end_day)
+            alerts_in_selected, selected_records = count_alerts_in_range(index, forests, start_day, end_day)
+        empty = selected_records == 0
+    else:
+        with span("filtering", endpoint="forest_health"):
+            # Total alerts in the entire dataset (with the same year/month filters)
+            df_all = filter_groups(group_alert_counts(threshold), year=year, month=month)
+            total_alerts_overall = int(df_all['alert'].sum()) if not df_all.empty else 0
+            df_filtered = filter_groups(df_all, forests=forests) if forests else df_all
+        empty = df_filtered.empty
+        alerts_in_selected = 0 if empty else int(df_filtered['alert'].sum())
+
+    if empty or total_alerts_overall == 0:
+        return {"health": 100, "alert_count": 0, "total_alerts_overall": total_alerts_overall}
+
+    health_score = 100 - (alerts_in_selected / total_alerts_overall) * 100
+    return {
+        "health": round(max(0, health_score), 1),  # Ensure not negative
+        "alert_count": alerts_in_selected,
+        "total_alerts_overall": total_alerts_overall
+    }
+
+
 @dashboard_bp.route("/forest-health", methods=["GET"])
+@cached_response("forest_health")
 def get_forest_health():
     """
     Calculate forest health based on RFDI alerts for selected forests.
-    Health = 100 - (alerts_in_selected / total_alerts_overall) * 100
-    Accepts query parameters: forests (comma-separated), year, month
+    Accepts query parameters: forests (comma-separated), year, month, threshold,
+    date_from, date_to
     """
     try:
-        # Get filter parameters
         forests_param = request.args.get("forests")
         year_filter = request.args.get("year")
         month_filter = request.args.get("month")
+        threshold = parse_threshold(request.args.get("threshold"))
+        selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        start_day = end_day = None
+        if is_range_query(request.args):
+            start_day, end_day = parse_range(request.args)
+
+        health = run_blocking(forest_health, selected_forests,
+                              int(year_filter) if year_filter else None,
+                              int(month_filter) if month_filter else None,
+                              threshold, start_day, end_day)
+        return jsonify(health), 200
 
-        # Get total alerts in entire dataset (with same year/month filters)
-        df_all = df_new.copy()
-        if year_filter:
-            df_all = df_all[df_all["year"] == int(year_filter)]
-        if month_filter:
-            df_all = df_all[df_all["month"] == int(month_filter)]
+    except ValueError as e:
+        return jsonify({"error": "Invalid filter parameter value"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# -----------------------
+#   DASHBOARD SUMMARY
+# -----------------------
+def _group_means(keys, columns):
+    """Sorted unique keys, row counts and per-key sums of each column, via one np.unique and bincount."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    count = np.bincount(inverse, minlength=len(unique))
+    sums = {name: np.bincount(inverse, weights=values, minlength=len(unique)) for name, values in columns.items()}
+    return unique, count, sums
+
+
+def compute_dashboard_summary(forests=None, year=None, month=None, start_day=None, end_day=None, threshold=None):
+    """
+    Everything the dashboard cards and charts need for one filter state, from a
+    single pass over the (forest, date)-sorted scenes of the range index:
+    alert count and record count as in /filtered-data, health as in
+    /forest-health, the RFDI trend as in /ndvi/api/s1/trend (per forest when
+    several are selected) and the EPI series as in /ndvi/api/s1/epi.
+    """
+    index = get_range_index(threshold)
+    df = get_features()
+    order = index["order"]
+    codes = index["keys"] >> DAY_BITS
+    years = df["year"].to_numpy()[order].astype(np.int64)
+    months = df["month"].to_numpy()[order].astype(np.int64)
+    rfdi = df["RFDI"].to_numpy()[order]
+    # Per-scene alert flags of the index itself, i.e. flag_alerts on the alert score as in /forest-health
+    alerts = np.diff(index["cumulative"]["alert"]).round().astype(np.int64)
+
+    # Period mask (all forests) for the health denominator, then the forest selection on top
+    period = np.ones(len(order), dtype=bool)
+    if start_day is not None:
+        period &= (index["days"] >= start_day) & (index["days"] < end_day)
+    if year is not None:
+        period &= years == year
+    if month is not None:
+        period &= months == month
+    selected = period
+    if forests:
+        wanted = index["categories"].get_indexer(forests)
+        selected = period & np.isin(codes, wanted[wanted >= 0])
+
+    rows = np.flatnonzero(selected)
+    alert_count = int(alerts[rows].sum())
+    total_alerts_overall = int(alerts[period].sum())
+    if len(rows) == 0 or total_alerts_overall == 0:
+        health = 100
+    else:
+        health = round(max(0, 100 - (alert_count / total_alerts_overall) * 100), 1)
+
+    month_keys = years[rows] * 12 + (months[rows] - 1)
+    per_forest = bool(forests and len(forests) > 1)
+    stride = 1 << 20  # month keys stay well below this
+    trend_keys = codes[rows] * stride + month_keys if per_forest else month_keys
+    unique, count, sums = _group_means(trend_keys, {
+        "RFDI": rfdi[rows].astype(np.float64),
+        "alert": alerts[rows].astype(np.float64),
+    })
+    months_of = unique % stride
+    trend = pd.DataFrame({
+        "year": months_of // 12,
+        "month": months_of % 12 + 1,
+        "RFDI": sums["RFDI"] / count,
+        "alert": sums["alert"].astype(np.int64),
+        "count": count,
+    })
+    if per_forest:
+        trend.insert(0, "forest", index["categories"][unique // stride].astype(str))
+
+    unique, count, sums = _group_means(month_keys, {"EPI": index["epi"][rows]})
+    epi = pd.DataFrame({"year": unique // 12, "month": unique % 12 + 1, "EPI": sums["EPI"] / count})
+
+    return {
+        "total_records": len(rows),
+        "alert_count": alert_count,
+        "health": {"health": health, "alert_count": alert_count, "total_alerts_overall": total_alerts_overall},
+        "trend": trend.to_dict(orient="records"),
+        "epi": epi.to_dict(orient="records"),
+    }
+
+
+@dashboard_bp.route("/summary", methods=["GET"])
+@cached_response("dashboard_summary")
+def get_dashboard_summary():
+    """
+    Alert count, record count, forest health, RFDI trend and EPI series for one
+    filter state, so a dashboard load or filter change is a single request.
+    Accepts query parameters: forests (comma-separated), year, month, threshold,
+    date_from, date_to
+    """
+    try:
+        forests_param = request.args.get("forests")
+        year_filter = request.args.get("year")
+        month_filter = request.args.get("month")
+        threshold = parse_threshold(request.args.get("threshold"))
+        selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        year = int(year_filter) if year_filter else None
+        month = int(month_filter) if month_filter else None
+        start_day = end_day = None
+        if is_range_query(request.args):
+            # As in /forest-health and /filtered-data, a date range takes over from year/month
+            start_day, end_day = parse_range(request.args)
+            year = month = None
+
+        with span("summary", endpoint="dashboard_summary"):
+            summary = run_blocking(compute_dashboard_summary, selected_forests, year, month,
+                                   start_day, end_day, threshold)
+
+        summary["filters_applied"] = {
+            "forests": forests_param,
+            "year": year_filter,
+            "month": month_filter,
+            "threshold": threshold,
+            "date_from": request.args.get("date_from"),
+            "date_to": request.args.get("date_to")
+        }
+        return jsonify(summary), 200
 
-        total_alerts_overall = int(df_all['alert'].sum()) if not df_all.empty else 0
+    except ValueError as e:
+        return jsonify({"error": "Invalid filter parameter value"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Apply forest filter
-        df_filtered = df_all.copy()
-        if forests_param:
-            selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
-            if selected_forests:
-                df_filtered = df_filtered[df_filtered["forest"].isin(selected_forests)]
 
-        if df_filtered.empty or total_alerts_overall == 0:
-            return jsonify({"health": 100, "alert_count": 0, "total_alerts_overall": total_alerts_overall}), 200
+@dashboard_bp.route("/forest-ranking", methods=["GET"])
+@cached_response("forest_ranking")
+def get_forest_ranking_endpoint():
+    """
+    Rank all forests for a period by health, alert rate, mean RFDI, EPI and
+    recent RFDI trend slope (per year) in one pass.
+    Accepts query parameters: year, month or date_from/date_to, threshold, sort_by
+    """
+    try:
+        start_day, end_day = parse_range(request.args)
+        threshold = parse_threshold(request.args.get("threshold"))
+        sort_by = request.args.get("sort_by") or DEFAULT_SORT
+        ranking = get_forest_ranking(start_day, end_day, threshold, sort_by)
 
-        alerts_in_selected = int(df_filtered['alert'].sum())
-        health_score = 100 - (alerts_in_selected / total_alerts_overall) * 100
+        with span("serialization", endpoint="forest_ranking"):
+            forests = ranking.astype(object).where(ranking.notna(), None).to_dict(orient="records")
 
         return jsonify({
-            "health": round(max(0, health_score), 1),  # Ensure not negative
-            "alert_count": alerts_in_selected,
-            "total_alerts_overall": total_alerts_overall
+            "forests": forests,
+            "sort_by": sort_by,
+            "filters_applied": {
+                "year": request.args.get("year"),
+                "month": request.args.get("month"),
+                "threshold": threshold,
+                "date_from": request.args.get("date_from"),
+                "date_to": request.args.get("date_to")
+            }
         }), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@dashboard_bp.route("/correlations", methods=["GET"])
+def get_forest_correlations():
+    """
+    Per-forest Pearson correlations between yearly RFDI, EPI or alert counts and
+    GDP / forest-loss driver series, for target years lagged 0..max_lag behind.
+    Accepts query parameters: forests (comma-separated), variable, target, lag, min_years
+    """
+    try:
+        forests_param = request.args.get("forests")
+        selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+        lag = request.args.get("lag")
+        table = filter_correlations(
+            get_correlations(),
+            forests=selected_forests,
+            variable=request.args.get("variable"),
+            target=request.args.get("target"),
+            lag=int(lag) if lag else None,
+            min_years=int(request.args.get("min_years") or MIN_YEARS),
+        )
+        with span("serialization", endpoint="correlations"):
+            result = table.astype(object).where(table.notna(), None).to_dict(orient="records")
+        return jsonify({"correlations": result, "max_lag": MAX_LAG, "total_records": len(result)}), 200
+
     except ValueError as e:
         return jsonify({"error": "Invalid filter parameter value"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def filtered_scenes(forests=None, year=None, month=None, threshold=None, start_day=None, end_day=None):
+    """Date-sorted scene records for the filters, without geometry or pixel statistics, and their alert count."""
+    with span("filtering", endpoint="filtered_data"):
+        if start_day is not None:
+            # Slice each forest's date-sorted rows with two binary searches
+            df_filtered = get_features().iloc[rows_in_range(get_range_index(), forests, start_day, end_day)]
+        else:
+            df_filtered = get_features()
+            if forests:
+                df_filtered = df_filtered[df_filtered["forest"].isin(forests)]
+            if year is not None:
+                df_filtered = df_filtered[df_filtered["year"] == year]
+            if month is not None:
+                df_filtered = df_filtered[df_filtered["month"] == month]
+
+        df_filtered = df_filtered.sort_values("date")
+
+        df_filtered["alert"] = flag_alerts(df_filtered, threshold)
+
+    alert_count = int(df_filtered['alert'].sum())
+
+    with span("serialization", endpoint="filtered_data"):
+        # Pixel alerts already drive "alert"
+        records = df_filtered.drop(columns=BBOX_COLUMNS + PIXEL_COLUMNS + [ALERT_SCORE],
+                                   errors="ignore").to_dict(orient="records")
+    return records, alert_count
+
+
 @dashboard_bp.route("/filtered-data", methods=["GET"])
+@cached_response("filtered_data")
 def get_filtered_data():
     """
     Get filtered Sentinel-1 data with alerts based on RFDI threshold.
-    Accepts query parameters: forests (comma-separated), year, month
+    Accepts query parameters: forests (comma-separated), year, month, threshold,
+    date_from, date_to
     Returns filtered data and alert count.
     """
     try:
@@ -285,25 +712,18 @@ def get_filtered_data():
         forests_param = request.args.get("forests")
         year_filter = request.args.get("year")
         month_filter = request.args.get("month")
+        threshold = parse_threshold(request.args.get("threshold"))
 
-        # Start with full dataset
-        df_filtered = df_new.copy()
+        start_day = end_day = None
+        if is_range_query(request.args):
+            start_day, end_day = parse_range(request.args)
+        selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
 
-        # Apply filters
-        if forests_param:
-            selected_forests = [f.strip() for f in forests_param.split(",") if f.strip()]
-            if selected_forests:
-                df_filtered = df_filtered[df_filtered["forest"].isin(selected_forests)]
-        if year_filter:
-            df_filtered = df_filtered[df_filtered["year"] == int(year_filter)]
-        if month_filter:
-            df_filtered = df_filtered[df_filtered["month"] == int(month_filter)]
-
-        df_filtered = df_filtered.sort_values("date")
-
-        alert_count = int(df_filtered['alert'].sum())
-
-        result_data = df_filtered.to_dict(orient="records")
+        result_data, alert_count = run_blocking(
+            filtered_scenes, selected_forests,
+            int(year_filter) if year_filter else None,
+            int(month_filter) if month_filter else None,
+            threshold, start_day, end_day)
 
         return jsonify({
             "data": result_data,
@@ -312,7 +732,10 @@ def get_filtered_data():
             "filters_applied": {
                 "forests": forests_param,
                 "year": year_filter,
-                "month": month_filter
+                "month": month_filter,
+                "threshold": threshold,
+                "date_from": request.args.get("date_from"),
+                "date_to": request.args.get("date_to")
             }
         }), 200
 
@@ -337,6 +760,11 @@ def download_policy_pdf():
     if not forest or forest not in EVAL_CACHE or EVAL_CACHE[forest].get("results") is None:
         return jsonify({"error": "No policy evaluation available for the specified forest. Please run evaluation first."}), 404
 
+    # reportlab is only needed here, so it is loaded on the first download
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
     policy_text = EVAL_CACHE[forest]["results"]
     generated_date = EVAL_CACHE[forest].get("last_updated", datetime.utcnow().isoformat())
 
@@ -388,7 +816,8 @@ def download_policy_pdf():
             content.append(Spacer(1, 6))
 
     # Build PDF
-    doc.build(content)
+    with span("pdf_render"):
+        doc.build(content)
 
     # Prepare for download
     buffer.seek(0)
@@ -0,0 +1,165 @@
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from flask import Blueprint, jsonify, request
+from metrics import span, cache_lookup
+
+drivers_bp = Blueprint("drivers", __name__)
+
+logger = logging.getLogger(__name__)
+
+DRIVERS_CSV = "tree_cover_loss_by_driver.csv"
+VALUES = ["loss_area_ha", "gross_carbon_emissions_Mg"]
+PERIOD_YEARS = 5
+
+_TABLE = {}
+_TABLE_LOCK = threading.Lock()
+
+
+# ==========================
+# DRIVERS TABLE
+# ==========================
+def build_drivers_table(df):
+    """
+    Driver x year pivots of loss area and emissions with cumulative sums along
+    the years, so totals for any year range are one subtraction per driver.
+    """
+    years = np.arange(df["loss_year"].min(), df["loss_year"].max() + 1)
+    pivots = {
+        value: df.pivot_table(index="drivers_type", columns="loss_year", values=value, aggfunc="sum")
+                 .reindex(columns=years, fill_value=0).fillna(0)
+        for value in VALUES
+    }
+    drivers = pivots[VALUES[0]].index
+    cumulative = {
+        value: np.hstack([np.zeros((len(drivers), 1)), np.cumsum(pivot.to_numpy(), axis=1)])
+        for value, pivot in pivots.items()
+    }
+    return {"years": years, "drivers": drivers, "pivots": pivots, "cumulative": cumulative}
+
+
+def get_drivers_table(path=DRIVERS_CSV):
+    """Drivers table, re-read only when the CSV changes on disk."""
+    mtime = os.path.getmtime(path)
+    key = (os.path.abspath(path), mtime)
+    hit = _TABLE.get("key") == key
+    cache_lookup("drivers_table", hit)
+    if not hit:
+        with _TABLE_LOCK:
+            if _TABLE.get("key") != key:
+                with span("drivers_load"):
+                    _TABLE["table"] = build_drivers_table(pd.read_csv(path))
+                _TABLE["key"] = key
+                logger.info("Loaded forest-loss drivers from %s", path)
+    return _TABLE["table"]
+
+
+def totals_by_driver(table, year_from=None, year_to=None):
+    """Loss area, emissions and share of area per driver for the inclusive year range."""
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise ValueError("year_from must not be after year_to")
+    years = table["years"]
+    lo = int(np.searchsorted(years, year_from if year_from is not None else years[0], side="left"))
+    hi = int(np.searchsorted(years, year_to if year_to is not None else years[-1], side="right"))
+    result = pd.DataFrame({"driver": table["drivers"]})
+    for value in VALUES:
+        cs = table["cumulative"][value]
+        result[value] = cs[:, hi] - cs[:, lo]
+    total_area = result["loss_area_ha"].sum()
+    result["area_share"] = result["loss_area_ha"] / total_area if total_area else 0.0
+    return result.sort_values("loss_area_ha", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def yearly_totals(table, drivers=None):
+    """Long table of driver, year, loss area and emissions (one row per driver and year)."""
+    frames = []
+    for value in VALUES:
+        pivot = table["pivots"][value]
+        if drivers:
+            pivot = pivot[pivot.index.isin(drivers)]
+        frames.append(pivot.stack().rename(value))
+    result = pd.concat(frames, axis=1).reset_index()
+    return result.rename(columns={"drivers_type": "driver", "loss_year": "year"})
+
+
+def period_totals(table, period_years=PERIOD_YEARS):
+    """Totals per driver for consecutive periods of period_years years."""
+    years = table["years"]
+    rows = []
+    for start in range(int(years[0]), int(years[-1]) + 1, period_years):
+        end = min(start + period_years - 1, int(years[-1]))
+        totals = totals_by_driver(table, start, end)
+        rows.append(totals.assign(period=f"{start}-{end}", year_from=start, year_to=end))
+    return pd.concat(rows, ignore_index=True)
+
+
+def driver_series(table):
+    """Yearly values per (value, driver) plus an "all" total, indexed by year; for correlations."""
+    series = pd.concat({value: table["pivots"][value].T for value in VALUES}, axis=1)
+    for value in VALUES:
+        series[(value, "all")] = series[value].sum(axis=1)
+    return series.sort_index(axis=1)
+
+
+# ==========================
+# ENDPOINTS
+# ==========================
+def _year_arg(name):
+    value = request.args.get(name)
+    return int(value) if value else None
+
+
+def _year_range():
+    """(year_from, year_to) from the query string; ValueError when invalid or reversed."""
+    year_from, year_to = _year_arg("year_from"), _year_arg("year_to")
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise ValueError("year_from must not be after year_to")
+    return year_from, year_to
+
+
+@drivers_bp.route("/summary", methods=["GET"])
+def drivers_summary():
+    """Loss area, emissions and area share per driver. Accepts year_from, year_to."""
+    try:
+        result = totals_by_driver(get_drivers_table(), *_year_range())
+        return jsonify(result.to_dict(orient="records")), 200
+    except ValueError as e:
+        return jsonify({"error": f"Invalid year parameter: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@drivers_bp.route("/yearly", methods=["GET"])
+def drivers_yearly():
+    """Loss area and emissions per driver and year. Accepts drivers (comma-separated), year_from, year_to."""
+    try:
+        drivers_param = request.args.get("drivers")
+        drivers = [d.strip() for d in drivers_param.split(",") if d.strip()] if drivers_param else None
+        year_from, year_to = _year_range()
+        result = yearly_totals(get_drivers_table(), drivers)
+        if year_from is not None:
+            result = result[result["year"] >= year_from]
+        if year_to is not None:
+            result = result[result["year"] <= year_to]
+        return jsonify(result.to_dict(orient="records")), 200
+    except ValueError as e:
+        return jsonify({"error": f"Invalid year parameter: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@drivers_bp.route("/periods", methods=["GET"])
+def drivers_periods():
+    """Totals per driver for consecutive multi-year periods. Accepts period_years (default 5)."""
+    try:
+        period_years = int(request.args.get("period_years") or PERIOD_YEARS)
+        if period_years < 1:
+            raise ValueError("period_years must be positive")
+        result = period_totals(get_drivers_table(), period_years)
+        return jsonify(result.to_dict(orient="records")), 200
+    except ValueError:
+        return jsonify({"error": "Invalid period_years value"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,134 @@
+import logging
+from io import BytesIO
+from flask import Blueprint, jsonify, request, send_file
+from metrics import span
+from features import get_features, compute_environmental_index, flag_alerts, ALERT_SCORE
+from alert_index import parse_threshold
+from range_index import parse_range, range_args, get_range_index, aggregate, rows_in_range
+
+export_bp = Blueprint("export", __name__)
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EPI_COLUMNS = ["forest", "date", "year", "month", "RFDI", "alert", "EPI"]
+
+
+# -----------------------
+#   DATASETS
+# -----------------------
+def _selected_forests(args):
+    forests_param = args.get("forests") or args.get("forest")
+    return [f.strip() for f in forests_param.split(",") if f.strip()] if forests_param else None
+
+
+def _filtered_features(args, df):
+    """Rows of df matching forests and year/month or date_from/date_to; df itself when unfiltered."""
+    forests = _selected_forests(args)
+    if any(args.get(p) for p in ("forests", "forest", "year", "month", "date_from", "date_to")):
+        # A month without a year selects that month of every year, as the legacy filters do
+        month_only = args.get("month") and not args.get("year")
+        start_day, end_day = parse_range({k: v for k, v in args.items() if k != "month"} if month_only else args)
+        df = df.take(rows_in_range(get_range_index(), forests, start_day, end_day))
+        if month_only:
+            df = df[df["month"].to_numpy() == int(args["month"])]
+    return df
+
+
+def features_table(args, threshold):
+    df = _filtered_features(args, get_features())
+    if threshold is not None:
+        df = df.assign(alert=flag_alerts(df, threshold))
+    return df
+
+
+def aggregates_table(args, threshold):
+    start_day, end_day, resolution, window_days = range_args(args)
+    return aggregate(get_range_index(threshold), _selected_forests(args), start_day, end_day,
+                     resolution, window_days, per_forest=True)
+
+
+def epi_table(args, threshold):
+    # EPI is normalized over the whole dataset, as in /ndvi/api/s1/epi, before filtering
+    df = get_features()
+    epi = compute_environmental_index(df[EPI_COLUMNS[:-1] + ["RVI", "VH_VV_ratio", "VV_lin", "VH_lin", ALERT_SCORE]], threshold)
+    return _filtered_features(args, epi[EPI_COLUMNS])
+
+
+DATASETS = {
+    "features": features_table,
+    "aggregates": aggregates_table,
+    "epi": epi_table,
+}
+
+
+def to_arrow(df, columns=None):
+    """Arrow table built from the frame's column buffers; numeric columns are not copied."""
+    import pyarrow as pa
+
+    if columns:
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Unknown columns: {', '.join(missing)}")
+        df = df[columns]
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_table(table, fmt):
+    import pyarrow as pa
+
+    buffer = BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, buffer)
+    else:
+        with pa.ipc.new_stream(buffer, table.schema) as writer:
+            writer.write_table(table)
+    buffer.seek(0)
+    return buffer
+
+
+# -----------------------
+#   EXPORT ENDPOINT
+# -----------------------
+@export_bp.route("/<dataset>", methods=["GET"])
+def export_dataset(dataset):
+    """
+    Export features, aggregates or epi as an Arrow IPC stream (format=arrow, default)
+    or Parquet (format=parquet).
+    Accepts query parameters: columns (comma-separated projection), forests, year, month,
+    date_from, date_to, threshold, and resolution/window_days for aggregates.
+    """
+    if dataset not in DATASETS:
+        return jsonify({"error": f"Unknown dataset: {dataset}"}), 404
+
+    fmt = request.args.get("format", "arrow")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unknown format: {fmt}"}), 400
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return jsonify({"error": "pyarrow is not installed on this server"}), 501
+
+    columns_param = request.args.get("columns")
+    columns = [c.strip() for c in columns_param.split(",") if c.strip()] if columns_param else None
+
+    try:
+        threshold = parse_threshold(request.args.get("threshold"))
+        with span("filtering", endpoint="export"):
+            df = DATASETS[dataset](request.args, threshold)
+        with span("serialization", endpoint="export"):
+            buffer = write_table(to_arrow(df, columns), fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("export of %s failed", dataset)
+        return jsonify({"error": str(e)}), 500
+
+    mimetype, extension = FORMATS[fmt]
+    return send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=f"{dataset}.{extension}")
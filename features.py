@@ -0,0 +1,594 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CSV = "SentinelMakueni.csv"
+INTERPOLATED_CSV = "Makueni_interpolated.csv"
+
+# Processed columns are written here once as .npy files and memory-mapped
+# read-only by every worker, so the page cache is shared between processes.
+SNAPSHOT_DIR = os.getenv("FEATURE_SNAPSHOT_DIR", "snapshot")
+SNAPSHOT_SCHEMA = 4
+
+ALERT_THRESHOLD = 0.61
+
+# The RFDI value a scene's alert flag is judged on, for the default threshold and
+# any other: the scene RFDI, or for scenes with pixel statistics the RFDI that
+# PIXEL_ALERT_FRACTION of their pixels exceed. Every alert count (the alert index,
+# range index, threshold re-flagging) compares this column, so they all agree.
+ALERT_SCORE = "alert_RFDI"
+
+# Columns read from the Sentinel-1 export, with explicit types so nothing is inferred.
+# Dates stay ISO strings until prepare_scenes; .geo repeats a handful of geometries
+# and is read dictionary-encoded. system:index and the other bookkeeping columns are
+# never parsed.
+SOURCE_DTYPES = {"date": "string", "forest": "string", "VV": "float64", "VH": "float64", ".geo": "category"}
+
+# Columnar exports are preferred over the CSV when present next to it.
+COLUMNAR_EXTENSIONS = (".parquet", ".feather")
+
+# Earth Engine bookkeeping columns that are never used after cleaning.
+DROP_COLUMNS = ['interpolated_flag', '.geo', 'image_count', 'system:index', 'orbit', 'relative_orbit']
+
+# Bounding box of the geometry each observation was reduced over (WGS84 degrees).
+BBOX_COLUMNS = ["min_lon", "min_lat", "max_lon", "max_lat"]
+
+# Per-pixel statistics from rasters.py, present only when zonal stats have been ingested.
+PIXEL_COLUMNS = ["pixel_RFDI", "alert_fraction"]
+
+# A scene with pixel statistics is flagged when at least this share of its pixels exceed the threshold.
+PIXEL_ALERT_FRACTION = float(os.getenv("PIXEL_ALERT_FRACTION", "0.1"))
+
+# Band and index columns kept as float32; the calendar fields and alert flag are small ints.
+FLOAT_COLUMNS = ["VH", "VV", "VV_lin", "VH_lin", "VH_VV_ratio", "RVI", "RFDI", ALERT_SCORE] + BBOX_COLUMNS + PIXEL_COLUMNS
+INT_COLUMNS = {"month": "int8", "year": "int16", "alert": "int8"}
+
+# Export regions from extraction.ipynb: (lon, lat) centre and buffer radius in metres.
+# The Earth Engine export carries no geometry (empty .geo), so these stand in for it.
+FOREST_REGIONS = {
+    "mulooni": (37.49, -1.60, 2000),
+    "mavindu": (37.44, -1.66, 2000),
+    "kivale": (37.45, -1.62, 2000),
+    "katende": (37.45, -1.698, 2000),
+    "chyulu": (37.8800, -2.6800, 5000),
+    "kibwezi": (37.91, -2.43, 6000),
+    "makuli": (37.4986, -1.8239, 17000),
+    "kilungu": (37.33252, -1.79457, 8000),
+}
+
+METRES_PER_DEGREE = 111_320
+
+
+def region_bounds(lon, lat, radius):
+    """Bounds of a point buffered by radius metres, like ee.Geometry.Point(...).buffer(r).bounds()."""
+    dlat = radius / METRES_PER_DEGREE
+    dlon = radius / (METRES_PER_DEGREE * np.cos(np.radians(lat)))
+    return lon - dlon, lat - dlat, lon + dlon, lat + dlat
+
+
+def geometry_bounds(geo):
+    """(min_lon, min_lat, max_lon, max_lat) of a GeoJSON geometry string, or None when empty."""
+    try:
+        coords = np.asarray(_flatten_coordinates(json.loads(geo)["coordinates"]), dtype=np.float64)
+    except (TypeError, ValueError, KeyError):
+        return None
+    if coords.size == 0:
+        return None
+    return coords[:, 0].min(), coords[:, 1].min(), coords[:, 0].max(), coords[:, 1].max()
+
+
+def _flatten_coordinates(coords):
+    if len(coords) and isinstance(coords[0], (int, float)):
+        return [coords[:2]]
+    points = []
+    for part in coords:
+        points.extend(_flatten_coordinates(part))
+    return points
+
+
+def add_geometry(df):
+    """
+    Replace the .geo strings with bounding-box columns. Each distinct geometry
+    string is parsed once; empty geometries fall back to the forest's export region.
+    """
+    geo = df[".geo"] if ".geo" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    parsed = {g: geometry_bounds(g) for g in pd.unique(geo.dropna())}
+    fallback = {f: region_bounds(*FOREST_REGIONS[f]) for f in FOREST_REGIONS}
+
+    bounds = [parsed.get(g) or fallback.get(f) or (np.nan,) * 4 for g, f in zip(geo, df["forest"])]
+    df[BBOX_COLUMNS] = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+    return df.drop(columns=[".geo"], errors="ignore")
+
+
+def clean_scenes(df):
+    """
+    Sort each forest (or each sub-forest cell, when the export carries geometry)
+    by date, drop duplicate scenes and fill VH gaps, weighting by the time
+    between scenes rather than by row position.
+    """
+    keys = ['forest'] + [c for c in BBOX_COLUMNS if c in df.columns]
+    frames = []
+    for _, sub in df.groupby(keys, sort=False, dropna=False):
+        sub = sub.sort_values('date')
+
+        sub = sub.drop_duplicates(subset='date')
+
+        when = pd.DatetimeIndex(pd.to_datetime(sub['date']))
+        sub['VH'] = sub['VH'].set_axis(when).interpolate(method='time', limit_direction='both').to_numpy()
+
+        frames.append(sub)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_s1_features(df):
+    df["VV"] = df["VV"].replace([np.inf, -np.inf], np.nan).fillna(0)
+    df["VH"] = df["VH"].replace([np.inf, -np.inf], np.nan).fillna(0)
+
+    df["VV_lin"] = 10 ** (df["VV"] / 10)
+    df["VH_lin"] = 10 ** (df["VH"] / 10)
+
+    df["VH_VV_ratio"] = np.where(df["VV_lin"] != 0, df["VH_lin"] / df["VV_lin"], 0)
+
+    df["RVI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
+                         4 * df["VH_lin"] / (df["VV_lin"] + df["VH_lin"]),
+                         0)
+
+    df["RFDI"] = np.where((df["VV_lin"] + df["VH_lin"]) != 0,
+                          (df["VV_lin"] - df["VH_lin"]) / (df["VV_lin"] + df["VH_lin"]),
+                          0)
+    df[ALERT_SCORE] = df["RFDI"]
+    df['alert'] = np.where(df['RFDI'] > ALERT_THRESHOLD, 1, 0)
+
+    return df
+
+
+def flag_alerts(df, threshold=None):
+    """int8 alert flags of df at threshold (ALERT_THRESHOLD when None), compared at float32 like the stored column."""
+    if threshold is None:
+        threshold = ALERT_THRESHOLD
+    return (df[ALERT_SCORE].to_numpy() > np.float32(threshold)).astype("int8")
+
+
+def normalize(series):
+    """Normalize any numeric Pandas series to 0–100 scale."""
+    if series.max() == series.min():
+        return series * 0  # Avoid divide-by-zero
+    return 100 * (series - series.min()) / (series.max() - series.min())
+
+
+def compute_environmental_index(df, threshold=None):
+    """
+    Compute Environmental Performance Index (EPI) using:
+    - RFDI (inverse: lower = healthier)
+    - RVI (higher = healthier)
+    - VH/VV ratio (moderate values = vegetation structure)
+    - VV_lin and VH_lin (optional structural backscatter indicators)
+    Alerts are flagged from the alert score with flag_alerts, at threshold when given.
+    """
+
+    temp = df.copy()
+    temp["alert"] = flag_alerts(temp, threshold)
+
+    temp["RFDI_norm"] = 100 - normalize(temp["RFDI"])      
+    temp["RVI_norm"] = normalize(temp["RVI"])
+    temp["VH_VV_norm"] = normalize(temp["VH_VV_ratio"])
+    temp["VV_norm"] = normalize(temp["VV_lin"])
+    temp["VH_norm"] = normalize(temp["VH_lin"])
+    temp["Alert_norm"] = 100 - normalize(temp["alert"])    
+
+    # EPI = mean score across indicators
+    temp["EPI"] = temp[
+        ["RFDI_norm", "RVI_norm", "VH_VV_norm", "VV_norm", "VH_norm", "Alert_norm"]
+    ].mean(axis=1)
+
+    return temp
+
+
+def compact_frame(df):
+    """
+    Downcast the feature frame to its compact schema:
+    categorical forest, float32 bands/indices, int8/int16 calendar fields and alert.
+    Features are computed in float64 first so the alert flag is unaffected.
+    """
+    df["forest"] = df["forest"].astype("category")
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    for col, dtype in INT_COLUMNS.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def prepare_scenes(df):
+    """Drop bookkeeping columns, add calendar fields and S1 features, then compact."""
+    df.drop(columns=DROP_COLUMNS, inplace=True, errors="ignore")
+
+    df["date"] = pd.to_datetime(df["date"])
+    df["month"] = df["date"].dt.month
+    df["year"] = df["date"].dt.year
+
+    return compact_frame(compute_s1_features(df))
+
+
+# ==========================
+# SOURCE FILES
+# ==========================
+def source_path(path=None):
+    """
+    The Sentinel-1 export to load: path or SENTINEL_SOURCE when given, else a
+    Parquet or Feather copy of SentinelMakueni.csv when one exists, else the CSV.
+    """
+    path = path or os.getenv("SENTINEL_SOURCE")
+    if path:
+        return path
+    stem = os.path.splitext(SOURCE_CSV)[0]
+    for ext in COLUMNAR_EXTENSIONS:
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return SOURCE_CSV
+
+
+def _arrow_type(dtype):
+    import pyarrow as pa
+
+    return {"string": pa.string(), "float64": pa.float64(),
+            "category": pa.dictionary(pa.int32(), pa.string())}[dtype]
+
+
+def read_table(path, dtypes):
+    """
+    Read only the columns named in dtypes (those present in the file) with those types.
+    Parquet and Feather are read column-wise; CSV goes through Arrow's multithreaded
+    parser, or pandas' C parser when pyarrow is not installed.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        if ext in COLUMNAR_EXTENSIONS:
+            raise
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [c for c in dtypes if c in header]
+        return pd.read_csv(path, usecols=columns,
+                           dtype={c: object if dtypes[c] == "string" else dtypes[c] for c in columns})[columns]
+
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        columns = [c for c in dtypes if c in pq.read_schema(path).names]
+        table = pq.read_table(path, columns=columns)
+    elif ext == ".feather":
+        import pyarrow.feather as feather
+
+        with pa.ipc.open_file(path) as reader:
+            columns = [c for c in dtypes if c in reader.schema.names]
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        with pacsv.open_csv(path) as reader:
+            columns = [c for c in dtypes if c in reader.schema.names]
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={c: _arrow_type(dtypes[c]) for c in columns},
+        ))
+
+    if "date" in columns and not pa.types.is_string(table.schema.field("date").type):
+        # Columnar exports may carry real dates; the pipeline expects ISO strings
+        import pyarrow.compute as pc
+
+        table = table.set_column(table.schema.get_field_index("date"), "date",
+                                 pc.strftime(table["date"], format="%Y-%m-%d"))
+    return table.cast(pa.schema([(c, _arrow_type(dtypes[c])) for c in columns])).to_pandas()
+
+
+def convert_source(path, target):
+    """Write the projected, typed export to a .parquet or .feather file that load_features reads directly."""
+    df = read_table(path, SOURCE_DTYPES)
+    if target.lower().endswith(".parquet"):
+        df.to_parquet(target, index=False)
+    else:
+        df.to_feather(target)
+    logger.info("Wrote %d rows of %s to %s", len(df), path, target)
+
+
+def load_features(path=None):
+    """
+    Read the Sentinel-1 export and return the compact feature frame.
+    The raw and cleaned frames are local to this function so they are
+    released as soon as it returns.
+    """
+    df = read_table(source_path(path), SOURCE_DTYPES)
+    zonal = load_zonal_stats()
+    if zonal is not None:
+        # Raster-only scenes join the export as ordinary (forest, date, VV, VH) rows
+        known = pd.MultiIndex.from_frame(df[["forest", "date"]])
+        extra = zonal[~pd.MultiIndex.from_frame(zonal[["forest", "date"]]).isin(known)]
+        df = pd.concat([df, extra[["forest", "date", "VV", "VH"]]], ignore_index=True)
+
+    df_clean = clean_scenes(add_geometry(df))
+    del df
+
+    if not os.path.exists(INTERPOLATED_CSV):
+        try:
+            df_clean.to_csv(INTERPOLATED_CSV, index=False)
+        except PermissionError:
+            logger.warning("Permission denied when writing %s", INTERPOLATED_CSV)
+
+    df_new = prepare_scenes(df_clean)
+    if zonal is not None:
+        df_new = apply_pixel_alerts(df_new, zonal)
+    logger.info("Loaded %d scenes, %.1f KiB resident", len(df_new),
+                df_new.memory_usage(deep=True).sum() / 1024)
+    return df_new
+
+
+def zonal_stats_path():
+    from rasters import RASTER_DIR, ZONAL_STATS_FILE
+
+    return os.path.join(RASTER_DIR, ZONAL_STATS_FILE)
+
+
+def load_zonal_stats():
+    """Per-scene pixel statistics written by rasters.py, or None when not ingested."""
+    path = zonal_stats_path()
+    if not os.path.exists(path):
+        return None
+    zonal = pd.read_csv(path)
+    return zonal[zonal["pixels"] > 0]
+
+
+def apply_pixel_alerts(df, zonal):
+    """
+    Attach pixel statistics to matching scenes and judge those scenes' alerts on
+    the RFDI exceeded by PIXEL_ALERT_FRACTION of their pixels rather than on the
+    RFDI of the mean backscatter.
+    """
+    if ALERT_SCORE not in zonal.columns:
+        logger.warning("%s has no %s column; re-run rasters.py to use pixel alerts", zonal_stats_path(), ALERT_SCORE)
+        zonal = zonal.assign(**{ALERT_SCORE: np.nan})
+    zonal = zonal.assign(date=pd.to_datetime(zonal["date"]), forest=zonal["forest"].astype(str))
+    merged = df[["forest", "date"]].assign(forest=df["forest"].astype(str)).merge(
+        zonal[["forest", "date", ALERT_SCORE] + PIXEL_COLUMNS], on=["forest", "date"], how="left")
+    for col in PIXEL_COLUMNS:
+        df[col] = merged[col].to_numpy(dtype=np.float32)
+    pixel_score = merged[ALERT_SCORE].to_numpy(dtype=np.float32)
+    has_pixels = ~np.isnan(pixel_score)
+    df.loc[has_pixels, ALERT_SCORE] = pixel_score[has_pixels]
+    df["alert"] = flag_alerts(df)
+    return df
+
+
+# ==========================
+# COLUMNAR SNAPSHOT
+# ==========================
+def source_version(path):
+    """Short hash identifying the source files (export and zonal stats) and the snapshot schema."""
+    key = f"{SNAPSHOT_SCHEMA}"
+    for source in (path, zonal_stats_path()):
+        if os.path.exists(source):
+            stat = os.stat(source)
+            key += f":{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def write_snapshot(df, directory):
+    """Write each column of df to its own .npy file in directory, plus a manifest."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"rows": len(df), "columns": []}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        entry = {"name": col, "file": f"{i:02d}.npy"}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry["categories"] = [str(c) for c in values.cat.categories]
+            array = values.cat.codes.to_numpy()
+        else:
+            array = values.to_numpy()
+        np.save(os.path.join(directory, entry["file"]), array, allow_pickle=False)
+        manifest["columns"].append(entry)
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+
+def open_snapshot(directory):
+    """Memory-map a snapshot written by write_snapshot as a read-only DataFrame."""
+    with open(os.path.join(directory, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+
+    columns = {}
+    for entry in manifest["columns"]:
+        array = np.load(os.path.join(directory, entry["file"]), mmap_mode="r", allow_pickle=False)
+        if "categories" in entry:
+            array = pd.Categorical.from_codes(array, categories=entry["categories"])
+        columns[entry["name"]] = array
+
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_snapshot(path=None):
+    """
+    Return (df_new, version), building the snapshot for this source file on first use.
+    Concurrent workers each build into a private temp directory and the first rename wins.
+    """
+    path = source_path(path)
+    version = source_version(path)
+    directory = os.path.join(SNAPSHOT_DIR, version)
+
+    if not os.path.exists(os.path.join(directory, "manifest.json")):
+        df = load_features(path)
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        try:
+            write_snapshot(df, tmp_dir)
+            os.rename(tmp_dir, directory)
+            logger.info("Wrote feature snapshot %s", directory)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(os.path.join(directory, "manifest.json")):
+                logger.warning("Could not write feature snapshot (%s), using in-memory frame", e)
+                return df, version
+
+    return open_snapshot(directory), version
+
+
+# ==========================
+# SHARED FRAME
+# ==========================
+# Loaded on first use rather than at import so the app starts without touching the data.
+_STATE = {}
+_STATE_LOCK = threading.Lock()
+
+
+def get_features():
+    """Return the shared feature frame, opening the snapshot on first call."""
+    if "df" not in _STATE:
+        with _STATE_LOCK:
+            if "df" not in _STATE:
+                _STATE["df"], _STATE["version"] = load_snapshot()
+    return _STATE["df"]
+
+
+def data_version():
+    """Version of the currently loaded feature frame, for keying caches."""
+    get_features()
+    sync_ingested()
+    return _STATE["version"]
+
+
+def append_scenes(scenes):
+    """
+    Add newly arrived scenes (forest, date, VV, VH) to the in-memory frame
+    of this worker and bump the data version. Scenes already present for a
+    forest/date are ignored. Returns the number of scenes added.
+    Other workers only see scenes that go through ingest_scenes.
+    """
+    get_features()
+    scenes = prepare_scenes(clean_scenes(add_geometry(scenes.copy())))
+
+    with _STATE_LOCK:
+        current, version = _STATE["df"], _STATE["version"]
+
+        known = pd.MultiIndex.from_arrays([current["forest"].astype(str), current["date"], current["min_lon"], current["min_lat"]])
+        incoming = pd.MultiIndex.from_arrays([scenes["forest"].astype(str), scenes["date"], scenes["min_lon"], scenes["min_lat"]])
+        scenes = scenes[~incoming.isin(known)]
+        if scenes.empty:
+            return 0
+
+        categories = current["forest"].cat.categories.union(scenes["forest"].cat.categories)
+        _STATE["df"] = pd.concat([
+            current.assign(forest=current["forest"].cat.set_categories(categories)),
+            scenes.reindex(columns=current.columns).assign(forest=scenes["forest"].cat.set_categories(categories)),
+        ], ignore_index=True)
+        key = f"{version}:{len(scenes)}:{scenes['date'].max().isoformat()}"
+        _STATE["version"] = hashlib.sha1(key.encode()).hexdigest()[:12]
+
+    logger.info("Appended %d scenes, data version %s -> %s", len(scenes), version, _STATE["version"])
+    return len(scenes)
+
+
+
+# ==========================
+# SCENE INGESTION
+# ==========================
+# Scenes that arrive after the snapshot was built are appended to this headerless
+# CSV (forest,date,VV,VH). Every worker replays the rows it has not read yet before
+# answering a versioned request, so one ingest reaches all workers, and the file is
+# replayed in full on the next start.
+INGEST_FILE = os.getenv("SCENE_INGEST_FILE", "ingested_scenes.csv")
+INGEST_COLUMNS = ["forest", "date", "VV", "VH"]
+
+_INGEST = {"offset": 0}
+_INGEST_LOCK = threading.Lock()
+
+
+@contextmanager
+def _ingest_file_lock():
+    """Exclusive lock on a side file, so rows from concurrent workers never interleave."""
+    with open(f"{INGEST_FILE}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def parse_ingest(scenes):
+    """
+    (forest, date, VV, VH) frame from incoming scenes, with lower-case forest
+    names and ISO dates. Raises ValueError on missing columns or bad values.
+    """
+    missing = [c for c in INGEST_COLUMNS if c not in scenes.columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    scenes = scenes[INGEST_COLUMNS].copy()
+    scenes["forest"] = scenes["forest"].astype(str).str.strip().str.lower()
+    if (scenes["forest"] == "").any() or scenes["forest"].str.contains(",").any():
+        raise ValueError("invalid forest name")
+    scenes["date"] = pd.to_datetime(scenes["date"], format="ISO8601").dt.strftime("%Y-%m-%d")
+    for band in ("VV", "VH"):
+        scenes[band] = pd.to_numeric(scenes[band], errors="raise").astype(np.float64)
+    return scenes
+
+
+def ingest_scenes(scenes):
+    """
+    Persist new scenes to INGEST_FILE and add them to this worker's frame.
+    Returns the number of scenes that were new to this worker.
+    """
+    scenes = parse_ingest(scenes)
+    if scenes.empty:
+        return 0
+    with _ingest_file_lock():
+        with open(INGEST_FILE, "a", newline="") as f:
+            scenes.to_csv(f, header=False, index=False)
+    return sync_ingested()
+
+
+def sync_ingested():
+    """Append the ingested scenes this worker has not read yet. Returns the number added."""
+    try:
+        size = os.path.getsize(INGEST_FILE)
+    except OSError:
+        return 0
+    if size <= _INGEST["offset"]:
+        return 0
+
+    with _INGEST_LOCK:
+        offset = _INGEST["offset"]
+        with open(INGEST_FILE, "rb") as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        # A writer may be mid-row; leave a partial last line for the next sync
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        rows = pd.read_csv(BytesIO(chunk[:end]), names=INGEST_COLUMNS, header=None,
+                           dtype={"forest": "string", "date": "string", "VV": "float64", "VH": "float64"})
+        added = append_scenes(rows) if len(rows) else 0
+        _INGEST["offset"] = offset + end
+    return added
+
+
+if __name__ == "__main__":
+    # python features.py SentinelMakueni.csv SentinelMakueni.parquet
+    logging.basicConfig(level="INFO")
+    convert_source(sys.argv[1] if len(sys.argv) > 1 else SOURCE_CSV,
+                   sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(SOURCE_CSV)[0] + ".parquet")
@@ -0,0 +1,253 @@
+import os
+import logging
+import warnings
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from features import data_version
+from metrics import span, cache_lookup
+from range_index import get_range_index, aggregate
+
+logger = logging.getLogger(__name__)
+
+# Seasonal ARIMA on each forest's monthly means; months without scenes stay
+# missing and are skipped by the Kalman filter rather than interpolated.
+# Series are standardized before fitting (RFDI varies by ~0.02, which stalls
+# the optimizer) and forecasts are scaled back.
+VARIABLES = ["RFDI", "EPI"]
+ORDER = (1, 0, 1)
+SEASONAL_ORDER = (0, 1, 1, 12)
+MIN_MONTHS = 36
+
+MAX_HORIZON = 36
+DEFAULT_HORIZON = 12
+DEFAULT_LEVEL = 0.95
+
+# Fitting takes about a second per series, so forests are fitted in parallel.
+# Workers are spawned rather than forked because the web process runs threads.
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", min(4, os.cpu_count() or 1)))
+
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+# keys: "version", "models" {(forest, variable): model dict}, "fitting" (version, Future) of a refit in progress
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+# ==========================
+# SERIES
+# ==========================
+def monthly_series(index):
+    """{(forest, variable): monthly Series indexed by Period}, with a gap for every month without scenes."""
+    monthly = aggregate(index, None, 0, index["days"].max() + 1, "monthly", per_forest=True)
+    series = {}
+    for forest, rows in monthly.groupby("forest", observed=True, sort=False):
+        periods = pd.PeriodIndex(rows["period"], freq="M")
+        full = pd.period_range(periods[0], periods[-1], freq="M")
+        for variable in VARIABLES:
+            series[(str(forest), variable)] = pd.Series(rows[variable].to_numpy(dtype=np.float64), index=periods).reindex(full)
+    return series
+
+
+def _model(series):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    return SARIMAX(series, order=ORDER, seasonal_order=SEASONAL_ORDER)
+
+
+def standardize(series):
+    """(standardized series, mean, std); a flat series keeps std 1."""
+    mean = series.mean()
+    std = series.std() or 1.0
+    return (series - mean) / std, mean, std
+
+
+def fit_params(values, start):
+    """Fitted parameters, AIC and whether the optimizer converged for one standardized series; runs in a pool worker."""
+    series = pd.Series(values, index=pd.period_range(start, periods=len(values), freq="M"))
+    with warnings.catch_warnings():
+        # Starting-parameter warnings are noise here; convergence is reported instead
+        warnings.simplefilter("ignore")
+        result = _model(series).fit(disp=False, warn_convergence=False)
+    return result.params.to_numpy(), float(result.aic), bool(result.mle_retvals.get("converged", True))
+
+
+# ==========================
+# MODEL CACHE
+# ==========================
+class ForecastUnavailable(Exception):
+    """The models could not be fitted, e.g. because a pool worker died; worth retrying."""
+
+
+def forecast_pool():
+    if "pool" not in _POOL:
+        with _POOL_LOCK:
+            if "pool" not in _POOL:
+                _POOL["pool"] = ProcessPoolExecutor(max_workers=FORECAST_WORKERS,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+    return _POOL["pool"]
+
+
+def _drop_pool(pool):
+    """Forget a broken pool so the next fit spawns a fresh one."""
+    with _POOL_LOCK:
+        if _POOL.get("pool") is pool:
+            del _POOL["pool"]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fitter():
+    """Single background thread that runs refits, so no request thread waits on one."""
+    if "fitter" not in _POOL:
+        with _POOL_LOCK:
+            if "fitter" not in _POOL:
+                _POOL["fitter"] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast-fit")
+    return _POOL["fitter"]
+
+
+def _same_series(a, b):
+    return a.index.equals(b.index) and np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True)
+
+
+def fit_models(version, previous):
+    """
+    Models for the current monthly series. Series whose values did not change
+    since previous keep their fit; the rest are fitted on the process pool.
+    """
+    series = monthly_series(get_range_index())
+    models = {}
+    stale = []
+    for key, values in series.items():
+        old = previous.get(key)
+        if old is not None and _same_series(old["series"], values):
+            models[key] = old
+        elif values.notna().sum() >= MIN_MONTHS:
+            stale.append(key)
+
+    if stale:
+        logger.info("forecast: fitting %d of %d series on %d workers", len(stale), len(series), FORECAST_WORKERS)
+        pool = forecast_pool()
+        with span("forecast_fit"):
+            scaled = {key: standardize(series[key]) for key in stale}
+            try:
+                futures = {key: pool.submit(fit_params, z.to_numpy(), str(z.index[0]))
+                           for key, (z, _, _) in scaled.items()}
+                fits = {key: future.result() for key, future in futures.items()}
+            except BrokenProcessPool as e:
+                logger.error("forecast: process pool broke while fitting, replacing it: %s", e)
+                _drop_pool(pool)
+                raise ForecastUnavailable("Forecast models are being rebuilt, please retry") from e
+        for key, (params, aic, converged) in fits.items():
+            if not converged:
+                logger.warning("forecast: %s %s fit did not converge", *key)
+            z, mean, std = scaled[key]
+            models[key] = {"series": series[key], "scaled": z, "mean": mean, "std": std, "params": params,
+                           "aic": aic, "converged": converged, "version": version}
+    return models
+
+
+def _refit(version):
+    """Fit for version on the fitter thread and publish the models; a failure is retried by the next request."""
+    try:
+        models = fit_models(version, _MODELS.get("models", {}))
+    except Exception as e:
+        logger.error("forecast: refit for data version %s failed: %s", version, e)
+        with _MODELS_LOCK:
+            if _MODELS.get("fitting", (None,))[0] == version:
+                del _MODELS["fitting"]
+        raise
+    with _MODELS_LOCK:
+        _MODELS["models"] = models
+        _MODELS["version"] = version
+        if _MODELS.get("fitting", (None,))[0] == version:
+            del _MODELS["fitting"]
+    return models
+
+
+def get_models():
+    """
+    (models, current) for the current data version. When the data changes the
+    models are refitted in the background, only for series whose monthly values
+    changed, and the previous models are served meanwhile with current False.
+    Only the first fit of a process is waited for. Raises ForecastUnavailable
+    when that fit fails.
+    """
+    version = data_version()
+    hit = _MODELS.get("version") == version
+    cache_lookup("forecast_models", hit)
+    if hit:
+        return _MODELS["models"], True
+
+    with _MODELS_LOCK:
+        if _MODELS.get("version") == version:
+            return _MODELS["models"], True
+        fitting = _MODELS.get("fitting")
+        if fitting is None or fitting[0] != version:
+            fitting = (version, fitter().submit(_refit, version))
+            _MODELS["fitting"] = fitting
+        previous = _MODELS.get("models")
+
+    if previous is not None:
+        return previous, False
+    try:
+        return fitting[1].result(), True
+    except ForecastUnavailable:
+        raise
+    except Exception as e:
+        raise ForecastUnavailable("Forecast models could not be fitted") from e
+
+
+def _filtered(model):
+    """State-space results for the cached parameters; filtering is cheap next to fitting."""
+    if "results" not in model:
+        model["results"] = _model(model["scaled"]).filter(model["params"])
+    return model["results"]
+
+
+# ==========================
+# FORECASTS
+# ==========================
+def forecast(models, forests=None, variables=None, horizon=DEFAULT_HORIZON, level=DEFAULT_LEVEL):
+    """Long table of forest, variable, period, forecast and lower/upper bounds of the level interval."""
+    frames = []
+    for (forest, variable), model in models.items():
+        if (forests and forest not in forests) or (variables and variable not in variables):
+            continue
+        prediction = _filtered(model).get_forecast(horizon)
+        mean, std = model["mean"], model["std"]
+        bounds = prediction.conf_int(alpha=1 - level).to_numpy() * std + mean
+        periods = prediction.predicted_mean.index
+        frames.append(pd.DataFrame({
+            "forest": forest,
+            "variable": variable,
+            "period": periods.strftime("%Y-%m-01"),
+            "year": periods.year,
+            "month": periods.month,
+            "forecast": prediction.predicted_mean.to_numpy() * std + mean,
+            "lower": bounds[:, 0],
+            "upper": bounds[:, 1],
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["forest", "variable", "period", "year", "month", "forecast", "lower", "upper"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def model_summary(models, forests=None, variables=None):
+    return [
+        {
+            "forest": forest,
+            "variable": variable,
+            "order": list(ORDER),
+            "seasonal_order": list(SEASONAL_ORDER),
+            "aic": model["aic"],  # of the standardized series
+            "converged": model["converged"],
+            "months": int(model["series"].notna().sum()),
+            "last_observed": model["series"].last_valid_index().strftime("%Y-%m-01"),
+            "fitted_on": model["version"],
+        }
+        for (forest, variable), model in sorted(models.items())
+        if (not forests or forest in forests) and (not variables or variable in variables)
+    ]
@@ -0,0 +1,17 @@
+import os
+
+# Production entry point: gunicorn -c gunicorn.conf.py app:app
+# Feature columns are memory-mapped from the snapshot, so extra workers share
+# the data instead of each holding a copy.
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_class = "gthread"
+
+# Policy evaluations wait on the LLM for up to LLM_TIMEOUT seconds
+timeout = int(os.getenv("WEB_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
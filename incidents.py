@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import logging
+import threading
+import datetime
+import pandas as pd
+from metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+STORAGE_FILE = os.getenv("WHISTLE_STORAGE_FILE", "whistleblower_reports.json")
+
+# Keyword categories matched (case-insensitive, word prefix) against the report text.
+KEYWORD_CATEGORIES = {
+    "logging": ["logging", "logger", "tree cutting", "cutting trees", "felling", "felled", "chainsaw", "timber", "power saw"],
+    "charcoal": ["charcoal", "kiln", "burning wood", "makaa"],
+    "fire": ["fire", "burning", "burnt", "smoke", "wildfire"],
+    "encroachment": ["encroach", "settlement", "farming", "cultivation", "clearing land", "grazing", "fence", "plot"],
+}
+CATEGORIES = list(KEYWORD_CATEGORIES)
+_PATTERNS = {
+    category: re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")", re.IGNORECASE)
+    for category, keywords in KEYWORD_CATEGORIES.items()
+}
+
+# Same bucket starts as range_index: weeks start on Monday, months on the 1st.
+RESOLUTIONS = ("daily", "weekly", "monthly")
+
+# Counts keyed by (forest as submitted, day); each value holds "reports" and one tally per category.
+_STATE = {"days": {}, "seen": set(), "stat": None}
+_STATE_LOCK = threading.Lock()
+
+
+def normalize_forest(name):
+    return (name or "Unknown").strip().lower()
+
+
+def categorize(text):
+    """Keyword categories mentioned in a report."""
+    return [category for category, pattern in _PATTERNS.items() if pattern.search(text or "")]
+
+
+def file_stat(path=None):
+    """(size, mtime_ns) of the report store, or None when it does not exist yet."""
+    path = path or STORAGE_FILE
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _add(report):
+    """Fold one report into the counters. Caller holds the lock."""
+    report_id = report.get("id")
+    if report_id in _STATE["seen"]:
+        return
+    _STATE["seen"].add(report_id)
+    try:
+        day = datetime.datetime.fromisoformat(report["timestamp"]).date()
+    except (KeyError, TypeError, ValueError):
+        return
+    key = (report.get("forest", "Unknown"), day)
+    counts = _STATE["days"].get(key)
+    if counts is None:
+        counts = dict.fromkeys(["reports"] + CATEGORIES, 0)
+        _STATE["days"][key] = counts
+    counts["reports"] += 1
+    for category in categorize(report.get("report")):
+        counts[category] += 1
+
+
+def _sync():
+    """
+    Pick up reports written by other workers. Only runs when the file changed
+    since this process last saw it, and only counts reports not yet seen.
+    """
+    stat = file_stat()
+    hit = stat == _STATE["stat"]
+    cache_lookup("incident_stats", hit)
+    if hit:
+        return
+    with _STATE_LOCK:
+        if stat == _STATE["stat"]:
+            return
+        with open(STORAGE_FILE, "r") as f:
+            reports = json.load(f)
+        for report in reports:
+            _add(report)
+        _STATE["stat"] = stat
+        logger.debug("incidents: synced %d reports from %s", len(reports), STORAGE_FILE)
+
+
+def record_report(report, reports, stat_before, stat_after):
+    """
+    Count a report this process just saved. Called by the writer while it holds
+    the store lock, with the reports it wrote and the file stat before and after
+    the write. If this process had already seen the file as it was before the
+    write, only the new report is added; otherwise reports other workers saved
+    are folded in from the list the writer already read. Either way the new stat
+    is recorded, so the next query does not re-read the file for this write.
+    Before the first sync there is nothing to update; that sync counts it.
+    """
+    with _STATE_LOCK:
+        if _STATE["stat"] is None:
+            return
+        if stat_before == _STATE["stat"]:
+            _add(report)
+        else:
+            for saved in reports:
+                _add(saved)
+        _STATE["stat"] = stat_after
+
+
+def forest_counts():
+    """Total reports per forest, keyed by the forest name as submitted."""
+    _sync()
+    totals = {}
+    for (forest, _), counts in list(_STATE["days"].items()):
+        totals[forest] = totals.get(forest, 0) + counts["reports"]
+    return totals
+
+
+def period_start(day, resolution):
+    if resolution == "weekly":
+        return day - datetime.timedelta(days=day.weekday())
+    if resolution == "monthly":
+        return day.replace(day=1)
+    return day
+
+
+def incident_series(forests=None, resolution="weekly", date_from=None, date_to=None):
+    """
+    Report and keyword-category counts per forest (lower-cased, as in the RFDI
+    data) and period, labelled like /ndvi/api/s1/trend range queries so the
+    two can be joined on forest and period.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    _sync()
+    wanted = {normalize_forest(f) for f in forests} if forests else None
+
+    buckets = {}
+    for (name, day), counts in list(_STATE["days"].items()):
+        forest = normalize_forest(name)
+        if wanted is not None and forest not in wanted:
+            continue
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        key = (forest, period_start(day, resolution))
+        bucket = buckets.setdefault(key, dict.fromkeys(["reports"] + CATEGORIES, 0))
+        for field, value in counts.items():
+            bucket[field] += value
+
+    rows = [{"forest": forest, "period": start.isoformat(), "year": start.year, "month": start.month, **counts}
+            for (forest, start), counts in buckets.items()]
+    return pd.DataFrame(rows, columns=["forest", "period", "year", "month", "reports"] + CATEGORIES) \
+             .sort_values(["forest", "period"], kind="stable").reset_index(drop=True)
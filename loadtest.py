@@ -0,0 +1,591 @@
+import os
+import sys
+import json
+import time
+import types
+import random
+import shutil
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Local load test: serves app.py with gunicorn -c gunicorn.conf.py (the production
+# gthread mode) in a subprocess, with the Gemini, OpenAI/MCP (summary.py) and World
+# Bank backends replaced by stubs that only sleep, replays a weighted mix of
+# dashboard requests from concurrent clients, and reports throughput, latency
+# percentiles and memory per endpoint.
+#
+#   python loadtest.py --concurrency 16 --duration 60
+#   python loadtest.py --scenarios trend,forest_health --json results.json
+
+LLM_LATENCY = 1.0      # seconds per stubbed Gemini call
+SUMMARY_LATENCY = 3.0  # seconds per stubbed OpenAI/MCP article summary
+GDP_LATENCY = 0.2      # seconds per stubbed World Bank request
+
+# Isolated sequential requests per endpoint for the memory column.
+MEMORY_SAMPLES = 20
+
+SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_THIS_SECRET")
+
+# Seconds to wait for gunicorn to answer after starting.
+STARTUP_TIMEOUT = 60
+
+
+# ==========================
+# STUBBED BACKENDS
+# ==========================
+class _StubGdpResponse:
+    status_code = 200
+
+    def __init__(self, url):
+        years = url.rsplit("date=", 1)[-1].split(":")
+        start, end = (int(years[0]), int(years[-1])) if years[0].isdigit() else (2013, 2024)
+        self._items = [{"date": str(y), "value": 5.0e10 * 1.05 ** (y - 2010)} for y in range(end, start - 1, -1)]
+
+    def json(self):
+        return [{"page": 1, "pages": 1, "total": len(self._items)}, self._items]
+
+    def raise_for_status(self):
+        pass
+
+
+def install_stubs(llm_latency=LLM_LATENCY, summary_latency=SUMMARY_LATENCY, gdp_latency=GDP_LATENCY):
+    """Replace outbound model and API calls before the app is imported; runs in each gunicorn worker."""
+    os.environ.setdefault("GEMINI_API_KEY", "loadtest")
+
+    summary = types.ModuleType("summary")
+
+    def run_web_summary(url):
+        time.sleep(summary_latency)
+        return f"- Stub summary of {url}"
+
+    summary.run_web_summary = run_web_summary
+    sys.modules["summary"] = summary
+
+    from google.genai import models
+
+    class _StubText:
+        text = "## Policy recommendations\n\n1. Stub recommendation for load testing.\n"
+
+    async def generate_content(self, **kwargs):
+        await asyncio.sleep(llm_latency)
+        return _StubText()
+
+    async def generate_content_stream(self, **kwargs):
+        async def chunks():
+            for _ in range(4):
+                await asyncio.sleep(llm_latency / 4)
+                yield _StubText()
+        return chunks()
+
+    models.AsyncModels.generate_content = generate_content
+    models.AsyncModels.generate_content_stream = generate_content_stream
+
+    import requests
+    real_get = requests.get
+
+    def get(url, *args, **kwargs):
+        if "api.worldbank.org" in str(url):
+            time.sleep(gdp_latency)
+            return _StubGdpResponse(str(url))
+        return real_get(url, *args, **kwargs)
+
+    requests.get = get
+
+
+# ==========================
+# TRAFFIC
+# ==========================
+THRESHOLDS = [None, None, 0.55, 0.61, 0.65]
+YEARS = list(range(2015, 2026))
+
+
+def _forest_list(rng, forests, most=3):
+    return ",".join(rng.sample(forests, rng.randint(1, most)))
+
+
+def _period_params(rng):
+    """Either a year (and sometimes a month) or a date range, like the dashboard filters."""
+    if rng.random() < 0.3:
+        year = rng.choice(YEARS[:-1])
+        return {"date_from": f"{year}-{rng.randint(1, 12):02d}-01", "date_to": f"{year + 1}-{rng.randint(1, 12):02d}-01"}
+    params = {"year": rng.choice(YEARS)}
+    if rng.random() < 0.4:
+        params["month"] = rng.randint(1, 12)
+    return params
+
+
+def _threshold(rng, params):
+    threshold = rng.choice(THRESHOLDS)
+    if threshold is not None:
+        params["threshold"] = threshold
+    return params
+
+
+def filtered_data(rng, ctx):
+    params = _threshold(rng, {"forests": _forest_list(rng, ctx["forests"]), **_period_params(rng)})
+    return "GET", "/dashboard/filtered-data", {"params": params}
+
+
+def trend(rng, ctx):
+    params = {"forests": _forest_list(rng, ctx["forests"])}
+    if rng.random() < 0.5:
+        year = rng.choice(YEARS[:-1])
+        params.update(date_from=f"{year}-01-01", date_to=f"{rng.randint(year, YEARS[-1])}-12-31",
+                      resolution=rng.choice(["weekly", "monthly", "quarterly"]))
+    else:
+        params["year"] = rng.choice(YEARS)
+    return "GET", "/ndvi/api/s1/trend", {"params": _threshold(rng, params)}
+
+
+def forest_health(rng, ctx):
+    params = _threshold(rng, {"forests": _forest_list(rng, ctx["forests"]), **_period_params(rng)})
+    return "GET", "/dashboard/forest-health", {"params": params}
+
+
+def epi(rng, ctx):
+    params = {"forest": rng.choice(ctx["forests"]), "year": rng.choice(YEARS)}
+    return "GET", "/ndvi/api/s1/epi", {"params": _threshold(rng, params)}
+
+
+def policy_pdf(rng, ctx):
+    return "GET", "/dashboard/policy-pdf", {
+        "params": {"forest": rng.choice(ctx["forests"])},
+        "headers": ctx["headers"]["researcher"],
+    }
+
+
+def whistle_submit(rng, ctx):
+    forest = rng.choice(ctx["forests"])
+    text = rng.choice(["Trees being cut near the river", "Charcoal kilns seen at night",
+                       "Smoke and fire on the ridge", "New farming plots inside the forest"])
+    return "POST", "/whistle/submit", {"json": {"report": f"Load test\n\n{text}", "forest": forest}}
+
+
+def forest_ranking(rng, ctx):
+    return "GET", "/dashboard/forest-ranking", {"params": _threshold(rng, _period_params(rng))}
+
+
+def policy_results(rng, ctx):
+    return "GET", "/dashboard/policy-results", {
+        "params": {"forest": rng.choice(ctx["forests"])},
+        "headers": ctx["headers"]["researcher"],
+    }
+
+
+def summarize_article(rng, ctx):
+    return "POST", "/research/summarize_article", {
+        "json": {"url": "https://example.org/article"},
+        "headers": ctx["headers"]["researcher"],
+    }
+
+
+# name: (weight in the default mix, request builder); weight 0 runs only when asked for
+SCENARIOS = {
+    "filtered_data": (25, filtered_data),
+    "trend": (25, trend),
+    "forest_health": (20, forest_health),
+    "epi": (15, epi),
+    "policy_pdf": (5, policy_pdf),
+    "whistle_submit": (10, whistle_submit),
+    "forest_ranking": (0, forest_ranking),
+    "policy_results": (0, policy_results),
+    "summarize_article": (0, summarize_article),
+}
+
+
+# ==========================
+# SERVER
+# ==========================
+class _MemoryProbe:
+    """
+    WSGI middleware that, for requests carrying X-Loadtest-Memory, traces
+    allocations and returns the request's peak in X-Loadtest-Peak-Bytes.
+    Tracing starts on the first such request; they are sent one at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        if environ.get("HTTP_X_LOADTEST_MEMORY") != "1":
+            return self.app(environ, start_response)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured["response"] = (status, list(headers), exc_info)
+            return lambda data: None
+
+        result = self.app(environ, capture)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        status, headers, exc_info = captured["response"]
+        headers.append(("X-Loadtest-Peak-Bytes", str(tracemalloc.get_traced_memory()[1] - before)))
+        start_response(status, headers, exc_info)
+        return [body]
+
+
+def create_app():
+    """gunicorn app factory (loadtest:create_app()): stubs from the LOADTEST_* settings, then the app."""
+    install_stubs(float(os.environ["LOADTEST_LLM_LATENCY"]), float(os.environ["LOADTEST_SUMMARY_LATENCY"]),
+                  float(os.environ["LOADTEST_GDP_LATENCY"]))
+    from app import app
+
+    app.wsgi_app = _MemoryProbe(app.wsgi_app)
+    return app
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir):
+    """
+    Start gunicorn -c gunicorn.conf.py on the stubbed app; returns (process, base_url).
+    Reports go to a store in workdir; gunicorn's output to workdir/gunicorn.log.
+    """
+    import requests
+
+    port = args.port or _free_port()
+    env = dict(
+        os.environ,
+        BIND=f"127.0.0.1:{port}",
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "warning"),
+        WHISTLE_STORAGE_FILE=os.path.join(workdir, "whistleblower_reports.json"),
+        LOADTEST_LLM_LATENCY=str(args.llm_latency),
+        LOADTEST_SUMMARY_LATENCY=str(args.summary_latency),
+        LOADTEST_GDP_LATENCY=str(args.gdp_latency),
+    )
+    if args.workers:
+        env["WEB_WORKERS"] = str(args.workers)
+    if args.threads:
+        env["WEB_THREADS"] = str(args.threads)
+
+    log = open(os.path.join(workdir, "gunicorn.log"), "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "loadtest:create_app()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    log.close()
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            requests.get(f"{base_url}/metrics", timeout=10)
+            return process, base_url
+        except (requests.ConnectionError, requests.Timeout):
+            time.sleep(0.2)
+    stop_server(process)
+    with open(os.path.join(workdir, "gunicorn.log")) as f:
+        raise SystemExit(f"gunicorn did not start:\n{f.read()[-2000:]}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _process_tree(pid):
+    """pid and all of its descendants, from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def rss_bytes(pid):
+    """Resident set size of the gunicorn master and its workers (Linux /proc; None elsewhere)."""
+    total = 0
+    try:
+        for member in _process_tree(pid):
+            with open(f"/proc/{member}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError):
+        return None
+    return total
+
+
+def auth_headers(role, username):
+    import jwt
+
+    token = jwt.encode({"username": username, "role": role}, SECRET_KEY, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ==========================
+# LOAD
+# ==========================
+def send(session, base_url, name, request):
+    method, path, kwargs = request
+    start = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path, timeout=300, **kwargs)
+        status, size = response.status_code, len(response.content)
+    except Exception as e:
+        logger.debug("loadtest: %s failed: %s", name, e)
+        status, size = 0, 0
+    return name, status, time.perf_counter() - start, size
+
+
+def run_load(base_url, ctx, scenarios, concurrency, duration=None, total=None, seed=0, server_pid=None):
+    """
+    Replay the weighted mix from `concurrency` clients until `duration` seconds
+    pass or `total` requests are sent. Returns (samples, elapsed, rss_samples).
+    """
+    import requests
+
+    names = list(scenarios)
+    weights = [scenarios[n][0] or 1 for n in names]
+    deadline = time.monotonic() + duration if duration else None
+    budget = {"left": total}
+    budget_lock = threading.Lock()
+    samples, rss = [], []
+    stop = threading.Event()
+
+    def take():
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if budget["left"] is None:
+            return True
+        with budget_lock:
+            budget["left"] -= 1
+            return budget["left"] >= 0
+
+    def client(i):
+        rng = random.Random(seed * 1000 + i)
+        session = requests.Session()
+        local = []
+        while take():
+            name = rng.choices(names, weights)[0]
+            local.append(send(session, base_url, name, scenarios[name][1](rng, ctx)))
+        return local
+
+    def sample_rss():
+        while not stop.wait(0.2):
+            value = rss_bytes(server_pid) if server_pid else None
+            if value is not None:
+                rss.append(value)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest-client") as pool:
+        for local in pool.map(client, range(concurrency)):
+            samples.extend(local)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    return samples, elapsed, rss
+
+
+def measure_memory(base_url, ctx, scenarios, samples=MEMORY_SAMPLES, seed=0):
+    """Peak traced allocation per request in the server, each endpoint alone and one request at a time."""
+    import requests
+
+    session = requests.Session()
+    session.headers["X-Loadtest-Memory"] = "1"
+    rng = random.Random(seed)
+    peaks = {}
+    for name, (_, build) in scenarios.items():
+        peaks[name] = []
+        for _ in range(samples):
+            method, path, kwargs = build(rng, ctx)
+            try:
+                response = session.request(method, base_url + path, timeout=300, **kwargs)
+            except Exception as e:
+                logger.debug("loadtest: %s failed: %s", name, e)
+                continue
+            if "X-Loadtest-Peak-Bytes" in response.headers:
+                peaks[name].append(int(response.headers["X-Loadtest-Peak-Bytes"]))
+    return peaks
+
+
+def warm_up(base_url, forests, workers, rounds=5):
+    """
+    Warm the feature caches and the policy reports the PDF download needs.
+    Each worker keeps its own reports, so forests are requested over several
+    connections at once until PDF downloads stop missing on any worker.
+    """
+    import requests
+
+    def fetch(job):
+        path, forest, i = job
+        try:
+            return forest, requests.get(f"{base_url}{path}", params={"forest": forest}, timeout=300,
+                                        headers=auth_headers("researcher", f"loadtest-warmup-{forest}-{i}")).status_code
+        except requests.RequestException as e:
+            logger.debug("loadtest: warm-up of %s failed: %s", forest, e)
+            return forest, 0
+
+    pending = list(forests)
+    with ThreadPoolExecutor(max_workers=2 * workers, thread_name_prefix="loadtest-warmup") as pool:
+        for _ in range(rounds):
+            list(pool.map(fetch, [("/dashboard/policy-results", f, i) for f in pending for i in range(2 * workers)]))
+            checks = pool.map(fetch, [("/dashboard/policy-pdf", f, i) for f in pending for i in range(4 * workers)])
+            pending = sorted({forest for forest, status in checks if status != 200})
+            if not pending:
+                return
+    logger.warning("loadtest: policy reports still missing on some workers for %s", ", ".join(pending))
+
+
+def summarize(samples, elapsed, memory=None):
+    """Per-endpoint count, error count, throughput, latency percentiles (ms) and memory (KiB)."""
+    rows = {}
+    for name in sorted({s[0] for s in samples} | set(memory or {})):
+        mine = [s for s in samples if s[0] == name]
+        latencies = np.array([s[2] for s in mine]) * 1000
+        row = {
+            "requests": len(mine),
+            "errors": sum(1 for s in mine if not 200 <= s[1] < 400),
+            "rps": len(mine) / elapsed if elapsed else 0.0,
+        }
+        if len(mine):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            row.update(p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=latencies.max(),
+                       mean_kib=np.mean([s[3] for s in mine]) / 1024)
+        peaks = (memory or {}).get(name)
+        if peaks:
+            row.update(mem_p50_kib=float(np.median(peaks)) / 1024, mem_max_kib=max(peaks) / 1024)
+        rows[name] = row
+    return rows
+
+
+def print_report(rows, elapsed, rss, concurrency):
+    total = sum(r["requests"] for r in rows.values())
+    print(f"\n{total} requests in {elapsed:.1f}s from {concurrency} clients: {total / elapsed:.1f} req/s")
+    if rss:
+        print(f"Server RSS during load: start {rss[0] / 2**20:.0f} MiB, peak {max(rss) / 2**20:.0f} MiB, "
+              f"end {rss[-1] / 2**20:.0f} MiB")
+    header = f"{'endpoint':<18}{'reqs':>7}{'errs':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}" \
+             f"{'max ms':>9}{'resp KiB':>10}{'mem p50 KiB':>13}{'mem max KiB':>13}"
+    print(header)
+    print("-" * len(header))
+    for name, r in rows.items():
+        def cell(key, width, fmt="{:.1f}"):
+            return f"{fmt.format(r[key]) if key in r else '-':>{width}}"
+        print(f"{name:<18}{r['requests']:>7}{r['errors']:>6}{r['rps']:>8.1f}"
+              f"{cell('p50_ms', 9)}{cell('p95_ms', 9)}{cell('p99_ms', 9)}{cell('max_ms', 9)}"
+              f"{cell('mean_kib', 10)}{cell('mem_p50_kib', 13, '{:.0f}')}{cell('mem_max_kib', 13, '{:.0f}')}")
+
+
+# ==========================
+# ENTRY POINT
+# ==========================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard API under gunicorn with stubbed external backends.")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients (default 8)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load (default 30)")
+    parser.add_argument("--requests", type=int, help="stop after this many requests instead of --duration")
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--llm-latency", type=float, default=LLM_LATENCY, help="stubbed Gemini latency (s)")
+    parser.add_argument("--summary-latency", type=float, default=SUMMARY_LATENCY, help="stubbed OpenAI/MCP latency (s)")
+    parser.add_argument("--gdp-latency", type=float, default=GDP_LATENCY, help="stubbed World Bank latency (s)")
+    parser.add_argument("--memory-samples", type=int, default=MEMORY_SAMPLES,
+                        help="isolated requests per endpoint for the memory columns; 0 to skip")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0, help="server port (default: any free port)")
+    parser.add_argument("--workers", type=int, help="gunicorn worker processes (default: WEB_WORKERS or 2)")
+    parser.add_argument("--threads", type=int, help="threads per worker (default: WEB_THREADS or 8)")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.scenarios:
+        unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+        if unknown:
+            raise SystemExit(f"Unknown scenario: {', '.join(sorted(unknown))}")
+        scenarios = {n: SCENARIOS[n] for n in args.scenarios.split(",")}
+    else:
+        scenarios = {n: s for n, s in SCENARIOS.items() if s[0]}
+
+    from features import get_features
+    from incidents import STORAGE_FILE
+
+    # The snapshot is built here once so the workers only memory-map it. Reports
+    # submitted during the run go to a copy of the store that is thrown away.
+    forests = [str(f) for f in get_features()["forest"].cat.categories]
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    if os.path.exists(STORAGE_FILE):
+        shutil.copy(STORAGE_FILE, os.path.join(workdir, "whistleblower_reports.json"))
+
+    try:
+        server, base_url = start_server(args, workdir)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    try:
+        ctx = {
+            "forests": forests,
+            "headers": {"researcher": auth_headers("researcher", "loadtest-researcher")},
+        }
+        rss_start = rss_bytes(server.pid)
+        warm_up(base_url, forests, args.workers or int(os.getenv("WEB_WORKERS", "2")))
+        rss_warm = rss_bytes(server.pid)
+        if rss_start is not None:
+            print(f"Serving {base_url}; warm-up done, server RSS {rss_start / 2**20:.0f} -> {rss_warm / 2**20:.0f} MiB")
+
+        samples, elapsed, rss = run_load(base_url, ctx, scenarios, args.concurrency,
+                                         None if args.requests else args.duration, args.requests, args.seed,
+                                         server.pid)
+        memory = measure_memory(base_url, ctx, scenarios, args.memory_samples, args.seed) \
+            if args.memory_samples else None
+    finally:
+        stop_server(server)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = summarize(samples, elapsed, memory)
+    print_report(rows, elapsed, rss, args.concurrency)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "concurrency": args.concurrency,
+                "elapsed_seconds": elapsed,
+                "requests": len(samples),
+                "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+                "rss_peak_bytes": max(rss) if rss else None,
+                "endpoints": rows,
+            }, f, indent=4, default=float)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level="WARNING")
+    main()
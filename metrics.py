@@ -0,0 +1,176 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from flask import Blueprint, Response, request, g
+
+metrics_bp = Blueprint("metrics", __name__)
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for the latency histograms, Prometheus style.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_LOCK = threading.Lock()
+
+# key: (metric_name, sorted label tuple)
+_COUNTERS = {}
+_GAUGES = {}
+_HISTOGRAMS = {}  # value: {"buckets": [...], "sum": float, "count": int}
+
+_HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency per endpoint."),
+    "http_requests_in_flight": ("gauge", "Requests currently being served per endpoint."),
+    "stage_duration_seconds": ("histogram", "Time spent in each processing stage."),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)."),
+    "analytics_tasks_in_flight": ("gauge", "Tasks currently running on the analytics pool."),
+    "admission_queue_depth": ("gauge", "Requests waiting for a slot on an admission-controlled endpoint."),
+    "admission_rejected_total": ("counter", "Requests turned away with 429 by endpoint and reason."),
+    "result_cache_evictions_total": ("counter", "Query results evicted from the result cache to stay within its byte budget."),
+    "result_cache_bytes": ("gauge", "Bytes of query results held in the result cache."),
+    "result_cache_entries": ("gauge", "Query results held in the result cache."),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter."""
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + value
+
+
+def gauge_add(name, delta, **labels):
+    """Move a gauge up or down by delta."""
+    key = _key(name, labels)
+    with _LOCK:
+        _GAUGES[key] = _GAUGES.get(key, 0) + delta
+
+
+def observe(name, value, **labels):
+    """Record one observation in a latency histogram."""
+    key = _key(name, labels)
+    with _LOCK:
+        hist = _HISTOGRAMS.get(key)
+        if hist is None:
+            hist = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            _HISTOGRAMS[key] = hist
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                hist["buckets"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+def cache_lookup(cache, hit):
+    """Count a hit or miss against the named cache."""
+    inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a block of work and record it under stage_duration_seconds.
+    Usage:
+        with span("groupby"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("stage_duration_seconds", elapsed, stage=stage, **labels)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("stage %s took %.4fs %s", stage, elapsed, labels or "")
+
+
+# -----------------------
+#   REQUEST HOOKS
+# -----------------------
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_endpoint = _endpoint()
+    gauge_add("http_requests_in_flight", 1, endpoint=g._metrics_endpoint)
+
+
+def _after_request(response):
+    start = g.pop("_metrics_start", None)
+    if start is not None:
+        observe("http_request_duration_seconds", time.perf_counter() - start,
+                endpoint=g._metrics_endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    endpoint = g.pop("_metrics_endpoint", None)
+    if endpoint is not None:
+        gauge_add("http_requests_in_flight", -1, endpoint=endpoint)
+
+
+def init_app(app):
+    """Attach per-endpoint latency and in-flight tracking to the Flask app."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+# -----------------------
+#   EXPOSITION
+# -----------------------
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _header(lines, seen, name, default_type):
+    if name in seen:
+        return
+    seen.add(name)
+    metric_type, help_text = _HELP.get(name, (default_type, name))
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def render_metrics():
+    """Render every metric in the Prometheus text exposition format."""
+    with _LOCK:
+        counters = sorted(_COUNTERS.items())
+        gauges = sorted(_GAUGES.items())
+        histograms = sorted((k, dict(v, buckets=list(v["buckets"]))) for k, v in _HISTOGRAMS.items())
+
+    lines = []
+    seen = set()
+
+    for (name, labels), value in counters:
+        _header(lines, seen, name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), value in gauges:
+        _header(lines, seen, name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), hist in histograms:
+        _header(lines, seen, name, "histogram")
+        for bound, count in zip(LATENCY_BUCKETS, hist["buckets"]):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
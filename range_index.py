@@ -0,0 +1,246 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from features import get_features, data_version, compute_environmental_index
+from metrics import span, cache_lookup
+
+# Scenes are sorted by (forest, date) and addressed by key = forest_code << DAY_BITS | day,
+# day being days since 1970-01-01. Cumulative sums over that order turn any
+# [start, end) mean or count into two searchsorted calls and a subtraction.
+DAY_BITS = 20
+
+SUMMED_COLUMNS = ("RFDI", "EPI", "alert")
+
+RESOLUTIONS = {
+    "weekly": ("W-SUN", "W-MON"),
+    "monthly": ("M", "MS"),
+    "quarterly": ("Q", "QS"),
+    "yearly": ("Y", "YS"),
+}
+DEFAULT_WINDOW_DAYS = 30
+
+# One index per (data version, threshold); a handful of thresholds is plenty.
+MAX_INDEXES = 8
+_INDEXES = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+
+def to_days(values):
+    """Dates (scalar or array-like) as integer days since the epoch."""
+    return np.asarray(pd.to_datetime(values), dtype="datetime64[D]").astype(np.int64)
+
+
+def from_days(day):
+    return pd.Timestamp(int(day), unit="D")
+
+
+def build_range_index(df, threshold=None):
+    """Sort by (forest, date), keep per-scene EPI in that order and prefix-sum RFDI, EPI and alert."""
+    epi = compute_environmental_index(df, threshold)
+    codes = df["forest"].cat.codes.to_numpy().astype(np.int64)
+    days = to_days(df["date"])
+    order = np.lexsort((days, codes))
+
+    cumulative = {}
+    for col in SUMMED_COLUMNS:
+        values = epi[col].to_numpy(dtype=np.float64)[order]
+        cumulative[col] = np.concatenate(([0.0], np.cumsum(values)))
+
+    return {
+        "keys": (codes[order] << DAY_BITS) | days[order],
+        "order": order,
+        "days": days[order],
+        "epi": epi["EPI"].to_numpy(dtype=np.float64)[order],
+        "cumulative": cumulative,
+        "categories": df["forest"].cat.categories,
+    }
+
+
+def get_range_index(threshold=None):
+    """Range index for the current data version and alert threshold."""
+    key = (data_version(), threshold)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        cache_lookup("range_index", index is not None)
+        if index is not None:
+            _INDEXES.move_to_end(key)
+            return index
+
+    with span("range_index_build"):
+        index = build_range_index(get_features(), threshold)
+
+    with _INDEXES_LOCK:
+        _INDEXES[key] = index
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return index
+
+
+def forest_codes(index, forests=None):
+    """Category codes for the requested forest names (all forests when None); unknown names are dropped."""
+    categories = index["categories"]
+    if not forests:
+        return np.arange(len(categories), dtype=np.int64)
+    codes = categories.get_indexer(forests)
+    return np.unique(codes[codes >= 0]).astype(np.int64)
+
+
+def positions(index, codes, days):
+    """Position of the first scene at or after `days` for each forest code (broadcasting)."""
+    return np.searchsorted(index["keys"], (codes << DAY_BITS) | days, side="left")
+
+
+def window_totals(index, codes, start_days, end_days):
+    """Scene count and column sums within [start_days, end_days) for each forest code."""
+    lo = positions(index, codes, start_days)
+    hi = positions(index, codes, end_days)
+    totals = {col: cs[hi] - cs[lo] for col, cs in index["cumulative"].items()}
+    totals["count"] = hi - lo
+    return totals
+
+
+def parse_range(args):
+    """
+    Read date_from/date_to (inclusive ISO dates) from request args.
+    Without them the range falls back to the year (and month, when a year is
+    given) filters, then to the full data span. Returns (start_day, end_day_exclusive).
+    A month without a year is not a range and raises ValueError.
+    """
+    date_from = args.get("date_from")
+    date_to = args.get("date_to")
+    year = args.get("year")
+    month = args.get("month")
+
+    if month and not year and not (date_from or date_to):
+        raise ValueError("month needs a year, or use date_from/date_to")
+
+    if year and month:
+        period = pd.Period(year=int(year), month=int(month), freq="M")
+    elif year:
+        period = pd.Period(year=int(year), freq="Y")
+    else:
+        period = None
+
+    if date_from:
+        start = pd.Timestamp(date_from)
+    elif period is not None:
+        start = period.start_time
+    else:
+        start = pd.Timestamp("1970-01-01")
+
+    if date_to:
+        end = pd.Timestamp(date_to) + pd.Timedelta(days=1)
+    elif period is not None:
+        end = period.end_time.normalize() + pd.Timedelta(days=1)
+    else:
+        end = pd.Timestamp.max.normalize()
+
+    start_day, end_day = int(to_days(start)), int(to_days(end))
+    if end_day <= start_day:
+        raise ValueError("date_to must not be before date_from")
+    return start_day, min(end_day, (1 << DAY_BITS) - 1)
+
+
+def is_range_query(args):
+    return any(args.get(p) for p in ("date_from", "date_to", "resolution"))
+
+
+def range_args(args):
+    """(start_day, end_day, resolution, window_days) from request args; ValueError when invalid."""
+    start_day, end_day = parse_range(args)
+    resolution = args.get("resolution") or "monthly"
+    if resolution != "rolling" and resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    window_days = int(args.get("window_days") or DEFAULT_WINDOW_DAYS)
+    if window_days < 1:
+        raise ValueError("window_days must be positive")
+    return start_day, end_day, resolution, window_days
+
+
+def bucket_edges(index, codes, resolution, start_day, end_day):
+    """[start, end) day edges of each resolution bucket that overlaps the data range."""
+    first = positions(index, codes, start_day)
+    last = positions(index, codes, end_day)
+    present = last > first
+    if not present.any():
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    data_start = max(start_day, int(index["days"][first[present]].min()))
+    data_end = min(end_day, int(index["days"][last[present] - 1].max()) + 1)
+
+    period_freq, range_freq = RESOLUTIONS[resolution]
+    first_period = from_days(data_start).to_period(period_freq).start_time
+    last_period_end = from_days(data_end - 1).to_period(period_freq).end_time.normalize()
+    edges = to_days(pd.date_range(first_period, last_period_end + pd.Timedelta(days=1), freq=range_freq))
+    starts = np.maximum(edges[:-1], start_day)
+    ends = np.minimum(edges[1:], end_day)
+    return starts, ends
+
+
+def rolling_edges(index, codes, window_days, start_day, end_day):
+    """
+    Windows (d - window_days, d] ending on each distinct scene date d in range,
+    clipped to start at start_day so no window counts scenes before the range.
+    """
+    lo = positions(index, codes, start_day)
+    hi = positions(index, codes, end_day)
+    anchors = np.unique(np.concatenate([index["days"][a:b] for a, b in zip(lo, hi)] or [np.empty(0, np.int64)]))
+    return np.maximum(anchors - window_days + 1, start_day), anchors + 1
+
+
+def aggregate(index, forests, start_day, end_day, resolution="monthly", window_days=DEFAULT_WINDOW_DAYS, per_forest=False):
+    """
+    Mean RFDI, mean EPI, alert count and scene count per bucket for the selected
+    forests, pooled across forests unless per_forest is set. Only buckets that
+    contain scenes are returned, as with a groupby.
+    """
+    codes = forest_codes(index, forests)
+    if resolution == "rolling":
+        starts, ends = rolling_edges(index, codes, window_days, start_day, end_day)
+        labels = ends - 1
+    elif resolution in RESOLUTIONS:
+        starts, ends = bucket_edges(index, codes, resolution, start_day, end_day)
+        labels = starts
+    else:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    # totals[col] has shape (forests, buckets)
+    totals = window_totals(index, codes[:, None], starts[None, :], ends[None, :])
+    if not per_forest:
+        totals = {col: values.sum(axis=0, keepdims=True) for col, values in totals.items()}
+        row_forests = [None]
+    else:
+        row_forests = list(index["categories"][codes])
+
+    rows = []
+    for i, forest in enumerate(row_forests):
+        count = totals["count"][i]
+        keep = count > 0
+        period = pd.to_datetime(labels[keep], unit="D")
+        frame = pd.DataFrame({
+            "period": period.strftime("%Y-%m-%d"),
+            "year": period.year,
+            "month": period.month,
+            "RFDI": totals["RFDI"][i][keep] / count[keep],
+            "EPI": totals["EPI"][i][keep] / count[keep],
+            "alert": totals["alert"][i][keep].round().astype(np.int64),
+            "count": count[keep],
+        })
+        if forest is not None:
+            frame.insert(0, "forest", forest)
+        rows.append(frame)
+    return pd.concat(rows, ignore_index=True)
+
+
+def count_alerts_in_range(index, forests, start_day, end_day):
+    """Alert count and scene count for the selected forests within [start_day, end_day)."""
+    totals = window_totals(index, forest_codes(index, forests), start_day, end_day)
+    return int(round(totals["alert"].sum())), int(totals["count"].sum())
+
+
+def rows_in_range(index, forests, start_day, end_day):
+    """Row positions of the feature frame for the selected forests within [start_day, end_day)."""
+    codes = forest_codes(index, forests)
+    lo = positions(index, codes, start_day)
+    hi = positions(index, codes, end_day)
+    return np.concatenate([index["order"][a:b] for a, b in zip(lo, hi)] or [np.empty(0, np.int64)])
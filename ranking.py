@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from features import data_version
+from metrics import span, cache_lookup
+from range_index import get_range_index, forest_codes, window_totals, bucket_edges
+
+# Trend slope is fitted on the last TREND_MONTHS monthly mean RFDI values of the period.
+TREND_MONTHS = 12
+
+# Higher is better for health and EPI, lower is better for the rest.
+SORT_KEYS = {
+    "health": False,
+    "EPI": False,
+    "alert_rate": True,
+    "RFDI": True,
+    "trend_slope": True,
+}
+DEFAULT_SORT = "health"
+
+MAX_RANKINGS = 32
+_RANKINGS = OrderedDict()
+_RANKINGS_LOCK = threading.Lock()
+
+
+def trend_slopes(index, codes, start_day, end_day, months=TREND_MONTHS):
+    """
+    Least-squares slope (RFDI per year) of monthly mean RFDI over the last
+    `months` months of the period, for every forest code at once.
+    Months without scenes are left out of the fit.
+    """
+    starts, ends = bucket_edges(index, codes, "monthly", start_day, end_day)
+    starts, ends = starts[-months:], ends[-months:]
+    totals = window_totals(index, codes[:, None], starts[None, :], ends[None, :])
+
+    count = totals["count"]
+    weight = (count > 0).astype(np.float64)
+    y = np.divide(totals["RFDI"], count, out=np.zeros(count.shape), where=count > 0)
+    x = np.broadcast_to(np.arange(len(starts), dtype=np.float64), y.shape)
+
+    n = weight.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = (weight * x).sum(axis=1) / n
+        y_mean = (weight * y).sum(axis=1) / n
+        dx = (x - x_mean[:, None]) * weight
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(n >= 2, slope * 12, np.nan)
+
+
+def rank_forests(index, start_day, end_day, sort_by=DEFAULT_SORT):
+    """
+    Health, alert rate, mean RFDI, mean EPI and trend slope of every forest
+    within [start_day, end_day), from one prefix-sum lookup per forest.
+    Health follows /dashboard/forest-health: 100 - share of all alerts in the period.
+    """
+    codes = forest_codes(index)
+    totals = window_totals(index, codes, start_day, end_day)
+    count = totals["count"]
+    present = count > 0
+
+    alerts = totals["alert"].round()
+    total_alerts = alerts.sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        health = np.where(total_alerts > 0, 100 - alerts / total_alerts * 100, 100.0)
+        table = pd.DataFrame({
+            "forest": index["categories"][codes].astype(str),
+            "health": np.maximum(health, 0).round(1),
+            "alert_count": alerts.astype(np.int64),
+            "alert_rate": alerts / count,
+            "RFDI": totals["RFDI"] / count,
+            "EPI": totals["EPI"] / count,
+            "trend_slope": trend_slopes(index, codes, start_day, end_day),
+            "count": count,
+        })[present]
+
+    table = table.sort_values([sort_by, "forest"], ascending=[SORT_KEYS[sort_by], True], kind="stable")
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+def get_forest_ranking(start_day, end_day, threshold=None, sort_by=DEFAULT_SORT):
+    """Ranking for the current data version, cached per period, threshold and sort key."""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort_by: {sort_by}")
+    key = (data_version(), start_day, end_day, threshold, sort_by)
+    with _RANKINGS_LOCK:
+        ranking = _RANKINGS.get(key)
+        cache_lookup("forest_ranking", ranking is not None)
+        if ranking is not None:
+            _RANKINGS.move_to_end(key)
+            return ranking
+
+    with span("forest_ranking"):
+        ranking = rank_forests(get_range_index(threshold), start_day, end_day, sort_by)
+
+    with _RANKINGS_LOCK:
+        _RANKINGS[key] = ranking
+        while len(_RANKINGS) > MAX_RANKINGS:
+            _RANKINGS.popitem(last=False)
+    return ranking
@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from features import ALERT_THRESHOLD, ALERT_SCORE, PIXEL_ALERT_FRACTION
+
+logger = logging.getLogger(__name__)
+
+# Per-scene backscatter rasters in dB, one directory per forest:
+#   rasters/<forest>/<YYYY-MM-DD>_VV.npy, rasters/<forest>/<YYYY-MM-DD>_VH.npy
+# and an optional rasters/<forest>/mask.npy (bool) marking pixels inside the forest.
+# NaN marks no-data pixels.
+RASTER_DIR = os.getenv("RASTER_DIR", "rasters")
+ZONAL_STATS_FILE = "zonal_stats.csv"
+
+TILE_SIZE = 512
+RASTER_WORKERS = int(os.getenv("RASTER_WORKERS", os.cpu_count() or 1))
+
+# Pixel RFDI histogram over [-1, 1]. The scene's alert score is read off it, so
+# thresholds resolve to RFDI_BINS / 2 steps (0.001); ALERT_THRESHOLD falls on a bin edge.
+RFDI_BINS = 2000
+_RFDI_EDGES = np.linspace(-1, 1, RFDI_BINS + 1)
+
+_SCENE_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})_VV\.npy$")
+
+SUM_FIELDS = ("pixels", "alert_pixels", "VV_db", "VH_db", "RFDI", "RVI", "histogram")
+
+
+def find_scenes(root=RASTER_DIR):
+    """(forest, date, vv_path, vh_path, mask_path) for every VV/VH pair under root."""
+    scenes = []
+    if not os.path.isdir(root):
+        return scenes
+    for forest in sorted(os.listdir(root)):
+        folder = os.path.join(root, forest)
+        if not os.path.isdir(folder):
+            continue
+        mask_path = os.path.join(folder, "mask.npy")
+        mask_path = mask_path if os.path.exists(mask_path) else None
+        for name in sorted(os.listdir(folder)):
+            match = _SCENE_FILE.match(name)
+            vh_path = os.path.join(folder, f"{match.group(1)}_VH.npy") if match else None
+            if match and os.path.exists(vh_path):
+                scenes.append((forest, match.group(1), os.path.join(folder, name), vh_path, mask_path))
+    return scenes
+
+
+def tile_stats(vv_path, vh_path, mask_path, rows, cols):
+    """
+    compute_s1_features per pixel on one tile, reduced to sums.
+    Arrays are memory-mapped, so only this tile is read into memory.
+    """
+    vv_db = np.load(vv_path, mmap_mode="r")[rows[0]:rows[1], cols[0]:cols[1]].astype(np.float64)
+    vh_db = np.load(vh_path, mmap_mode="r")[rows[0]:rows[1], cols[0]:cols[1]].astype(np.float64)
+    valid = np.isfinite(vv_db) & np.isfinite(vh_db)
+    if mask_path is not None:
+        valid &= np.load(mask_path, mmap_mode="r")[rows[0]:rows[1], cols[0]:cols[1]].astype(bool)
+
+    vv_db, vh_db = vv_db[valid], vh_db[valid]
+    vv_lin = 10 ** (vv_db / 10)
+    vh_lin = 10 ** (vh_db / 10)
+    total = vv_lin + vh_lin
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rfdi = np.where(total != 0, (vv_lin - vh_lin) / total, 0)
+        rvi = np.where(total != 0, 4 * vh_lin / total, 0)
+
+    return {
+        "pixels": int(valid.sum()),
+        "alert_pixels": int((rfdi > ALERT_THRESHOLD).sum()),
+        "VV_db": float(vv_db.sum()),
+        "VH_db": float(vh_db.sum()),
+        "RFDI": float(rfdi.sum()),
+        "RVI": float(rvi.sum()),
+        "histogram": np.histogram(rfdi, bins=RFDI_BINS, range=(-1, 1))[0],
+    }
+
+
+def alert_score(histogram, fraction=PIXEL_ALERT_FRACTION):
+    """
+    RFDI exceeded by `fraction` of the pixels: the middle of the highest bin at
+    or above which at least that share of pixels lie. A scene has at least
+    `fraction` of its pixels above a threshold t exactly when this is above t
+    (to bin resolution), which is how features.flag_alerts reads it.
+    """
+    pixels = histogram.sum()
+    if pixels == 0:
+        return np.nan
+    at_or_above = np.cumsum(histogram[::-1])[::-1]
+    k = np.flatnonzero(at_or_above >= fraction * pixels)[-1]
+    return float((_RFDI_EDGES[k] + _RFDI_EDGES[k + 1]) / 2)
+
+
+def _tile_job(job):
+    scene_id, vv_path, vh_path, mask_path, rows, cols = job
+    return scene_id, tile_stats(vv_path, vh_path, mask_path, rows, cols)
+
+
+def _tiles(shape, tile_size):
+    for r in range(0, shape[0], tile_size):
+        for c in range(0, shape[1], tile_size):
+            yield (r, min(r + tile_size, shape[0])), (c, min(c + tile_size, shape[1]))
+
+
+def zonal_stats(scenes, tile_size=TILE_SIZE, workers=RASTER_WORKERS):
+    """
+    Per-scene zonal statistics over the forest mask, computed tile by tile.
+    Tiles from all scenes are spread across a process pool; memory per worker
+    is bounded by one tile.
+    """
+    jobs = []
+    for scene_id, (forest, date, vv_path, vh_path, mask_path) in enumerate(scenes):
+        shape = np.load(vv_path, mmap_mode="r").shape
+        for rows, cols in _tiles(shape, tile_size):
+            jobs.append((scene_id, vv_path, vh_path, mask_path, rows, cols))
+
+    totals = [dict.fromkeys(SUM_FIELDS, 0) for _ in scenes]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_tile_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+            for scene_id, stats in results:
+                for field in SUM_FIELDS:
+                    totals[scene_id][field] += stats[field]
+    else:
+        for scene_id, stats in map(_tile_job, jobs):
+            for field in SUM_FIELDS:
+                totals[scene_id][field] += stats[field]
+
+    rows = []
+    for (forest, date, *_), t in zip(scenes, totals):
+        pixels = t["pixels"]
+        rows.append({
+            "forest": forest,
+            "date": date,
+            "pixels": pixels,
+            "VV": t["VV_db"] / pixels if pixels else np.nan,
+            "VH": t["VH_db"] / pixels if pixels else np.nan,
+            "pixel_RFDI": t["RFDI"] / pixels if pixels else np.nan,
+            "pixel_RVI": t["RVI"] / pixels if pixels else np.nan,
+            "alert_fraction": t["alert_pixels"] / pixels if pixels else np.nan,
+            ALERT_SCORE: alert_score(t["histogram"]) if pixels else np.nan,
+        })
+    return pd.DataFrame(rows, columns=["forest", "date", "pixels", "VV", "VH",
+                                       "pixel_RFDI", "pixel_RVI", "alert_fraction", ALERT_SCORE])
+
+
+def ingest_rasters(root=RASTER_DIR):
+    """Compute zonal statistics for every scene under root and write them to root/zonal_stats.csv."""
+    scenes = find_scenes(root)
+    stats = zonal_stats(scenes)
+    path = os.path.join(root, ZONAL_STATS_FILE)
+    stats.to_csv(path, index=False)
+    logger.info("Wrote zonal statistics for %d scenes to %s", len(stats), path)
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level="INFO")
+    ingest_rasters(sys.argv[1] if len(sys.argv) > 1 else RASTER_DIR)
@@ -3,7 +3,7 @@ from flask import Blueprint, request, jsonify
 import jwt
 import os
 from functools import wraps
-from summary import run_web_summary
+from admission import admission_controlled
 
 research_bp = Blueprint('research', __name__)
 
@@ -84,6 +84,7 @@ def add_resource():
 
 @research_bp.route("/summarize_article", methods=["POST"])
 @token_required
+@admission_controlled("summarize_article")
 def summarize_article():
     data = request.get_json()
     url = data.get("url", "")
@@ -91,6 +92,9 @@ def summarize_article():
     if not url:
         return jsonify({"error": "Missing article URL"}), 400
 
+    # The summary agent pulls in autogen and the MCP browser tooling, so load it on demand
+    from summary import run_web_summary
+
     summary = run_web_summary(url)
 
     return jsonify({"summary": summary}), 200
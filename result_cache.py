@@ -0,0 +1,150 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, make_response, request
+from features import data_version
+from metrics import inc, gauge_add, cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Serialized JSON responses of read-only query endpoints, keyed on the view,
+# the data version and the normalized query string. Bounded by the total size
+# of the cached bodies, least recently used first out. One cache per process.
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_MB", "64")) * 2**20
+
+# A single response larger than this is served but not cached, so one
+# unfiltered download cannot flush every popular view.
+MAX_ENTRY_FRACTION = 8
+
+# Parameters holding comma-separated lists; order does not change the result. Duplicates
+# can (two forest names select the per-forest trend shape), so they are kept.
+LIST_PARAMS = {"forests", "forest", "bands", "variables", "variable"}
+
+# Numeric parameters are compared by value, so threshold=0.6 and 0.60 share an entry.
+NUMERIC_PARAMS = {"threshold": float, "level": float, "year": int, "month": int, "horizon": int,
+                  "cadence": int, "window_days": int, "max_gap_days": int}
+
+# Rough per-entry overhead (key tuple, OrderedDict node, Response metadata).
+ENTRY_OVERHEAD = 512
+
+
+class ResultCache:
+    """LRU of (body, mimetype) by key with a byte budget; entries of older data versions are dropped."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.version = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self.lock = threading.Lock()
+
+    def _drop(self, key):
+        body, _ = self.entries.pop(key)
+        size = len(body) + ENTRY_OVERHEAD
+        self.bytes -= size
+        gauge_add("result_cache_bytes", -size)
+        gauge_add("result_cache_entries", -1)
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                logger.debug("result cache: data version %s -> %s, dropping %d entries",
+                             self.version, version, len(self.entries))
+                self.stats["invalidations"] += len(self.entries)
+            for key in list(self.entries):
+                self._drop(key)
+            self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key, version, body, mimetype):
+        size = len(body) + ENTRY_OVERHEAD
+        if size > self.max_bytes // MAX_ENTRY_FRACTION:
+            return
+        with self.lock:
+            self._check_version(version)
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (body, mimetype)
+            self.bytes += size
+            gauge_add("result_cache_bytes", size)
+            gauge_add("result_cache_entries", 1)
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+                inc("result_cache_evictions_total")
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.bytes, max_bytes=self.max_bytes)
+
+
+_CACHE = ResultCache(RESULT_CACHE_BYTES)
+
+
+def result_cache_stats():
+    """Hits, misses, evictions, invalidations, entries and bytes of the result cache."""
+    return _CACHE.snapshot()
+
+
+def _normalize(name, value):
+    value = value.strip()
+    if name in LIST_PARAMS:
+        return ",".join(sorted(v.strip() for v in value.split(",") if v.strip()))
+    if name in NUMERIC_PARAMS:
+        try:
+            return repr(NUMERIC_PARAMS[name](value))
+        except ValueError:
+            return value  # the view answers with an error, which is never stored
+    return value
+
+
+def normalized_params(args):
+    """
+    Sorted (name, normalized value) pairs of the query string, ignoring empty
+    parameters. Only the first value of a repeated parameter counts, as in the views.
+    """
+    params = {}
+    for name in args:
+        value = _normalize(name, args.get(name))
+        if value:
+            params[name] = value
+    return tuple(sorted(params.items()))
+
+
+def cached_response(view_name):
+    """
+    Serve repeated GETs of a read-only view from the result cache. Only 200 JSON
+    responses are stored, unless marked Cache-Control: no-store; the view must
+    depend on nothing but its query string and the feature data.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            version = data_version()
+            key = (view_name, normalized_params(request.args))
+            entry = _CACHE.get(key, version)
+            cache_lookup(f"result_{view_name}", entry is not None)
+            if entry is not None:
+                body, mimetype = entry
+                return Response(body, status=200, mimetype=mimetype)
+
+            response = make_response(fn(*args, **kwargs))
+            if (response.status_code == 200 and not response.is_streamed and response.mimetype == "application/json"
+                    and "no-store" not in response.headers.get("Cache-Control", "")):
+                _CACHE.put(key, version, response.get_data(), response.mimetype)
+            return response
+        return wrapper
+    return decorator
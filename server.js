@@ -282,6 +282,34 @@ app.get('/api/dashboard/policy-results', checkAuth, async (req, res) => {
   }
 });
 
+// Relay server-sent event streams (policy report, batch evaluation) as they are generated
+function relayEventStream(endpoint) {
+  return async (req, res) => {
+    try {
+      const upstream = await axios({
+        method: 'GET',
+        url: `${FLASK_BACKEND_URL}${endpoint}?` + querystring.stringify(req.query),
+        headers: { 'Authorization': `Bearer ${req.token}` },
+        responseType: 'stream',
+      });
+      res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+      });
+      upstream.data.pipe(res);
+      req.on('close', () => upstream.data.destroy());
+    } catch (error) {
+      const status = error.response ? error.response.status : 500;
+      console.log(`Backend error for ${endpoint}:`, status, error.message);
+      res.status(status).json({ error: 'Policy stream failed' });
+    }
+  };
+}
+
+app.get('/api/dashboard/policy-stream', checkAuth, relayEventStream('/dashboard/policy-stream'));
+app.get('/api/dashboard/policy-batch', checkAuth, relayEventStream('/dashboard/policy-batch'));
+
 app.post('/api/dashboard/ndvi/predict', checkAuth, async (req, res) => {
   console.log('/api/dashboard/ndvi/predict: request received');
   const result = await makeBackendRequest('POST', '/dashboard/ndvi/predict', req.body, req.token);
@@ -355,6 +383,48 @@ app.get('/filtered-data', async (req, res) => {
   }
 });
 
+app.get('/api/dashboard/summary', async (req, res) => {
+  const result = await makeBackendRequest('GET', `/dashboard/summary?${querystring.stringify(req.query)}`);
+  if (result.success) {
+    res.json(result.data);
+  } else {
+    res.status(result.status).json({ error: result.error });
+  }
+});
+
+app.get('/api/dashboard/forest-ranking', checkAuth, async (req, res) => {
+  const result = await makeBackendRequest('GET', `/dashboard/forest-ranking?${querystring.stringify(req.query)}`, null, req.token);
+  if (result.success) {
+    res.json(result.data);
+  } else {
+    res.status(result.status).json({ error: result.error });
+  }
+});
+
+app.get('/api/dashboard/correlations', checkAuth, async (req, res) => {
+  const result = await makeBackendRequest('GET', `/dashboard/correlations?${querystring.stringify(req.query)}`, null, req.token);
+  if (result.success) {
+    res.json(result.data);
+  } else {
+    res.status(result.status).json({ error: result.error });
+  }
+});
+
+// Forest-loss drivers: summary, yearly, periods
+app.get('/api/drivers/:view(summary|yearly|periods)', async (req, res) => {
+  const result = await makeBackendRequest('GET', `/drivers/${req.params.view}?${querystring.stringify(req.query)}`);
+  if (result.success) {
+    res.json(result.data);
+  } else {
+    res.status(result.status).json({ error: result.error });
+  }
+});
+
+// Arrow / Parquet exports are binary, so the backend response is piped through as is
+app.get('/api/export/:dataset(features|aggregates|epi)', checkAuth, (req, res) => {
+  proxyToBackend(req, res, `/export/${req.params.dataset}?${querystring.stringify(req.query)}`);
+});
+
 app.get('/api/whistle/reports', checkAuth, async (req, res) => {
   console.log('/api/whistle/reports: request received');
   // Read from the JSON file that Flask writes to
@@ -423,6 +493,49 @@ app.get('/api/admin/uploads', checkAuth, (req, res) => {
   proxyToBackend(req, res, '/admin/uploads');
 });
 
+app.get('/api/admin/incidents', checkAuth, async (req, res) => {
+  const result = await makeBackendRequest('GET', `/admin/incidents?${querystring.stringify(req.query)}`, null, req.token);
+  if (result.success) {
+    res.json(result.data);
+  } else {
+    res.status(result.status).json({ error: result.error });
+  }
+});
+
+// New scenes arrive as a CSV upload (forwarded as multipart, like /api/admin/upload) or a JSON scenes list
+app.post('/api/admin/scenes', checkAuth, upload.single('file'), async (req, res) => {
+  if (!req.file) {
+    const result = await makeBackendRequest('POST', '/admin/scenes', req.body, req.token);
+    if (result.success) {
+      res.json(result.data);
+    } else {
+      res.status(result.status).json({ error: result.error });
+    }
+    return;
+  }
+
+  const form = new FormData();
+  form.append('file', req.file.buffer, {
+    filename: req.file.originalname,
+    contentType: req.file.mimetype,
+  });
+
+  try {
+    const response = await axios({
+      method: 'POST',
+      url: `${FLASK_BACKEND_URL}/admin/scenes`,
+      headers: {
+        ...form.getHeaders(),
+        'Authorization': `Bearer ${req.token}`,
+      },
+      data: form,
+    });
+    res.json(response.data);
+  } catch (error) {
+    res.status(error.response?.status || 500).json({ error: error.response?.data?.error || error.message });
+  }
+});
+
 // Evaluate route
 app.get('/api/evaluate', async (req, res) => {
   const result = await makeBackendRequest('GET', '/evaluate');
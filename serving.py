@@ -0,0 +1,122 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import gauge_add
+
+logger = logging.getLogger(__name__)
+
+# Blocking analytics (pandas, statsmodels, PDF rendering) run on this bounded pool so
+# a burst of slow requests queues here instead of tying up every request thread.
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Outbound LLM and HTTP calls run as coroutines on one event loop per process,
+# driven by a background thread; request threads just wait on the result.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+_POOL = {}
+_LOOP = {}
+_LOCK = threading.Lock()
+
+
+def analytics_pool():
+    """Shared bounded executor for CPU-bound work, created on first use."""
+    if "pool" not in _POOL:
+        with _LOCK:
+            if "pool" not in _POOL:
+                _POOL["pool"] = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix="analytics")
+    return _POOL["pool"]
+
+
+def _track(fn, *args, **kwargs):
+    gauge_add("analytics_tasks_in_flight", 1)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        gauge_add("analytics_tasks_in_flight", -1)
+
+
+def submit(fn, *args, **kwargs):
+    """Start fn on the analytics pool and return its Future without waiting."""
+    return analytics_pool().submit(_track, fn, *args, **kwargs)
+
+
+def run_blocking(fn, *args, **kwargs):
+    """Run fn on the analytics pool from a request thread and wait for its result."""
+    return submit(fn, *args, **kwargs).result()
+
+
+async def offload(fn, *args, **kwargs):
+    """Await fn on the analytics pool from a coroutine without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(analytics_pool(), lambda: _track(fn, *args, **kwargs))
+
+
+def event_loop():
+    """The process-wide event loop for outbound I/O, started on first use."""
+    if "loop" not in _LOOP:
+        with _LOCK:
+            if "loop" not in _LOOP:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="io-loop", daemon=True)
+                thread.start()
+                _LOOP["loop"] = loop
+                logger.info("Started I/O event loop")
+    return _LOOP["loop"]
+
+
+def schedule(coro):
+    """Start a coroutine on the shared event loop; returns a concurrent Future."""
+    return asyncio.run_coroutine_threadsafe(coro, event_loop())
+
+
+def run_async(coro, timeout=LLM_TIMEOUT):
+    """
+    Run a coroutine on the shared event loop and wait for it from a sync view.
+    The coroutine is cancelled if it does not finish within timeout seconds.
+    """
+    future = schedule(coro)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+_DONE = object()
+
+
+def iterate_async(agen, timeout=LLM_TIMEOUT):
+    """
+    Consume an async generator on the shared event loop and yield its items in
+    the calling thread as they arrive, e.g. to relay a streamed LLM response.
+    Raises TimeoutError if no item arrives within timeout seconds; closing the
+    returned generator early cancels the producer.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except Exception as e:
+            items.put((_DONE, e))
+        else:
+            items.put((_DONE, None))
+
+    future = schedule(pump())
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("no output from async producer") from None
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
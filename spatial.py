@@ -0,0 +1,141 @@
+import json
+import math
+import threading
+import numpy as np
+import pandas as pd
+from features import get_features, data_version, BBOX_COLUMNS
+from metrics import span, cache_lookup
+
+# Uniform grid over the extent of all geometries, sized so each grid bucket
+# holds about CELLS_PER_BUCKET geometries on average.
+CELLS_PER_BUCKET = 4
+
+_INDEX = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def build_spatial_index(df):
+    """
+    Group observations into cells (one per distinct forest + geometry) and
+    register each cell's bounding box in every grid bucket it overlaps.
+    """
+    cell_ids, cells = pd.MultiIndex.from_frame(df[["forest"] + BBOX_COLUMNS].astype({"forest": str})).factorize()
+    cells = cells.to_frame(index=False, name=["forest"] + BBOX_COLUMNS)
+    bounds = cells[BBOX_COLUMNS].to_numpy(dtype=np.float64)
+    cells["lon"] = (bounds[:, 0] + bounds[:, 2]) / 2
+    cells["lat"] = (bounds[:, 1] + bounds[:, 3]) / 2
+
+    # Rows sorted by cell so each cell's observations are one contiguous slice
+    row_order = np.argsort(cell_ids, kind="stable")
+    cell_start = np.searchsorted(cell_ids[row_order], np.arange(len(cells) + 1))
+
+    valid = ~np.isnan(bounds).any(axis=1)
+    if valid.any():
+        extent = (bounds[valid, 0].min(), bounds[valid, 1].min(), bounds[valid, 2].max(), bounds[valid, 3].max())
+    else:
+        extent = (0.0, 0.0, 1.0, 1.0)
+    n = max(1, math.ceil(math.sqrt(valid.sum() / CELLS_PER_BUCKET)))
+    size = (max(extent[2] - extent[0], 1e-9) / n, max(extent[3] - extent[1], 1e-9) / n)
+
+    buckets = {}
+    for cell in np.flatnonzero(valid):
+        gx0, gy0, gx1, gy1 = _grid_range(bounds[cell], extent, size, n)
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                buckets.setdefault((gx, gy), []).append(cell)
+
+    return {
+        "cells": cells,
+        "bounds": bounds,
+        "row_order": row_order,
+        "cell_start": cell_start,
+        "extent": extent,
+        "size": size,
+        "n": n,
+        "buckets": {k: np.asarray(v) for k, v in buckets.items()},
+    }
+
+
+def _grid_range(bbox, extent, size, n):
+    """Inclusive grid bucket range covered by bbox, clamped to the grid."""
+    gx0 = int(np.clip((bbox[0] - extent[0]) // size[0], 0, n - 1))
+    gy0 = int(np.clip((bbox[1] - extent[1]) // size[1], 0, n - 1))
+    gx1 = int(np.clip((bbox[2] - extent[0]) // size[0], 0, n - 1))
+    gy1 = int(np.clip((bbox[3] - extent[1]) // size[1], 0, n - 1))
+    return gx0, gy0, gx1, gy1
+
+
+def get_spatial_index():
+    """Spatial index for the current data version."""
+    version = data_version()
+    hit = _INDEX.get("version") == version
+    cache_lookup("spatial_index", hit)
+    if not hit:
+        with _INDEX_LOCK:
+            if _INDEX.get("version") != version:
+                with span("spatial_index_build"):
+                    _INDEX["index"] = build_spatial_index(get_features())
+                _INDEX["version"] = version
+    return _INDEX["index"]
+
+
+def _candidates(index, bbox):
+    extent = index["extent"]
+    if bbox[2] < extent[0] or bbox[0] > extent[2] or bbox[3] < extent[1] or bbox[1] > extent[3]:
+        return np.empty(0, dtype=np.int64)
+    gx0, gy0, gx1, gy1 = _grid_range(bbox, extent, index["size"], index["n"])
+    found = [index["buckets"][(gx, gy)]
+             for gx in range(gx0, gx1 + 1) for gy in range(gy0, gy1 + 1)
+             if (gx, gy) in index["buckets"]]
+    return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+
+def cells_in_bbox(index, bbox):
+    """Cells whose bounding box intersects bbox = (min_lon, min_lat, max_lon, max_lat)."""
+    candidates = _candidates(index, bbox)
+    b = index["bounds"][candidates]
+    hit = (b[:, 0] <= bbox[2]) & (b[:, 2] >= bbox[0]) & (b[:, 1] <= bbox[3]) & (b[:, 3] >= bbox[1])
+    return candidates[hit]
+
+
+def cells_in_polygon(index, polygon):
+    """Cells whose centre lies inside polygon, a (k, 2) array of lon/lat vertices."""
+    polygon = np.asarray(polygon, dtype=np.float64)
+    bbox = (polygon[:, 0].min(), polygon[:, 1].min(), polygon[:, 0].max(), polygon[:, 1].max())
+    candidates = cells_in_bbox(index, bbox)
+    x = index["cells"]["lon"].to_numpy()[candidates][:, None]
+    y = index["cells"]["lat"].to_numpy()[candidates][:, None]
+
+    # Even-odd ray casting against every edge at once
+    x1, y1 = polygon[:, 0][None, :], polygon[:, 1][None, :]
+    x2, y2 = np.roll(polygon[:, 0], -1)[None, :], np.roll(polygon[:, 1], -1)[None, :]
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at_y = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    inside = (crosses & (x < x_at_y)).sum(axis=1) % 2 == 1
+    return candidates[inside]
+
+
+def rows_for_cells(index, cells):
+    """Row positions of the feature frame for the given cells."""
+    starts, ends = index["cell_start"][cells], index["cell_start"][cells + 1]
+    return np.concatenate([index["row_order"][a:b] for a, b in zip(starts, ends)] or [np.empty(0, np.int64)])
+
+
+def parse_bbox(value):
+    bbox = [float(v) for v in value.split(",")]
+    if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    return bbox
+
+
+def parse_polygon(value):
+    """A GeoJSON Polygon (outer ring) or 'lon lat,lon lat,...'."""
+    if value.lstrip().startswith("{"):
+        ring = json.loads(value)["coordinates"][0]
+    else:
+        ring = [[float(v) for v in point.split()] for point in value.split(",")]
+    ring = np.asarray(ring, dtype=np.float64)
+    if ring.ndim != 2 or ring.shape[1] != 2 or len(ring) < 3:
+        raise ValueError("polygon needs at least three lon/lat vertices")
+    return ring
@@ -0,0 +1,65 @@
+import os
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def repo_dir(monkeypatch):
+    """Run from the repository root, where the modules look for their data files."""
+    monkeypatch.chdir(ROOT)
+    return ROOT
+
+
+def make_scenes(forests=("chyulu", "kibwezi", "kivale"), start="2020-01-01", periods=120, freq="6D", seed=0):
+    """Raw (forest, date, VV, VH) scenes with RFDI spread around the 0.61 alert threshold."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=periods, freq=freq).strftime("%Y-%m-%d")
+    frames = []
+    for forest in forests:
+        vv = rng.normal(-8.0, 0.6, periods)
+        frames.append(pd.DataFrame({
+            "forest": forest,
+            "date": dates,
+            "VV": vv,
+            "VH": vv - rng.normal(6.3, 0.8, periods),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_features(scenes=None):
+    import features
+
+    scenes = make_scenes() if scenes is None else scenes
+    return features.prepare_scenes(features.clean_scenes(features.add_geometry(scenes.copy())))
+
+
+@pytest.fixture
+def use_features(monkeypatch):
+    """Serve the given frame from features.get_features, under a fresh data version so no cache carries over."""
+    import features
+
+    def install(df):
+        monkeypatch.setattr(features, "_STATE", {"df": df, "version": uuid.uuid4().hex[:12]})
+        return df
+
+    return install
+
+
+@pytest.fixture
+def client():
+    """Test client for the data blueprints, without the research blueprint's agent dependencies."""
+    from flask import Flask
+    from analysis import ndvi_bp
+    from dashboard import dashboard_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_bp, url_prefix="/dashboard")
+    app.register_blueprint(ndvi_bp, url_prefix="/ndvi")
+    return app.test_client()
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import alert_index
+import rasters
+from conftest import make_features
+
+THRESHOLDS = [None, 0.55, 0.6, 0.61, 0.62, 0.65]
+
+
+def brute_force_counts(df, threshold):
+    flags = pd.Series(features.flag_alerts(df, threshold), index=df.index)
+    return flags.groupby([df["forest"].astype(str), df["year"], df["month"]]).sum()
+
+
+def index_counts(threshold):
+    groups = alert_index.group_alert_counts(threshold)
+    return groups.set_index([groups["forest"].astype(str), "year", "month"])["alert"]
+
+
+def pixel_zonal(df, rows, score):
+    """Zonal statistics for the scenes at rows, all with the given pixel alert score."""
+    scenes = df.iloc[rows]
+    return pd.DataFrame({
+        "forest": scenes["forest"].astype(str).to_numpy(),
+        "date": scenes["date"].dt.strftime("%Y-%m-%d").to_numpy(),
+        "pixels": 100,
+        "VV": scenes["VV"].to_numpy(),
+        "VH": scenes["VH"].to_numpy(),
+        "pixel_RFDI": scenes["RFDI"].to_numpy(),
+        "pixel_RVI": scenes["RVI"].to_numpy(),
+        "alert_fraction": 0.5,
+        features.ALERT_SCORE: score,
+    })
+
+
+def test_default_alert_flag_is_rfdi_above_threshold():
+    df = make_features()
+    assert (df["alert"].to_numpy() == (df["RFDI"].to_numpy() > np.float32(features.ALERT_THRESHOLD))).all()
+    assert (features.flag_alerts(df) == df["alert"].to_numpy()).all()
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_alert_index_matches_flag_alerts(use_features, threshold):
+    df = use_features(make_features())
+    counts = brute_force_counts(df, threshold)
+    assert index_counts(threshold).reindex(counts.index).tolist() == counts.tolist()
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+def test_pixel_alerts_drive_every_alert_count(use_features, threshold):
+    df = make_features()
+    calm = np.flatnonzero(df["RFDI"].to_numpy() < 0.5)[:5]
+    hot = np.flatnonzero(df["RFDI"].to_numpy() > 0.7)[:5]
+    zonal = pd.concat([pixel_zonal(df, calm, 0.9), pixel_zonal(df, hot, 0.2)], ignore_index=True)
+    df = use_features(features.apply_pixel_alerts(df, zonal))
+
+    # Pixel scores override the mean-backscatter RFDI, at the default and any other threshold
+    flags = features.flag_alerts(df, threshold)
+    assert flags[calm].all() and not flags[hot].any()
+    assert (df["alert"].to_numpy() == features.flag_alerts(df)).all()
+    counts = brute_force_counts(df, threshold)
+    assert index_counts(threshold).reindex(counts.index).tolist() == counts.tolist()
+
+
+def test_scenes_without_rasters_keep_nan_pixel_columns():
+    df = make_features()
+    df = features.apply_pixel_alerts(df, pixel_zonal(df, [0], 0.9))
+    assert np.isnan(df["alert_fraction"].to_numpy()[1:]).all()
+    assert (df[features.ALERT_SCORE].to_numpy()[1:] == df["RFDI"].to_numpy()[1:]).all()
+
+
+def test_alert_score_agrees_with_pixel_fraction_at_any_threshold():
+    rng = np.random.default_rng(1)
+    rfdi = np.clip(rng.normal(0.55, 0.08, 50_000), -1, 1)
+    histogram = np.histogram(rfdi, bins=rasters.RFDI_BINS, range=(-1, 1))[0]
+    score = rasters.alert_score(histogram, fraction=0.1)
+    for t in np.round(np.arange(0.4, 0.8, 0.01), 3):
+        assert (score > t) == ((rfdi > t).mean() >= 0.1), t
+
+
+def test_zonal_stats_writes_alert_score(tmp_path):
+    forest = tmp_path / "chyulu"
+    forest.mkdir()
+    vv = np.full((40, 30), -8.0)
+    vh = np.full((40, 30), -14.0)
+    vh[:8] = -20.0  # RFDI 0.881 on 20% of the pixels, 0.599 elsewhere
+    np.save(forest / "2020-01-07_VV.npy", vv)
+    np.save(forest / "2020-01-07_VH.npy", vh)
+
+    stats = rasters.zonal_stats(rasters.find_scenes(str(tmp_path)), tile_size=16, workers=1)
+    row = stats.iloc[0]
+    assert row["pixels"] == 1200
+    assert row["alert_fraction"] == pytest.approx(0.2)
+    assert row[features.ALERT_SCORE] == pytest.approx(0.881, abs=0.001)
+
+
+@pytest.mark.parametrize("query", ["", "&threshold=0.63", "&year=2020&month=6"])
+def test_endpoints_agree_on_pixel_alerts(use_features, client, query):
+    df = make_features()
+    calm = np.flatnonzero((df["RFDI"].to_numpy() < 0.55) & (df["forest"] == "chyulu").to_numpy())[:5]
+    df = use_features(features.apply_pixel_alerts(df, pixel_zonal(df, calm, 0.9)))
+
+    health = client.get(f"/dashboard/forest-health?forests=chyulu{query}").get_json()
+    summary = client.get(f"/dashboard/summary?forests=chyulu{query}").get_json()
+    filtered = client.get(f"/dashboard/filtered-data?forests=chyulu{query}").get_json()
+    assert summary["health"] == health
+    assert summary["alert_count"] == filtered["alert_count"] == health["alert_count"]
+
+
+def test_spatial_rows_are_valid_json_with_pixel_stats(use_features, client):
+    df = make_features()
+    use_features(features.apply_pixel_alerts(df, pixel_zonal(df, [0, 1], 0.9)))
+    response = client.get("/ndvi/api/s1/spatial?bbox=37,-3,38.5,-1&forests=chyulu")
+    assert response.status_code == 200
+    assert b"NaN" not in response.get_data()
+    rows = response.get_json()["data"]
+    assert rows and "alert_fraction" not in rows[0]
+
+
+@pytest.mark.parametrize("query", ["", "&year=2020", "&date_from=2020-03-01&date_to=2021-06-30"])
+def test_summary_counts_alerts_from_the_alert_score(use_features, client, query):
+    df = make_features()
+    # A stored alert column that disagrees with the score must not leak into any count
+    df["alert"] = np.int8(0)
+    use_features(df)
+
+    health = client.get(f"/dashboard/forest-health?forests=chyulu,kivale{query}").get_json()
+    summary = client.get(f"/dashboard/summary?forests=chyulu,kivale{query}").get_json()
+    filtered = client.get(f"/dashboard/filtered-data?forests=chyulu,kivale{query}").get_json()
+    assert health["alert_count"] > 0
+    assert filtered["alert_count"] == health["alert_count"]
+    assert summary["health"] == health
+    assert summary["alert_count"] == health["alert_count"]
+    assert sum(row["alert"] for row in summary["trend"]) == health["alert_count"]
+
+
+@pytest.mark.parametrize("query", ["year=abc", "month=june", "threshold=high"])
+def test_spatial_rejects_bad_filters(use_features, client, query):
+    use_features(make_features())
+    response = client.get(f"/ndvi/api/s1/spatial?bbox=37,-3,38.5,-1&{query}")
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Invalid spatial filter")
+
+
+@pytest.mark.parametrize("query", [
+    "&date_from=2020-01-01&date_to=2020-12-31",
+    "&year=2019&date_from=2020-01-01&date_to=2020-12-31",  # the range wins over year/month
+    "&year=2020&date_from=2020-06-01",  # year still bounds an open range
+])
+def test_summary_and_forest_health_agree_on_range_queries(use_features, client, query):
+    use_features(make_features())
+    health = client.get(f"/dashboard/forest-health?forests=chyulu{query}").get_json()
+    summary = client.get(f"/dashboard/summary?forests=chyulu{query}").get_json()
+    filtered = client.get(f"/dashboard/filtered-data?forests=chyulu{query}").get_json()
+    assert health["alert_count"] > 0
+    assert summary["health"] == health
+    assert summary["alert_count"] == filtered["alert_count"] == health["alert_count"]
+    assert summary["total_records"] == filtered["total_records"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import correlations
+import range_index
+from conftest import make_features, make_scenes
+
+
+@pytest.fixture
+def frame(use_features):
+    # Eight years of scenes so every lag has enough overlapping years
+    return use_features(make_features(make_scenes(start="2014-01-01", periods=150, freq="20D")))
+
+
+def test_r_and_n_match_scipy_on_pairwise_complete_years():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2, 3, 12))
+    y = x[0, :2] * 0.5 + rng.normal(size=(2, 12))
+    x[0, 1, [2, 7]] = np.nan
+    y[1, [0, 5, 11]] = np.nan
+
+    r, n = correlations.lagged_correlations(x, y, max_lag=3)
+    assert r.shape == n.shape == (2, 3, 4, 2)
+    p = correlations.p_values(r, n)
+
+    for v, f, lag, t in np.ndindex(r.shape):
+        xs, ys = x[v, f, :12 - lag], y[t, lag:]
+        keep = ~np.isnan(xs) & ~np.isnan(ys)
+        expected = stats.pearsonr(xs[keep], ys[keep])
+        assert n[v, f, lag, t] == keep.sum()
+        assert r[v, f, lag, t] == pytest.approx(expected.statistic, rel=1e-9)
+        assert p[v, f, lag, t] == pytest.approx(expected.pvalue, rel=1e-6)
+
+
+def test_constant_series_and_short_overlaps_have_no_p_value():
+    x = np.array([[1.0, 1.0, 1.0, 1.0], [1.0, 2.0, np.nan, np.nan]])
+    y = np.array([[1.0, 2.0, 3.0, 4.0]])
+    r, n = correlations.lagged_correlations(x, y, max_lag=0)
+    p = correlations.p_values(r, n)
+    assert np.isnan(r[0, 0, 0]) and n[0, 0, 0] == 4
+    assert n[1, 0, 0] == 2 and np.isnan(p[1, 0, 0])
+
+
+def test_table_matches_yearly_series(frame):
+    index = range_index.get_range_index()
+    years = np.arange(2014, 2023)
+    drivers = pd.DataFrame({("loss_area_ha", "all"): np.linspace(10, 50, len(years)) ** 1.3}, index=years)
+    gdp = pd.Series(np.random.default_rng(1).normal(100, 10, len(years)), index=years)
+    table = correlations.compute_correlations(index, drivers, gdp, max_lag=2)
+
+    assert len(table) == 3 * len(correlations.VARIABLES) * 3 * 2
+    scenes = frame[frame["forest"] == "kibwezi"]
+    yearly_rfdi = scenes.groupby("year")["RFDI"].mean().reindex(years)
+
+    row = table[(table["forest"] == "kibwezi") & (table["variable"] == "RFDI")
+                & (table["target"] == "gdp") & (table["lag"] == 1)].iloc[0]
+    xs, ys = yearly_rfdi.to_numpy()[:-1], gdp.to_numpy()[1:]
+    keep = ~np.isnan(xs)
+    expected = stats.pearsonr(xs[keep], ys[keep])
+    assert row["n"] == keep.sum()
+    assert row["r"] == pytest.approx(expected.statistic, rel=1e-5)
+    assert row["p_value"] == pytest.approx(expected.pvalue, rel=1e-4)
+
+
+def test_filter_drops_short_series(frame):
+    index = range_index.get_range_index()
+    years = np.arange(2014, 2023)
+    drivers = pd.DataFrame({("loss_area_ha", "all"): np.arange(len(years), dtype=float)}, index=years)
+    table = correlations.compute_correlations(index, drivers, max_lag=3)
+
+    kept = correlations.filter_correlations(table, forests=["chyulu"], variable="EPI", min_years=7)
+    assert set(kept["lag"]) == {0, 1, 2}
+    assert (kept["n"] >= 7).all() and set(kept["forest"]) == {"chyulu"}
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+from conftest import make_features, make_scenes
+
+
+@pytest.fixture
+def frame(use_features):
+    # Different start dates and cadences, so the shared grid falls between scenes
+    scenes = pd.concat([
+        make_scenes(forests=("chyulu",), periods=60, freq="5D", seed=1),
+        make_scenes(forests=("kibwezi",), start="2020-02-14", periods=25, freq="11D", seed=2),
+        make_scenes(forests=("kivale",), start="2020-01-03", periods=12, freq="17D", seed=3),
+    ], ignore_index=True)
+    return use_features(make_features(scenes))
+
+
+def scene_days(df):
+    return (df["date"] - pd.Timestamp("1970-01-01")).dt.days.to_numpy()
+
+
+@pytest.mark.parametrize("cadence", [1, 7, 12, 30])
+def test_values_are_interpolated_by_elapsed_days(frame, cadence):
+    result = cube.build_cube(frame, cadence)
+    days = scene_days(frame)
+    assert result["days"][0] == days.min() and result["days"][-1] <= days.max()
+    assert (np.diff(result["days"]) == cadence).all()
+    assert result["values"].dtype == np.float32 and result["values"].flags["C_CONTIGUOUS"]
+
+    for f, forest in enumerate(result["forests"]):
+        rows = frame[frame["forest"] == forest]
+        obs = scene_days(rows)
+        for b, band in enumerate(cube.BANDS):
+            expected = np.interp(result["days"], obs, rows[band].to_numpy(dtype=np.float64))
+            assert result["values"][f, :, b] == pytest.approx(expected, rel=1e-5)
+
+        nearest = np.abs(result["days"][:, None] - obs[None, :]).min(axis=1)
+        assert result["gap_days"][f].tolist() == nearest.tolist()
+
+
+def test_same_day_scenes_are_averaged(frame):
+    kivale = frame[frame["forest"] == "kivale"]
+    doubled = pd.concat([frame, kivale.assign(RFDI=kivale["RFDI"] + 0.2)], ignore_index=True)
+    days, values = cube.scene_means(doubled)
+    assert len(days) == len(frame)
+
+    result = cube.build_cube(doubled, 17)
+    k = list(result["forests"]).index("kivale")
+    on_scene = np.isin(result["days"], scene_days(kivale))
+    original = cube.build_cube(frame, 17)["values"][k, on_scene, cube.BANDS.index("RFDI")]
+    assert result["values"][k, on_scene, cube.BANDS.index("RFDI")] == pytest.approx(original + 0.1, rel=1e-5)
+
+
+def test_forests_without_scenes_are_empty(frame):
+    df = frame.assign(forest=frame["forest"].cat.add_categories(["makuli"]))
+    result = cube.build_cube(df, 12)
+    m = list(result["forests"]).index("makuli")
+    assert np.isnan(result["values"][m]).all()
+    assert (result["gap_days"][m] == np.iinfo(np.int32).max).all()
+    assert not np.isnan(np.delete(result["values"], m, axis=0)).any()
+
+
+def test_select_slices_forests_bands_and_dates(frame):
+    full = cube.build_cube(frame, 12)
+    start, end = full["days"][3], full["days"][9]
+    sub = cube.select(full, ["kivale", "chyulu"], ["RFDI", "VV"], start, end)
+
+    assert list(sub["forests"]) == ["kivale", "chyulu"]
+    assert sub["days"].tolist() == full["days"][3:9].tolist()
+    assert sub["values"].shape == (2, 6, 2)
+    np.testing.assert_array_equal(sub["values"][1, :, 0], full["values"][0, 3:9, cube.BANDS.index("RFDI")])
+
+    with pytest.raises(ValueError):
+        cube.select(full, ["nowhere"])
+    with pytest.raises(ValueError):
+        cube.select(full, bands=["NDVI"])
+
+
+def test_endpoint_nulls_dates_far_from_scenes(client, frame):
+    body = client.get("/ndvi/api/s1/cube?cadence=7&forests=kivale&max_gap_days=3&compare=1").get_json()
+    gaps = np.array(body["gap_days"][0])
+    rfdi = body["bands"]["RFDI"][0]
+    assert [value is None for value in rfdi] == (gaps > 3).tolist()
+    assert [value is None for value in body["cross_forest_z"]["RFDI"][0]] == (gaps > 3).tolist()
+    assert body["cadence_days"] == 7 and len(body["dates"]) == len(rfdi)
+
+
+@pytest.mark.parametrize("query", ["cadence=0", "cadence=400", "bands=NDVI", "forests=nowhere"])
+def test_endpoint_rejects_bad_parameters(client, frame, query):
+    assert client.get("/ndvi/api/s1/cube?" + query).status_code == 400
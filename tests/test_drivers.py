@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from flask import Flask
+
+import drivers
+
+
+@pytest.fixture
+def table():
+    rows = [
+        {"drivers_type": driver, "loss_year": year, "loss_area_ha": area * (year - 2000),
+         "gross_carbon_emissions_Mg": area * 10}
+        for driver, area in [("Logging", 3.0), ("Permanent agriculture", 5.0)]
+        for year in range(2001, 2011)
+        if not (driver == "Logging" and year == 2004)  # a year without loss for one driver
+    ]
+    return pd.DataFrame(rows), drivers.build_drivers_table(pd.DataFrame(rows))
+
+
+@pytest.fixture
+def drivers_client(repo_dir):
+    app = Flask(__name__)
+    app.register_blueprint(drivers.drivers_bp, url_prefix="/drivers")
+    return app.test_client()
+
+
+@pytest.mark.parametrize("year_from, year_to", [(None, None), (2001, 2001), (2003, 2006), (2004, 2004), (1990, 2030)])
+def test_totals_match_brute_force(table, year_from, year_to):
+    raw, built = table
+    rows = raw
+    if year_from is not None:
+        rows = rows[(rows["loss_year"] >= year_from) & (rows["loss_year"] <= year_to)]
+    expected = rows.groupby("drivers_type")["loss_area_ha"].sum()
+
+    result = drivers.totals_by_driver(built, year_from, year_to).set_index("driver")
+    assert result["loss_area_ha"].reindex(expected.index).tolist() == pytest.approx(expected.tolist())
+    assert result["area_share"].sum() == pytest.approx(1.0)
+
+
+def test_reversed_range_is_rejected(table):
+    with pytest.raises(ValueError):
+        drivers.totals_by_driver(table[1], 2008, 2003)
+
+
+@pytest.mark.parametrize("path", [
+    "/drivers/summary?year_from=2020&year_to=2010",
+    "/drivers/yearly?year_from=2020&year_to=2010",
+    "/drivers/summary?year_from=abc",
+])
+def test_endpoints_reject_bad_year_ranges(drivers_client, path):
+    response = drivers_client.get(path)
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Invalid year parameter")
+
+
+def test_summary_totals_are_never_negative(drivers_client):
+    response = drivers_client.get("/drivers/summary?year_from=2010&year_to=2015")
+    assert response.status_code == 200
+    assert all(row["loss_area_ha"] >= 0 for row in response.get_json())
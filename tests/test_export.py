@@ -0,0 +1,89 @@
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import export
+import range_index
+from conftest import make_features
+
+
+@pytest.fixture
+def export_client(use_features):
+    from flask import Flask
+
+    use_features(make_features())
+    app = Flask(__name__)
+    app.register_blueprint(export.export_bp, url_prefix="/export")
+    return app.test_client()
+
+
+def read(response):
+    assert response.status_code == 200
+    if response.mimetype == export.FORMATS["parquet"][0]:
+        return pq.read_table(BytesIO(response.data))
+    return pa.ipc.open_stream(response.data).read_all()
+
+
+def test_features_round_trip_through_arrow(export_client):
+    response = export_client.get("/export/features")
+    assert response.headers["Content-Disposition"].endswith("features.arrows")
+    table = read(response)
+
+    expected = export.features_table({}, None)
+    assert table.column_names == list(expected.columns)
+    pd.testing.assert_frame_equal(table.to_pandas(), expected.reset_index(drop=True))
+
+
+def test_parquet_export_projects_columns_in_request_order(export_client):
+    response = export_client.get("/export/features?format=parquet&columns=RFDI,forest,date&forest=kibwezi&year=2020")
+    assert response.headers["Content-Disposition"].endswith("features.parquet")
+    table = read(response)
+
+    assert table.column_names == ["RFDI", "forest", "date"]
+    expected = export.features_table({}, None)
+    expected = expected[(expected["forest"] == "kibwezi") & (expected["year"] == 2020)]
+    assert table.num_rows == len(expected)
+    assert table.column("RFDI").to_numpy().tolist() == expected["RFDI"].tolist()
+    assert set(table.column("forest").to_pylist()) == {"kibwezi"}
+
+
+def test_month_without_year_filters_every_year(export_client):
+    table = read(export_client.get("/export/features?month=3&columns=month,year"))
+    assert set(table.column("month").to_pylist()) == {3}
+    assert set(table.column("year").to_pylist()) == {2020, 2021}
+
+
+def test_threshold_reflags_alerts(export_client):
+    low = read(export_client.get("/export/features?columns=alert&threshold=0.0"))
+    high = read(export_client.get("/export/features?columns=alert&threshold=1.0"))
+    assert set(low.column("alert").to_pylist()) == {1}
+    assert set(high.column("alert").to_pylist()) == {0}
+
+
+def test_aggregates_match_the_range_index(export_client):
+    table = read(export_client.get("/export/aggregates?resolution=quarterly&date_from=2020-01-01&date_to=2020-12-31"))
+    start_day, end_day = range_index.parse_range({"date_from": "2020-01-01", "date_to": "2020-12-31"})
+    expected = range_index.aggregate(range_index.get_range_index(), None, start_day, end_day,
+                                     "quarterly", per_forest=True)
+    pd.testing.assert_frame_equal(table.to_pandas(), expected.reset_index(drop=True))
+
+
+def test_epi_export_has_the_epi_columns(export_client):
+    table = read(export_client.get("/export/epi?format=parquet&forests=chyulu,kivale"))
+    assert table.column_names == export.EPI_COLUMNS
+    assert set(table.column("forest").to_pylist()) == {"chyulu", "kivale"}
+
+
+@pytest.mark.parametrize("url, status", [
+    ("/export/scenes", 404),
+    ("/export/features?format=csv", 400),
+    ("/export/features?columns=RFDI,nope", 400),
+    ("/export/features?date_from=2021-01-01&date_to=2020-01-01", 400),
+])
+def test_bad_requests_are_rejected(export_client, url, status):
+    response = export_client.get(url)
+    assert response.status_code == status
+    assert "error" in response.get_json()
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+import forecast
+from conftest import make_features, make_scenes
+
+FORESTS = ("chyulu", "kibwezi")
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.fixture
+def models(monkeypatch, use_features):
+    """Forecast state of a fresh process, with a thread pool and a quick stand-in for the SARIMAX fit."""
+    pools = {"pool": ThreadPoolExecutor(max_workers=2)}
+    monkeypatch.setattr(forecast, "_POOL", pools)
+    monkeypatch.setattr(forecast, "_MODELS", {})
+    fits = []
+    gate = threading.Event()
+    gate.set()
+
+    def quick_fit(values, start):
+        gate.wait(10)
+        fits.append(start)
+        return np.array([0.1, 0.1, 0.1, 1.0]), 1.0, True
+
+    monkeypatch.setattr(forecast, "fit_params", quick_fit)
+    use_features(make_features(make_scenes(forests=FORESTS, periods=250)))
+    yield pools, fits, gate
+    gate.set()
+    for pool in pools.values():
+        pool.shutdown(wait=True)
+
+
+def test_broken_pool_is_replaced_and_reported_as_json(models, client):
+    pools, fits, _ = models
+    pools["pool"] = BrokenPool()
+
+    response = client.get("/ndvi/api/s1/forecast?forests=chyulu")
+    assert response.status_code == 503
+    assert "retry" in response.get_json()["error"]
+    assert "pool" not in pools
+
+    pools["pool"] = ThreadPoolExecutor(max_workers=2)
+    response = client.get("/ndvi/api/s1/forecast?forests=chyulu")
+    assert response.status_code == 200
+    assert response.get_json()["refitting"] is False
+    assert len(fits) == 2 * len(FORESTS)
+
+
+def test_previous_models_are_served_while_new_data_is_fitted(models, client, use_features):
+    pools, fits, gate = models
+    first = client.get("/ndvi/api/s1/forecast?forests=chyulu&horizon=3").get_json()
+    assert first["refitting"] is False and len(first["forecasts"]) == 2 * 3
+
+    # New kibwezi scenes; its refit blocks until the gate opens
+    gate.clear()
+    scenes = make_scenes(forests=FORESTS, periods=250)
+    extra = make_scenes(forests=("kibwezi",), start="2024-02-01", periods=10, seed=3)
+    use_features(make_features(scenes._append(extra, ignore_index=True)))
+
+    for _ in range(2):
+        response = client.get("/ndvi/api/s1/forecast?forests=chyulu&horizon=3")
+        assert response.status_code == 200
+        assert response.get_json()["refitting"] is True
+        assert response.get_json()["forecasts"] == first["forecasts"]
+
+    gate.set()
+    forecast._MODELS["fitting"][1].result(10)
+    latest = client.get("/ndvi/api/s1/forecast?horizon=3").get_json()
+    assert latest["refitting"] is False
+    # Both kibwezi series changed; chyulu RFDI did not and kept its fit (EPI is normalized over all forests)
+    refitted = {(m["forest"], m["variable"]) for m in latest["models"] if m["fitted_on"] != first["models"][0]["fitted_on"]}
+    assert {("kibwezi", "RFDI"), ("kibwezi", "EPI")} <= refitted
+    assert ("chyulu", "RFDI") not in refitted
+    assert len(fits) == 2 * len(FORESTS) + len(refitted)
@@ -0,0 +1,109 @@
+import json
+import datetime
+
+import pytest
+
+import incidents
+
+
+def report(report_id, forest="Chyulu", text="charcoal kiln near the road", day="2024-03-05"):
+    return {"id": report_id, "forest": forest, "report": text, "timestamp": f"{day}T10:00:00"}
+
+
+def write(path, reports):
+    with open(path, "w") as f:
+        json.dump(reports, f)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = tmp_path / "reports.json"
+    write(path, [])
+    monkeypatch.setattr(incidents, "STORAGE_FILE", str(path))
+    monkeypatch.setattr(incidents, "_STATE", {"days": {}, "seen": set(), "stat": None})
+    return path
+
+
+def test_categorize_matches_word_prefixes():
+    assert incidents.categorize("Chainsaw heard, trees FELLED near a fire") == ["logging", "fire"]
+    assert incidents.categorize("nothing to report") == []
+
+
+def test_counts_reports_per_forest(store):
+    write(store, [report("a"), report("b", forest="Kibwezi"), report("c")])
+    assert incidents.forest_counts() == {"Chyulu": 2, "Kibwezi": 1}
+
+
+@pytest.fixture
+def saves(store, monkeypatch):
+    """whistle.save_report on the test store; returns the hit flags of incident cache lookups."""
+    import whistle
+
+    monkeypatch.setattr(whistle, "STORAGE_FILE", str(store))
+    lookups = []
+    monkeypatch.setattr(incidents, "cache_lookup", lambda name, hit: lookups.append(hit))
+    return whistle.save_report, lookups
+
+
+def test_own_submissions_do_not_trigger_a_rescan(saves, store):
+    save_report, lookups = saves
+    write(store, [report("a")])
+    assert incidents.forest_counts() == {"Chyulu": 1}
+
+    save_report(report("b", forest="Kibwezi"))
+    save_report(report("c"))
+    del lookups[:]
+    assert incidents.forest_counts() == {"Chyulu": 2, "Kibwezi": 1}
+    assert lookups == [True]
+
+
+def test_reports_from_other_writers_are_folded_in_on_save(saves, store):
+    save_report, lookups = saves
+    write(store, [report("a")])
+    incidents.forest_counts()
+
+    # Another worker appends a report, then this worker saves its own
+    write(store, [report("a"), report("other", forest="Kibwezi")])
+    save_report(report("ours"))
+    del lookups[:]
+    assert incidents.forest_counts() == {"Chyulu": 2, "Kibwezi": 1}
+    assert lookups == [True]
+
+
+def test_writes_after_ours_are_still_picked_up(saves, store):
+    save_report, lookups = saves
+    write(store, [report("a")])
+    incidents.forest_counts()
+    save_report(report("ours"))
+
+    with open(store) as f:
+        reports = json.load(f)
+    write(store, reports + [report("later", forest="Kibwezi")])
+    assert incidents.forest_counts() == {"Chyulu": 2, "Kibwezi": 1}
+
+
+def test_first_save_is_counted_by_the_first_sync(saves, store):
+    save_report, _ = saves
+    save_report(report("a"))
+    assert incidents.forest_counts() == {"Chyulu": 1}
+
+
+def test_incident_series_buckets_by_period(store):
+    write(store, [
+        report("a", day="2024-03-04"),                    # Monday
+        report("b", day="2024-03-10", text="fire"),       # Sunday, same week
+        report("c", day="2024-03-11"),
+        report("d", forest="Kibwezi", day="2024-03-04"),
+    ])
+    weekly = incidents.incident_series(["CHYULU"], "weekly")
+    assert weekly[["period", "reports", "charcoal", "fire"]].values.tolist() == [
+        ["2024-03-04", 2, 1, 1],
+        ["2024-03-11", 1, 1, 0],
+    ]
+    monthly = incidents.incident_series(None, "monthly", date_from=datetime.date(2024, 3, 5))
+    assert dict(zip(monthly["forest"], monthly["reports"])) == {"chyulu": 2}
+
+
+def test_incident_series_rejects_unknown_resolution(store):
+    with pytest.raises(ValueError):
+        incidents.incident_series(resolution="hourly")
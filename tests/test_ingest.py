@@ -0,0 +1,97 @@
+import uuid
+
+import jwt
+import pytest
+from flask import Flask
+
+import admin
+import anomalies
+import features
+from conftest import make_features, make_scenes
+
+
+@pytest.fixture
+def ingest(tmp_path, monkeypatch, use_features):
+    monkeypatch.setattr(features, "INGEST_FILE", str(tmp_path / "ingested.csv"))
+    monkeypatch.setattr(features, "_INGEST", {"offset": 0})
+    monkeypatch.setattr(anomalies, "_CACHE", {})
+    df = use_features(make_features(make_scenes(periods=100)))
+
+    app = Flask(__name__)
+    app.register_blueprint(admin.admin_bp, url_prefix="/admin")
+    token = jwt.encode({"username": "root", "role": "admin"}, admin.SECRET_KEY, algorithm="HS256")
+    return app.test_client(), {"Authorization": f"Bearer {token}"}, df
+
+
+def new_scenes(forest="chyulu", periods=3):
+    scenes = make_scenes(forests=(forest,), start="2021-09-01", periods=periods, seed=5)
+    return scenes.to_dict(orient="records")
+
+
+def test_ingested_scenes_refresh_anomalies_of_their_forest_only(ingest, monkeypatch):
+    client, headers, df = ingest
+    before = anomalies.get_anomalies()
+    version = features.data_version()
+
+    recomputed = []
+    detect = anomalies.detect_anomalies
+
+    def spy(frame):
+        recomputed.append(sorted(frame["forest"].astype(str).unique()))
+        return detect(frame)
+
+    monkeypatch.setattr(anomalies, "detect_anomalies", spy)
+    response = client.post("/admin/scenes", json={"scenes": new_scenes()}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["added"] == 3
+    assert response.get_json()["data_version"] != version
+
+    after = anomalies.get_anomalies()
+    assert recomputed == [["chyulu"]]
+    assert len(after) == len(before) + 3
+    assert after[after["forest"] == "chyulu"]["date"].max() == features.pd.Timestamp("2021-09-13")
+
+
+def test_other_workers_replay_ingested_scenes(ingest, monkeypatch):
+    client, headers, df = ingest
+    client.post("/admin/scenes", json={"scenes": new_scenes("kivale", 2)}, headers=headers)
+    client.post("/admin/scenes", json={"scenes": new_scenes("kivale", 2)}, headers=headers)  # repeats are ignored
+
+    # A second worker still holds the snapshot frame and has read nothing yet
+    monkeypatch.setattr(features, "_STATE", {"df": df, "version": uuid.uuid4().hex[:12]})
+    monkeypatch.setattr(features, "_INGEST", {"offset": 0})
+    version = features._STATE["version"]
+    assert features.data_version() != version
+    assert len(features.get_features()) == len(df) + 2
+
+
+def test_partial_rows_wait_for_the_writer(ingest):
+    _, _, df = ingest
+    with open(features.INGEST_FILE, "w") as f:
+        f.write("kibwezi,2021-08-01,-8.0,-14.0\nkibwezi,2021-08-07,-8.")
+    assert features.sync_ingested() == 1
+    with open(features.INGEST_FILE, "a") as f:
+        f.write("1,-14.2\n")
+    assert features.sync_ingested() == 1
+    assert len(features.get_features()) == len(df) + 2
+
+
+@pytest.mark.parametrize("body", [
+    {"scenes": [{"forest": "chyulu", "date": "2021-08-01", "VV": -8.0}]},
+    {"scenes": [{"forest": "chyulu", "date": "yesterday", "VV": -8.0, "VH": -14.0}]},
+    {"scenes": [{"forest": "chyulu", "date": "2021-08-01", "VV": "loud", "VH": -14.0}]},
+    {"rows": []},
+])
+def test_bad_scenes_are_rejected(ingest, body):
+    client, headers, _ = ingest
+    response = client.post("/admin/scenes", json=body, headers=headers)
+    assert response.status_code == 400
+    assert not features.os.path.exists(features.INGEST_FILE)
+
+
+def test_only_admins_ingest(ingest):
+    client, _, _ = ingest
+    token = jwt.encode({"username": "r", "role": "researcher"}, admin.SECRET_KEY, algorithm="HS256")
+    response = client.post("/admin/scenes", json={"scenes": new_scenes()},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
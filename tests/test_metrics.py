@@ -0,0 +1,91 @@
+import re
+
+import pytest
+from flask import Flask
+
+import metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]+="(?:[^"\\]|\\.)*",?)*\})? (-?[0-9.e+-]+|\+Inf)$')
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    """Start every test with empty metric registries."""
+    monkeypatch.setattr(metrics, "_COUNTERS", {})
+    monkeypatch.setattr(metrics, "_GAUGES", {})
+    monkeypatch.setattr(metrics, "_HISTOGRAMS", {})
+
+
+def samples(text):
+    """{(name, labels): value} of every sample line; fails on lines that do not parse."""
+    parsed = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        parsed[(match.group(1), match.group(2) or "")] = float(match.group(3))
+    return parsed
+
+
+def test_each_metric_has_one_help_and_type_line():
+    metrics.inc("cache_requests_total", cache="cube", result="hit")
+    metrics.inc("cache_requests_total", cache="cube", result="miss", value=2)
+    metrics.gauge_add("http_requests_in_flight", 1, endpoint="a")
+    metrics.observe("stage_duration_seconds", 0.2, stage="groupby")
+    text = metrics.render_metrics()
+
+    for name, kind in [("cache_requests_total", "counter"), ("http_requests_in_flight", "gauge"),
+                       ("stage_duration_seconds", "histogram")]:
+        assert text.count(f"# TYPE {name} {kind}\n") == 1
+        assert text.count(f"# HELP {name} ") == 1
+    assert samples(text)[("cache_requests_total", '{cache="cube",result="miss"}')] == 2
+    assert text.endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative():
+    for value in (0.003, 0.04, 0.04, 3.0, 100.0):
+        metrics.observe("stage_duration_seconds", value, stage="fit")
+    parsed = samples(metrics.render_metrics())
+
+    def bucket(le):
+        return parsed[("stage_duration_seconds_bucket", f'{{stage="fit",le="{le}"}}')]
+
+    assert [bucket(le) for le in ("0.005", "0.025", "0.05", "2.5", "5.0", "60.0", "+Inf")] == [1, 1, 3, 3, 4, 4, 5]
+    assert parsed[("stage_duration_seconds_count", '{stage="fit"}')] == 5
+    assert parsed[("stage_duration_seconds_sum", '{stage="fit"}')] == pytest.approx(103.083)
+
+
+def test_label_values_are_escaped():
+    metrics.inc("admission_rejected_total", endpoint='say "hi"', reason="a\\b")
+    line = [l for l in metrics.render_metrics().splitlines() if l.startswith("admission_rejected_total")][0]
+    assert line == 'admission_rejected_total{endpoint="say \\"hi\\"",reason="a\\\\b"} 1'
+    assert SAMPLE.match(line)
+
+
+def test_span_records_the_stage_even_on_error():
+    with pytest.raises(RuntimeError):
+        with metrics.span("load", endpoint="x"):
+            raise RuntimeError
+    parsed = samples(metrics.render_metrics())
+    assert parsed[("stage_duration_seconds_count", '{endpoint="x",stage="load"}')] == 1
+
+
+def test_endpoint_exposes_request_metrics():
+    app = Flask(__name__)
+    metrics.init_app(app)
+    app.register_blueprint(metrics.metrics_bp)
+    app.add_url_rule("/ping", "ping", lambda: "pong")
+    client = app.test_client()
+    client.get("/ping")
+    client.get("/missing")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    parsed = samples(response.get_data(as_text=True))
+    assert parsed[("http_request_duration_seconds_count", '{endpoint="ping",method="GET",status="200"}')] == 1
+    assert parsed[("http_request_duration_seconds_count", '{endpoint="unmatched",method="GET",status="404"}')] == 1
+    assert parsed[("http_requests_in_flight", '{endpoint="ping"}')] == 0
+    # The scrape itself is still in flight while it renders
+    assert parsed[("http_requests_in_flight", '{endpoint="metrics.metrics"}')] == 1
@@ -0,0 +1,192 @@
+import json
+import time
+import asyncio
+import types
+import threading
+
+import jwt
+import pytest
+
+import admission
+import agent_docs
+import dashboard
+from conftest import make_features
+
+
+class FakeModels:
+    """generate_content that fails for prompts mentioning one forest."""
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    async def generate_content(self, model, contents):
+        if self.failing in contents:
+            raise RuntimeError("quota exceeded")
+        return types.SimpleNamespace(text="## Report\n")
+
+    async def generate_content_stream(self, model, contents):
+        if self.failing in contents:
+            raise RuntimeError("quota exceeded")
+
+        async def chunks():
+            for text in ("## Report\n", "Body\n"):
+                yield types.SimpleNamespace(text=text)
+        return chunks()
+
+
+@pytest.fixture
+def policy_client(monkeypatch, client, use_features, repo_dir):
+    use_features(make_features())
+    monkeypatch.setattr(dashboard, "EVAL_CACHE", {})
+    # Each test starts with a full per-user rate budget
+    for gate in admission._GATES.values():
+        monkeypatch.setattr(gate, "user_buckets", {})
+
+    async def no_correlations(forest=None):
+        return {}
+
+    async def forest_correlations(forest):
+        return [{"forest": forest}]
+
+    monkeypatch.setattr(dashboard, "correlation_analysis", no_correlations)
+    monkeypatch.setattr(dashboard, "forest_correlations", forest_correlations)
+
+    def fail_for(forest):
+        client_ = types.SimpleNamespace(aio=types.SimpleNamespace(models=FakeModels(forest)))
+        monkeypatch.setattr(agent_docs, "gemini_client", lambda: client_)
+
+    token = jwt.encode({"username": "tester", "role": "researcher"}, dashboard.SECRET_KEY, algorithm="HS256")
+    return client, {"Authorization": f"Bearer {token}"}, fail_for
+
+
+def stream_events(client, url, headers):
+    """SSE events of a fully read response, closed so its admission slot is released."""
+    response = client.get(url, headers=headers)
+    try:
+        return sse_events(response.get_data())
+    finally:
+        response.close()
+
+
+def sse_events(body):
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_batch_reports_failures_per_forest_without_caching_them(policy_client):
+    client, headers, fail_for = policy_client
+    fail_for("kibwezi")
+    events = stream_events(client, "/dashboard/policy-batch?forests=chyulu,kibwezi", headers)
+
+    by_kind = {}
+    for kind, payload in events:
+        by_kind.setdefault(kind, []).append(payload)
+    assert [p["forest"] for p in by_kind["result"]] == ["chyulu"]
+    assert by_kind["error"] == [{"forest": "kibwezi", "error": agent_docs.POLICY_API_ERROR}]
+    assert by_kind["done"] == [{"forests": ["chyulu", "kibwezi"], "failed": ["kibwezi"]}]
+    assert set(dashboard.EVAL_CACHE) == {"chyulu"}
+
+
+def test_policy_results_failure_is_not_cached(policy_client):
+    client, headers, fail_for = policy_client
+    fail_for("chyulu")
+    response = client.get("/dashboard/policy-results?forest=chyulu", headers=headers)
+    assert response.status_code == 502
+    assert "chyulu" not in dashboard.EVAL_CACHE
+
+    fail_for("nothing")
+    response = client.get("/dashboard/policy-results?forest=chyulu", headers=headers)
+    assert response.status_code == 200 and response.get_json()["results"] == "## Report\n"
+
+
+def test_policy_results_times_out_with_the_llm(policy_client, monkeypatch):
+    client, headers, _ = policy_client
+
+    class SlowModels:
+        async def generate_content(self, model, contents):
+            await asyncio.sleep(30)
+
+    client_ = types.SimpleNamespace(aio=types.SimpleNamespace(models=SlowModels()))
+    monkeypatch.setattr(agent_docs, "gemini_client", lambda: client_)
+    monkeypatch.setattr(dashboard, "LLM_TIMEOUT", 0.2)
+
+    started = time.monotonic()
+    response = client.get("/dashboard/policy-results?forest=chyulu", headers=headers)
+    assert response.status_code == 504
+    assert time.monotonic() - started < 5
+    assert "chyulu" not in dashboard.EVAL_CACHE
+
+
+def test_batch_sends_results_before_correlations_complete(policy_client, monkeypatch):
+    client, headers, fail_for = policy_client
+    fail_for("nothing")
+    released = threading.Event()
+
+    async def slow_correlations(forest=None):
+        while not released.is_set():
+            await asyncio.sleep(0.01)
+        return {"summary": "ok"}
+
+    monkeypatch.setattr(dashboard, "correlation_analysis", slow_correlations)
+    response = client.get("/dashboard/policy-batch?forests=chyulu,kibwezi", headers=headers, buffered=False)
+    chunks = iter(response.response)
+
+    first = sse_events(next(chunks))
+    assert first[0][0] == "result" and first[0][1]["cached"] is False
+    assert dashboard.EVAL_CACHE == {}
+
+    released.set()
+    events = first + sse_events(b"".join(chunks))
+    response.close()
+    assert [kind for kind, _ in events] == ["result", "result", "done"]
+    for forest in ("chyulu", "kibwezi"):
+        assert dashboard.EVAL_CACHE[forest]["correlation_analysis"] == {
+            "summary": "ok", "forest_correlations": [{"forest": forest}]}
+
+
+def test_batch_hides_unexpected_errors(policy_client, monkeypatch):
+    client, headers, _ = policy_client
+
+    async def broken(forests, parallelism):
+        raise RuntimeError("internal detail")
+        yield
+
+    monkeypatch.setattr(dashboard, "batch_policy_evaluation", broken)
+    events = stream_events(client, "/dashboard/policy-batch?forests=chyulu", headers)
+    assert events == [("error", {"error": agent_docs.POLICY_API_ERROR})]
+
+
+def test_stream_sends_chunks_then_done_and_replays_from_cache(policy_client):
+    client, headers, fail_for = policy_client
+    fail_for("nothing")
+
+    events = stream_events(client, "/dashboard/policy-stream?forest=chyulu", headers)
+    assert [kind for kind, _ in events] == ["chunk", "chunk", "done"]
+    assert "".join(payload["text"] for kind, payload in events if kind == "chunk") == "## Report\nBody\n"
+    assert events[-1][1] == {"cached": False, "last_updated": dashboard.EVAL_CACHE["chyulu"]["last_updated"]}
+
+    events = stream_events(client, "/dashboard/policy-stream?forest=chyulu", headers)
+    assert events == [("chunk", {"text": "## Report\nBody\n"}),
+                      ("done", {"cached": True, "last_updated": dashboard.EVAL_CACHE["chyulu"]["last_updated"]})]
+
+
+def test_stream_error_cancels_correlations(policy_client, monkeypatch):
+    client, headers, fail_for = policy_client
+    fail_for("chyulu")
+    cancelled = threading.Event()
+
+    async def endless_correlations(forest=None):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(dashboard, "correlation_analysis", endless_correlations)
+    events = stream_events(client, "/dashboard/policy-stream?forest=chyulu", headers)
+    assert events == [("error", {"error": agent_docs.POLICY_API_ERROR})]
+    assert cancelled.wait(5)
+    assert "chyulu" not in dashboard.EVAL_CACHE
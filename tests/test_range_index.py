@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import range_index
+from conftest import make_features, make_scenes
+
+RANGES = [("2020-01-01", "2021-12-31"), ("2020-02-10", "2020-07-03"), ("2020-03-15", "2020-03-15"), ("2019-01-01", "2019-06-30")]
+FOREST_SETS = [None, ["kibwezi"], ["chyulu", "kivale"], ["unknown"]]
+FREQS = {"weekly": "W-SUN", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+
+
+@pytest.fixture
+def frame(use_features):
+    # Uneven cadence per forest, so buckets and windows hold different scene counts
+    scenes = pd.concat([
+        make_scenes(forests=("chyulu",), periods=90, freq="5D", seed=1),
+        make_scenes(forests=("kibwezi",), start="2020-01-04", periods=60, freq="9D", seed=2),
+        make_scenes(forests=("kivale",), start="2020-02-20", periods=40, freq="12D", seed=3),
+    ], ignore_index=True)
+    return use_features(make_features(scenes))
+
+
+def selected(df, forests, date_from, date_to, threshold=None):
+    """Scenes of the forests within the inclusive dates, with EPI and alerts at threshold."""
+    df = features.compute_environmental_index(df, threshold)
+    mask = (df["date"] >= pd.Timestamp(date_from)) & (df["date"] <= pd.Timestamp(date_to))
+    if forests:
+        mask &= df["forest"].isin(forests)
+    return df[mask]
+
+
+def day_range(date_from, date_to):
+    return range_index.parse_range({"date_from": date_from, "date_to": date_to})
+
+
+@pytest.mark.parametrize("date_from, date_to", RANGES)
+@pytest.mark.parametrize("forests", FOREST_SETS)
+@pytest.mark.parametrize("threshold", [None, 0.58, 0.64])
+def test_counts_and_rows_match_brute_force(frame, date_from, date_to, forests, threshold):
+    index = range_index.get_range_index(threshold)
+    start_day, end_day = day_range(date_from, date_to)
+    expected = selected(frame, forests, date_from, date_to, threshold)
+
+    alerts, count = range_index.count_alerts_in_range(index, forests, start_day, end_day)
+    assert (alerts, count) == (int(expected["alert"].sum()), len(expected))
+    rows = range_index.rows_in_range(index, forests, start_day, end_day)
+    assert sorted(rows.tolist()) == expected.index.tolist()
+
+
+@pytest.mark.parametrize("resolution", list(FREQS))
+@pytest.mark.parametrize("forests", FOREST_SETS[:3])
+@pytest.mark.parametrize("per_forest", [False, True])
+def test_buckets_match_groupby(frame, resolution, forests, per_forest):
+    date_from, date_to = "2020-02-10", "2021-03-20"
+    start_day, end_day = day_range(date_from, date_to)
+    result = range_index.aggregate(range_index.get_range_index(0.6), forests, start_day, end_day,
+                                   resolution, per_forest=per_forest)
+
+    expected = selected(frame, forests, date_from, date_to, 0.6)
+    label = expected["date"].dt.to_period(FREQS[resolution]).dt.start_time.clip(lower=pd.Timestamp(date_from))
+    keys = [expected["forest"].astype(str), label] if per_forest else [label]
+    grouped = expected.groupby(keys).agg(RFDI=("RFDI", "mean"), EPI=("EPI", "mean"),
+                                         alert=("alert", "sum"), count=("RFDI", "size"))
+
+    assert len(result) == len(grouped)
+    assert result["count"].tolist() == grouped["count"].tolist()
+    assert result["alert"].tolist() == grouped["alert"].tolist()
+    assert result["RFDI"].to_numpy() == pytest.approx(grouped["RFDI"].to_numpy(), rel=1e-6)
+    assert result["EPI"].to_numpy() == pytest.approx(grouped["EPI"].to_numpy(), rel=1e-9)
+    assert result["period"].tolist() == [d.strftime("%Y-%m-%d") for d in grouped.index.get_level_values(-1)]
+    if per_forest:
+        assert result["forest"].tolist() == grouped.index.get_level_values(0).tolist()
+
+
+@pytest.mark.parametrize("window_days", [1, 30, 90])
+def test_rolling_windows_match_brute_force(frame, window_days):
+    date_from, date_to = "2020-03-01", "2020-09-30"
+    start_day, end_day = day_range(date_from, date_to)
+    forests = ["chyulu", "kibwezi"]
+    result = range_index.aggregate(range_index.get_range_index(), forests, start_day, end_day,
+                                   "rolling", window_days)
+
+    # Windows are clipped to the range, so early windows hold fewer days
+    scenes = selected(frame, forests, date_from, date_to)
+    anchors = np.unique(scenes["date"])
+    assert result["period"].tolist() == [pd.Timestamp(a).strftime("%Y-%m-%d") for a in anchors]
+    for row, anchor in zip(result.itertuples(), anchors):
+        window = scenes[(scenes["date"] > anchor - pd.Timedelta(days=window_days)) & (scenes["date"] <= anchor)]
+        assert row.count == len(window)
+        assert row.alert == int(window["alert"].sum())
+        assert row.RFDI == pytest.approx(window["RFDI"].mean(), rel=1e-6)
+
+
+def test_empty_range_returns_nothing(frame):
+    start_day, end_day = day_range("2019-01-01", "2019-06-30")
+    index = range_index.get_range_index()
+    assert range_index.aggregate(index, None, start_day, end_day).empty
+    assert range_index.rows_in_range(index, None, start_day, end_day).size == 0
+
+
+def test_rolling_windows_do_not_reach_before_the_range(frame):
+    start_day, end_day = day_range("2020-03-01", "2020-03-31")
+    result = range_index.aggregate(range_index.get_range_index(), None, start_day, end_day, "rolling", 90)
+    in_range = selected(frame, None, "2020-03-01", "2020-03-31")
+    assert result["count"].iloc[0] == (in_range["date"] == in_range["date"].min()).sum()
+
+
+@pytest.mark.parametrize("args, expected", [
+    ({"year": "2020", "month": "3"}, ("2020-03-01", "2020-04-01")),
+    ({"year": "2020"}, ("2020-01-01", "2021-01-01")),
+    ({"month": "3", "date_from": "2020-01-01", "date_to": "2020-01-31"}, ("2020-01-01", "2020-02-01")),
+])
+def test_parse_range_periods(args, expected):
+    assert range_index.parse_range(args) == tuple(int(range_index.to_days(d)) for d in expected)
+
+
+@pytest.mark.parametrize("args", [{"month": "3"}, {"date_from": "2020-02-01", "date_to": "2020-01-01"}])
+def test_parse_range_rejects(args):
+    with pytest.raises(ValueError):
+        range_index.parse_range(args)
+
+
+def test_month_without_year_is_rejected_where_it_selects_the_range(client, frame):
+    assert client.get("/dashboard/forest-ranking?month=3").status_code == 400
+    assert client.get("/ndvi/api/s1/cube?month=3").status_code == 400
+    assert client.get("/dashboard/forest-ranking?year=2020&month=3").status_code == 200
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import range_index
+import ranking
+from conftest import make_features, make_scenes
+
+PERIODS = [("2020-01-01", "2021-12-31"), ("2020-03-01", "2020-10-15")]
+
+
+@pytest.fixture
+def frame(use_features):
+    scenes = pd.concat([
+        make_scenes(forests=("chyulu", "kivale"), periods=90, freq="5D", seed=1),
+        make_scenes(forests=("kibwezi",), start="2020-01-04", periods=60, freq="9D", seed=2),
+        make_scenes(forests=("makuli",), start="2019-01-01", periods=20, freq="9D", seed=3),
+    ], ignore_index=True)
+    return use_features(make_features(scenes))
+
+
+def brute_force(frame, date_from, date_to, threshold):
+    df = features.compute_environmental_index(frame, threshold)
+    df = df[(df["date"] >= pd.Timestamp(date_from)) & (df["date"] <= pd.Timestamp(date_to))]
+    table = df.groupby(df["forest"].astype(str)).agg(
+        alert_count=("alert", "sum"), count=("RFDI", "size"), RFDI=("RFDI", "mean"), EPI=("EPI", "mean"))
+    table["alert_rate"] = table["alert_count"] / table["count"]
+    table["health"] = (100 - table["alert_count"] / table["alert_count"].sum() * 100).clip(lower=0).round(1)
+
+    # Slope of monthly mean RFDI over the last 12 calendar months holding data in the period, per year
+    months = pd.period_range(df["date"].min(), df["date"].max(), freq="M")[-ranking.TREND_MONTHS:]
+    monthly = df.groupby([df["forest"].astype(str), df["date"].dt.to_period("M")])["RFDI"].mean()
+    slopes = {}
+    for forest in table.index:
+        series = monthly.loc[forest].reindex(months)
+        x = np.flatnonzero(series.notna())
+        slopes[forest] = np.polyfit(x, series.dropna().to_numpy(), 1)[0] * 12 if len(x) >= 2 else np.nan
+    table["trend_slope"] = pd.Series(slopes)
+    return table
+
+
+@pytest.mark.parametrize("date_from, date_to", PERIODS)
+@pytest.mark.parametrize("threshold", [None, 0.6])
+def test_metrics_match_brute_force(frame, date_from, date_to, threshold):
+    start_day, end_day = range_index.parse_range({"date_from": date_from, "date_to": date_to})
+    result = ranking.rank_forests(range_index.get_range_index(threshold), start_day, end_day).set_index("forest")
+    expected = brute_force(frame, date_from, date_to, threshold)
+
+    assert sorted(result.index) == sorted(expected.index)
+    expected = expected.loc[result.index]
+    assert result["count"].tolist() == expected["count"].tolist()
+    assert result["alert_count"].tolist() == expected["alert_count"].tolist()
+    assert result["health"].tolist() == expected["health"].tolist()
+    for column in ("alert_rate", "RFDI", "EPI", "trend_slope"):
+        assert result[column].to_numpy() == pytest.approx(expected[column].to_numpy(), rel=1e-5, nan_ok=True)
+
+
+@pytest.mark.parametrize("sort_by", list(ranking.SORT_KEYS))
+def test_rows_are_ordered_by_the_sort_key(frame, sort_by):
+    start_day, end_day = range_index.parse_range({"date_from": "2020-01-01", "date_to": "2021-12-31"})
+    result = ranking.rank_forests(range_index.get_range_index(0.6), start_day, end_day, sort_by)
+
+    assert result["rank"].tolist() == list(range(1, len(result) + 1))
+    values = result[sort_by].dropna().tolist()
+    assert values == sorted(values, reverse=not ranking.SORT_KEYS[sort_by])
+
+
+@pytest.mark.parametrize("sort_by", list(ranking.SORT_KEYS))
+def test_ties_are_broken_by_forest_name(use_features, sort_by):
+    twin = make_scenes(forests=("kivale",), seed=4)
+    use_features(make_features(pd.concat([twin, twin.assign(forest="chyulu")], ignore_index=True)))
+    start_day, end_day = range_index.parse_range({"date_from": "2020-01-01", "date_to": "2021-12-31"})
+    result = ranking.rank_forests(range_index.get_range_index(0.6), start_day, end_day, sort_by)
+
+    assert result[["rank", "forest"]].values.tolist() == [[1, "chyulu"], [2, "kivale"]]
+    assert result["health"].tolist() == [50.0, 50.0]
+
+
+def test_forests_without_scenes_in_the_period_are_left_out(frame):
+    start_day, end_day = range_index.parse_range({"year": "2019"})
+    result = ranking.rank_forests(range_index.get_range_index(), start_day, end_day)
+    assert result["forest"].tolist() == ["makuli"]
+    # A lone forest holds every alert of the period
+    assert result["health"].tolist() == [0.0 if result["alert_count"][0] else 100.0]
+
+
+def test_endpoint_ranks_and_rejects_unknown_sort_keys(client, frame):
+    body = client.get("/dashboard/forest-ranking?date_from=2020-01-01&date_to=2021-12-31&sort_by=RFDI").get_json()
+    assert body["sort_by"] == "RFDI"
+    assert [f["rank"] for f in body["forests"]] == [1, 2, 3]
+    rfdi = [f["RFDI"] for f in body["forests"]]
+    assert rfdi == sorted(rfdi)
+
+    assert client.get("/dashboard/forest-ranking?sort_by=size").status_code == 400
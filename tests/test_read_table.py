@@ -0,0 +1,83 @@
+import sys
+
+import pandas as pd
+import pytest
+
+import features
+from conftest import make_scenes
+
+
+@pytest.fixture
+def export(tmp_path):
+    """The scenes as Earth Engine writes them: extra bookkeeping columns, in its own column order."""
+    scenes = make_scenes(periods=20)
+    scenes[".geo"] = ""
+    scenes["system:index"] = [f"S1_{i}" for i in range(len(scenes))]
+    scenes["orbit"] = "DESCENDING"
+    raw = scenes[["system:index", "VH", "VV", "date", "forest", "orbit", ".geo"]]
+    raw.to_csv(tmp_path / "export.csv", index=False)
+    return tmp_path, scenes
+
+
+def check(df, scenes):
+    assert list(df.columns) == list(features.SOURCE_DTYPES)
+    assert df["VV"].dtype == "float64" and df["VH"].dtype == "float64"
+    assert isinstance(df[".geo"].dtype, pd.CategoricalDtype)
+    assert df["date"].tolist() == scenes["date"].tolist()
+    assert df["forest"].tolist() == scenes["forest"].tolist()
+    pd.testing.assert_series_equal(df["VV"], scenes["VV"])
+    pd.testing.assert_series_equal(df["VH"], scenes["VH"])
+
+
+def test_csv_read_projects_and_types_columns(export):
+    tmp_path, scenes = export
+    check(features.read_table(str(tmp_path / "export.csv"), features.SOURCE_DTYPES), scenes)
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".feather"])
+def test_columnar_reads_match_the_csv(export, ext):
+    tmp_path, scenes = export
+    path = str(tmp_path / f"export{ext}")
+    features.convert_source(str(tmp_path / "export.csv"), path)
+
+    df = features.read_table(path, features.SOURCE_DTYPES)
+    check(df, scenes)
+    pd.testing.assert_frame_equal(df, features.read_table(str(tmp_path / "export.csv"), features.SOURCE_DTYPES))
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".feather"])
+def test_columnar_dates_and_missing_columns(tmp_path, ext):
+    scenes = make_scenes(periods=5)
+    raw = scenes.assign(date=pd.to_datetime(scenes["date"]), orbit="ASCENDING")
+    path = str(tmp_path / f"dated{ext}")
+    raw.to_parquet(path) if ext == ".parquet" else raw.to_feather(path)
+
+    df = features.read_table(path, features.SOURCE_DTYPES)
+    assert list(df.columns) == ["date", "forest", "VV", "VH"]
+    assert df["date"].tolist() == scenes["date"].tolist()
+
+
+def test_csv_falls_back_to_pandas_without_pyarrow(export, monkeypatch):
+    tmp_path, scenes = export
+    with_arrow = features.read_table(str(tmp_path / "export.csv"), features.SOURCE_DTYPES)
+    features.convert_source(str(tmp_path / "export.csv"), str(tmp_path / "export.parquet"))
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    df = features.read_table(str(tmp_path / "export.csv"), features.SOURCE_DTYPES)
+    assert list(df.columns) == list(features.SOURCE_DTYPES)
+    pd.testing.assert_frame_equal(df[["VV", "VH"]], with_arrow[["VV", "VH"]])
+    assert df["date"].tolist() == with_arrow["date"].tolist()
+
+    with pytest.raises(ImportError):
+        features.read_table(str(tmp_path / "export.parquet"), features.SOURCE_DTYPES)
+
+
+def test_columnar_copy_is_preferred_over_the_csv(export, monkeypatch):
+    tmp_path, _ = export
+    monkeypatch.delenv("SENTINEL_SOURCE", raising=False)
+    monkeypatch.setattr(features, "SOURCE_CSV", str(tmp_path / "export.csv"))
+    assert features.source_path() == str(tmp_path / "export.csv")
+
+    features.convert_source(str(tmp_path / "export.csv"), str(tmp_path / "export.feather"))
+    assert features.source_path() == str(tmp_path / "export.feather")
+    assert features.source_path("other.csv") == "other.csv"
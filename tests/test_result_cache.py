@@ -0,0 +1,84 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import result_cache
+from result_cache import ResultCache, normalized_params, ENTRY_OVERHEAD
+from conftest import make_features
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResultCache(1 << 20)
+    monkeypatch.setattr(result_cache, "_CACHE", cache)
+    return cache
+
+
+def test_lru_evicts_least_recently_used_within_budget():
+    keys = "abcdefgh"
+    cache = ResultCache(len(keys) * (100 + ENTRY_OVERHEAD))
+    for key in keys:
+        cache.put(key, "v1", b"x" * 100, "application/json")
+    assert cache.get("a", "v1") is not None  # a is now the most recently used
+    cache.put("z", "v1", b"x" * 100, "application/json")
+    assert cache.get("b", "v1") is None
+    assert all(cache.get(key, "v1") is not None for key in "acdefghz")
+    stats = cache.snapshot()
+    assert stats["evictions"] == 1 and stats["entries"] == len(keys) and stats["bytes"] <= stats["max_bytes"]
+
+
+def test_oversized_entries_are_not_stored():
+    cache = ResultCache(8 * 1024)
+    cache.put("big", "v1", b"x" * 2048, "application/json")
+    assert cache.get("big", "v1") is None
+
+
+def test_new_data_version_drops_entries():
+    cache = ResultCache(1 << 20)
+    cache.put("a", "v1", b"{}", "application/json")
+    assert cache.get("a", "v2") is None
+    stats = cache.snapshot()
+    assert stats["invalidations"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_normalized_params():
+    key = normalized_params(MultiDict({"forests": " kivale,chyulu ", "threshold": "0.60", "year": "", "month": "03"}))
+    assert key == (("forests", "chyulu,kivale"), ("month", "3"), ("threshold", "0.6"))
+    # Duplicates select a different result shape, so they stay in the key
+    assert normalized_params(MultiDict({"forests": "chyulu,chyulu"})) != normalized_params(MultiDict({"forests": "chyulu"}))
+    # Only the first value of a repeated parameter reaches the views
+    repeated = MultiDict([("forests", "chyulu"), ("forests", "kivale")])
+    assert normalized_params(repeated) == normalized_params(MultiDict({"forests": "chyulu"}))
+    assert normalized_params(MultiDict({"year": "abc"})) == (("year", "abc"),)
+
+
+def test_cached_responses_match_fresh_ones(use_features, client, cache):
+    use_features(make_features())
+    first = client.get("/dashboard/summary?forests=kivale,chyulu&threshold=0.6")
+    again = client.get("/dashboard/summary?forests=chyulu,kivale&threshold=0.60")
+    assert again.get_data() == first.get_data()
+    assert cache.snapshot()["hits"] == 1
+
+    doubled = client.get("/dashboard/summary?forests=chyulu,chyulu").get_json()
+    single = client.get("/dashboard/summary?forests=chyulu").get_json()
+    assert "forest" in doubled["trend"][0] and "forest" not in single["trend"][0]
+
+
+def test_errors_are_not_cached(use_features, client, cache):
+    use_features(make_features())
+    assert client.get("/dashboard/forest-health?year=abc").status_code == 400
+    assert client.get("/dashboard/forest-health?year=abc").status_code == 400
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_new_scenes_invalidate_cached_results(use_features, client, cache):
+    import features
+
+    use_features(make_features())
+    before = client.get("/dashboard/forest-health?forests=chyulu").get_json()
+    features.append_scenes(features.pd.DataFrame({
+        "forest": ["chyulu"] * 3, "date": ["2030-01-01", "2030-01-07", "2030-01-13"],
+        "VV": [-6.0] * 3, "VH": [-20.0] * 3,
+    }))
+    after = client.get("/dashboard/forest-health?forests=chyulu").get_json()
+    assert after["alert_count"] == before["alert_count"] + 3
+    assert cache.snapshot()["hits"] == 0
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+import admission
+import dashboard
+from conftest import make_features
+
+
+def test_dashboard_analytics_run_on_the_analytics_pool(use_features, client, monkeypatch):
+    use_features(make_features())
+    threads = []
+
+    def recording(fn):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return fn(*args)
+        return wrapper
+
+    for name in ("forest_health", "filtered_scenes", "compute_dashboard_summary"):
+        monkeypatch.setattr(dashboard, name, recording(getattr(dashboard, name)))
+
+    for path in ("forest-health", "filtered-data", "summary"):
+        assert client.get(f"/dashboard/{path}?forests=chyulu&threshold=0.6").status_code == 200
+    assert len(threads) == 3 and all(name.startswith("analytics") for name in threads)
+
+
+def test_trend_runs_on_the_analytics_pool(use_features, client, monkeypatch):
+    import analysis
+
+    use_features(make_features())
+    threads = []
+    trend = analysis.monthly_trend
+
+    def recording(*args):
+        threads.append(threading.current_thread().name)
+        return trend(*args)
+
+    monkeypatch.setattr(analysis, "monthly_trend", recording)
+    response = client.get("/ndvi/api/s1/trend?forests=chyulu,kibwezi&threshold=0.6")
+    assert response.status_code == 200 and response.get_json()
+    assert len(threads) == 1 and threads[0].startswith("analytics")
+
+
+def test_llm_endpoints_share_a_thread_budget(monkeypatch):
+    shared = threading.BoundedSemaphore(2)
+    monkeypatch.setitem(admission._SHARED, "llm", shared)
+    evaluate = admission.Gate("evaluate", admission.LIMITS["evaluate"])
+    policy = admission.Gate("policy_results", admission.LIMITS["policy_results"])
+
+    evaluate.enter("user:a")
+    policy.enter("user:b")
+    with pytest.raises(admission.Rejected) as rejected:
+        policy.enter("user:c")
+    assert rejected.value.reason == "threads_busy"
+
+    # Leaving frees the share for any of the endpoints, and rejections leak nothing
+    evaluate.leave("user:a")
+    policy.enter("user:c")
+    policy.leave("user:b")
+    policy.leave("user:c")
+    assert shared.acquire(blocking=False) and shared.acquire(blocking=False)
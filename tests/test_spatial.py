@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import spatial
+from conftest import make_features, make_scenes
+
+# Chyulu split into a 5 x 5 grid of 0.01 degree cells; the other forests carry
+# no geometry and fall back to their export regions.
+ORIGIN = (37.80, -2.72)
+STEP = 0.01
+
+
+def cell_geo(i, j):
+    lon, lat = ORIGIN[0] + i * STEP, ORIGIN[1] + j * STEP
+    ring = [[lon, lat], [lon + STEP, lat], [lon + STEP, lat + STEP], [lon, lat + STEP], [lon, lat]]
+    return json.dumps({"type": "Polygon", "coordinates": [ring]})
+
+
+@pytest.fixture
+def frame(use_features):
+    frames = []
+    for n, (i, j) in enumerate((i, j) for i in range(5) for j in range(5)):
+        cell = make_scenes(forests=("chyulu",), periods=12, freq="15D", seed=n)
+        frames.append(cell.assign(**{".geo": cell_geo(i, j)}))
+    frames.append(make_scenes(forests=("kibwezi", "kivale"), periods=12, freq="15D"))
+    return use_features(make_features(pd.concat(frames, ignore_index=True)))
+
+
+def brute_force_bbox(index, bbox):
+    b = index["bounds"]
+    hit = (b[:, 0] <= bbox[2]) & (b[:, 2] >= bbox[0]) & (b[:, 1] <= bbox[3]) & (b[:, 3] >= bbox[1])
+    return set(np.flatnonzero(hit))
+
+
+def test_index_has_one_cell_per_geometry(frame):
+    index = spatial.build_spatial_index(frame)
+    assert sorted(index["cells"]["forest"].value_counts().items()) == [("chyulu", 25), ("kibwezi", 1), ("kivale", 1)]
+
+    # Each cell's rows share its forest and bounds
+    for cell in range(len(index["cells"])):
+        rows = frame.iloc[spatial.rows_for_cells(index, np.array([cell]))]
+        assert len(rows) == 12
+        assert (rows["forest"] == index["cells"].loc[cell, "forest"]).all()
+
+
+def test_bbox_query_matches_brute_force(frame):
+    index = spatial.build_spatial_index(frame)
+    rng = np.random.default_rng(0)
+    boxes = [(37.815, -2.705, 37.835, -2.685), (37.0, -3.0, 38.0, -1.0), (36.0, 0.0, 36.5, 0.5)]
+    for _ in range(50):
+        lon, lat = rng.uniform(37.3, 38.0), rng.uniform(-2.8, -1.5)
+        boxes.append((lon, lat, lon + rng.uniform(0, 0.2), lat + rng.uniform(0, 0.2)))
+
+    for bbox in boxes:
+        assert set(spatial.cells_in_bbox(index, bbox)) == brute_force_bbox(index, bbox)
+
+
+def test_point_bbox_finds_the_enclosing_cell(frame):
+    index = spatial.build_spatial_index(frame)
+    lon, lat = ORIGIN[0] + 2.5 * STEP, ORIGIN[1] + 3.5 * STEP
+    cells = index["cells"].iloc[spatial.cells_in_bbox(index, (lon, lat, lon, lat))]
+    assert len(cells) == 1
+    assert (cells["lon"].iloc[0], cells["lat"].iloc[0]) == pytest.approx((lon, lat), abs=1e-5)
+
+
+def test_polygon_query_tests_cell_centres(frame):
+    index = spatial.build_spatial_index(frame)
+    # Right triangle over the chyulu grid: centres with (x - x0) + (y - y0) < 0.055 are inside
+    triangle = [[ORIGIN[0], ORIGIN[1]], [ORIGIN[0] + 0.055, ORIGIN[1]], [ORIGIN[0], ORIGIN[1] + 0.055]]
+    cells = index["cells"]
+    centre_sum = (cells["lon"] - ORIGIN[0]) + (cells["lat"] - ORIGIN[1])
+    expected = set(np.flatnonzero((cells["forest"] == "chyulu") & (centre_sum < 0.055)))
+
+    assert set(spatial.cells_in_polygon(index, triangle)) == expected
+    assert len(expected) == 15
+
+
+def test_parse_polygon_accepts_geojson_and_pairs():
+    pairs = spatial.parse_polygon("37.8 -2.7,37.9 -2.7,37.9 -2.6")
+    geojson = spatial.parse_polygon(json.dumps({"type": "Polygon", "coordinates": [pairs.tolist()]}))
+    np.testing.assert_array_equal(pairs, geojson)
+
+    with pytest.raises(ValueError):
+        spatial.parse_polygon("37.8 -2.7,37.9 -2.7")
+    with pytest.raises(ValueError):
+        spatial.parse_bbox("37.9,-2.7,37.8,-2.6")
+
+
+def test_spatial_endpoint_aggregates_matching_cells(client, frame):
+    bbox = (37.805, -2.715, 37.825, -2.705)
+    body = client.get("/ndvi/api/s1/spatial?bbox=" + ",".join(map(str, bbox))).get_json()
+
+    index = spatial.build_spatial_index(frame)
+    rows = frame.iloc[spatial.rows_for_cells(index, np.array(sorted(brute_force_bbox(index, bbox))))]
+    assert body["aggregate"]["cells"] == 6
+    assert body["aggregate"]["count"] == len(rows) == len(body["data"])
+    assert body["aggregate"]["RFDI"] == pytest.approx(float(rows["RFDI"].mean()))
+    assert sum(cell["count"] for cell in body["cells"]) == len(rows)
+
+    filtered = client.get("/ndvi/api/s1/spatial?rows=0&forests=kibwezi&bbox=" + ",".join(map(str, bbox))).get_json()
+    assert "data" not in filtered and filtered["aggregate"]["count"] == 0
+
+
+@pytest.mark.parametrize("query", ["", "?bbox=1,2,3", "?bbox=38,-2,37,-1", "?polygon=37.8 -2.7"])
+def test_spatial_endpoint_rejects_bad_areas(client, frame, query):
+    assert client.get("/ndvi/api/s1/spatial" + query).status_code == 400
@@ -0,0 +1,33 @@
+import os
+import sys
+import json
+import subprocess
+
+from conftest import ROOT
+
+# Cold import of the app, in seconds; generous for slow CI machines. Before the
+# heavy libraries were deferred this took several seconds plus CSV preprocessing.
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3"))
+
+DEFERRED_MODULES = ["google.genai", "statsmodels", "scipy.stats", "reportlab", "requests",
+                    "autogen_agentchat", "autogen_ext"]
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+import features
+print(json.dumps({"seconds": elapsed, "modules": sorted(m for m in %r if m in sys.modules),
+                  "features_loaded": bool(features._STATE)}))
+"""
+
+
+def test_app_import_is_light_and_fast():
+    result = subprocess.run([sys.executable, "-c", PROBE % (DEFERRED_MODULES,)], cwd=ROOT,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe["modules"] == []
+    assert not probe["features_loaded"]
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS, probe
@@ -0,0 +1,41 @@
+import json
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import whistle
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = tmp_path / "reports.json"
+    monkeypatch.setattr(whistle, "STORAGE_FILE", str(path))
+    return path
+
+
+def _save_many(worker, count=25):
+    for i in range(count):
+        whistle.save_report({"id": f"{worker}-{i}", "forest": "Chyulu", "report": "charcoal"})
+
+
+def test_concurrent_threads_keep_every_report(store):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_save_many, range(8)))
+    with open(store) as f:
+        reports = json.load(f)
+    assert len({r["id"] for r in reports}) == len(reports) == 8 * 25
+
+
+@pytest.mark.skipif(whistle.fcntl is None, reason="cross-process locking needs fcntl")
+def test_concurrent_processes_keep_every_report(store):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_many, args=(w,)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    with open(store) as f:
+        reports = json.load(f)
+    assert len({r["id"] for r in reports}) == len(reports) == 4 * 25
+    assert not list(store.parent.glob("*.tmp-*"))
@@ -5,11 +5,22 @@ import json
 import os
 import jwt
 import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from incidents import record_report, file_stat, STORAGE_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
 
 whistle_bp = Blueprint("whistleblower", __name__)
 
-# Storage for anonymous reports
-STORAGE_FILE = "whistleblower_reports.json"
+logger = logging.getLogger(__name__)
+
+# Storage for anonymous reports (WHISTLE_STORAGE_FILE, shared with incidents.py)
+_SAVE_LOCK = threading.Lock()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_THIS_SECRET")
 
@@ -25,25 +36,48 @@ def get_user_role():
         return None
 
 
-def save_report(data):
-    """Save whistleblower report into JSON storage."""
-    if not os.path.exists(STORAGE_FILE):
-        with open(STORAGE_FILE, "w") as f:
-            json.dump([], f)
-
-    with open(STORAGE_FILE, "r") as f:
-        reports = json.load(f)
+@contextmanager
+def _store_lock():
+    """Exclusive lock on a side file, held across the read-modify-write by one worker process at a time."""
+    with open(f"{STORAGE_FILE}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-    reports.append(data)
 
-    with open(STORAGE_FILE, "w") as f:
-        json.dump(reports, f, indent=4)
+def save_report(data):
+    """
+    Save whistleblower report into JSON storage. Writers are serialized within
+    and across worker processes, and the new list is written to a temp file and
+    renamed over the store, so readers never see a partial file. The incident
+    counters of this process are updated from the list just written.
+    """
+    with _SAVE_LOCK, _store_lock():
+        stat_before = file_stat(STORAGE_FILE)
+        reports = []
+        if stat_before is not None:
+            with open(STORAGE_FILE, "r") as f:
+                reports = json.load(f)
+
+        reports.append(data)
+
+        tmp_path = f"{STORAGE_FILE}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(reports, f, indent=4)
+        os.replace(tmp_path, STORAGE_FILE)
+
+        # Still under the lock, so no other writer can slip in before the stat is recorded
+        record_report(data, reports, stat_before, file_stat(STORAGE_FILE))
 
 
 @whistle_bp.route("/submit", methods=["POST"])
 def submit_report():
     payload = request.get_json()
-    print("Received payload:", payload)  # Debug log
+    logger.debug("Received payload: %s", payload)
 
     if not payload:
         return jsonify({"error": "Missing report payload"}), 400